@@ -1,17 +1,89 @@
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
-from app.services.history_service import list_runs, get_run
+from fastapi.responses import StreamingResponse
+from app.services.history_service import encode_cursor, list_runs, get_run, iter_output, read_output_range, read_output_lines, search_runs, run_stats
 
 router = APIRouter(prefix="/history", tags=["history"])
 
 @router.get("")
-def api_list_history(project_id: str = Query(...), limit: int = Query(30, ge=1, le=200)):     # GET /history?limit=50 형태의 파라미터
+def api_list_history(
+    project_id: str = Query(...),
+    limit: int = Query(30, ge=1, le=200),     # GET /history?limit=50 형태의 파라미터
+    cursor: Optional[str] = Query(None),        # 다음 페이지: 이전 응답의 next_cursor
+    before: Optional[int] = Query(None, ge=0),  # (legacy) started_at 만 - 같은 ms 에 시작한 run 이 빠질 수 있음
+    status: Optional[str] = Query(None),
+):
+    try:
+        items = list_runs(project_id, limit=limit, before=before, status=status, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    more = len(items) == limit
     return {
-        "items": list_runs(project_id, limit=limit)
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if more else None,
+        "next_before": items[-1]["started_at"] if more else None,
     }
 
+# /{run_id} 보다 먼저 등록해야 "search"가 run_id로 잡히지 않음
+@router.get("/search")
+def api_search_history(
+    project_id: str = Query(...),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+):
+    return {
+        "items": search_runs(project_id, q, limit=limit),
+    }
+
+BUCKETS_MS = {
+    "hour": 3600 * 1000,
+    "day": 24 * 3600 * 1000,
+}
+
+@router.get("/stats")
+def api_history_stats(
+    project_id: str = Query(...),
+    bucket: str = Query("hour"),                # hour | day
+    since: Optional[int] = Query(None, ge=0),   # ended_at(ms) 이후만
+):
+    if bucket not in BUCKETS_MS:
+        raise HTTPException(status_code=400, detail="bucket must be one of: hour | day")
+    return run_stats(project_id, BUCKETS_MS[bucket], since=since)
+
+MAX_LINES_PER_READ = 10000
+
 @router.get("/{run_id}")
-def api_get_history(run_id: str, project_id: str=Query(...)):
-    it = get_run(project_id, run_id)
+def api_get_history(
+    run_id: str,
+    project_id: str=Query(...),
+    cursor: Optional[int] = Query(None, ge=0),                  # byte offset
+    limit: int = Query(64 * 1024, ge=1, le=4 * 1024 * 1024),    # cursor 모드에서 읽을 byte 수
+    from_line: Optional[int] = Query(None, ge=0),               # 줄 범위 [from_line, to_line)
+    to_line: Optional[int] = Query(None, ge=0),
+):
+    """
+    - 파라미터 없으면 output 전체 (기존 동작)
+    - cursor/limit: byte 범위, 응답의 cursor_next로 이어 읽기
+    - from_line/to_line: 줄 범위 (virtual scroll 용)
+    """
+    ranged = cursor is not None or from_line is not None
+    it = get_run(project_id, run_id, include_output=not ranged)
     if not it:
         raise HTTPException(status_code=404, detail="Not found")
-    return it
\ No newline at end of file
+
+    if from_line is not None:
+        if to_line is None:
+            to_line = from_line + 1000
+        if to_line < from_line or to_line - from_line > MAX_LINES_PER_READ:
+            raise HTTPException(status_code=400, detail="Invalid line range")
+        it.update(read_output_lines(project_id, run_id, from_line, to_line))
+    elif cursor is not None:
+        it.update(read_output_range(project_id, run_id, cursor, limit))
+    return it
+
+@router.get("/{run_id}/output")
+def api_stream_history_output(run_id: str, project_id: str=Query(...)):
+    # output blob을 그대로 스트리밍 (JSON에 싣지 않음)
+    if not get_run(project_id, run_id, include_output=False):
+        raise HTTPException(status_code=404, detail="Not found")
+    return StreamingResponse(iter_output(project_id, run_id), media_type="text/plain; charset=utf-8")
@@ -3,10 +3,16 @@ import threading
 import uuid
 
 from pathlib import Path
+from typing import Optional, Tuple
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.run_service import run_docker_blocking, RunResult
+from app.core.settings import OUTPUT_TAIL_FLUSH_S, RUN_STATE_POLL_S
+from app.services.run_service import RunResult
+from app.services.run_supervisor import supervise_run
 from app.services.run_manager import run_manager
-from app.services.history_service import create_run, append_output, finish_run
+from app.services.run_scheduler import run_scheduler, load_parallel_limit
+from app.services.run_cache import run_cache
+from app.services.history_service import new_run_id, create_run, buffer_output, finish_run
+from app.services.output_budget import OutputBudget
 
 router = APIRouter()
 
@@ -19,14 +25,6 @@ async def run_ws(ws:WebSocket):
 
     project_id = ws.query_params.get("project_id")
 
-    # --------------------------------------------------
-    # 실행 중복 방지 (Day 8)
-    # --------------------------------------------------
-    if run_manager.get_state(project_id).is_running:
-        await ws.send_text("[BUSY] A run is already in progress.\n")
-        await ws.close()
-        return
-    
     # --------------------------------------------------
     # 실행 컨텍스트 생성
     # --------------------------------------------------
@@ -35,29 +33,157 @@ async def run_ws(ws:WebSocket):
         await ws.close()
 
     project_path = PROJECTS_ROOT / project_id
-    
+
+    # --------------------------------------------------
+    # admission: 프로젝트 동시 실행 수 (모든 API worker 합계) -> host budget (remote 는 broker 가 담당)
+    # 넘으면 거절 대신 대기
+    # --------------------------------------------------
+    opts = run_manager.get_options(project_id)
+
+    # 결과 캐시 (opt-in): hit 이면 컨테이너를 안 띄우니 scheduler 자리도 필요 없음
+    cache = await asyncio.to_thread(run_cache.probe, project_path, opts)
+    cache_hit = cache is not None and cache[1] is not None
+
+    async def on_queue(position: int, eta_s: Optional[int]):
+        await ws.send_text(f"[QUEUE] position {position}, estimated start in ~{eta_s}s\n")
+
+    # run_id 는 대기 전에 정함 (shared store 자리 / stop 대상), history 기록은 자리를 받은 뒤에
+    run_id = new_run_id()
+
+    # run 마다 고유 컨테이너 (같은 프로젝트 run 여러 개 / stop 대상 정확히)
+    container_name = f"freeweb_run_{run_id}"
+
+    # /stop, WS 끊김 -> 대기 / supervisor 즉시 깨움
+    stop_event = asyncio.Event()
     loop = asyncio.get_running_loop()
-    queue: asyncio.Queue[str | None] = asyncio.Queue()
 
-    result_holder = {"result": None}    # thread -> async 공유용
+    async def watch_disconnect():
+        # 대기 중에도 (보낼 것이 없어도) 끊김을 바로 알아챔
+        try:
+            while (await ws.receive())["type"] != "websocket.disconnect":
+                pass
+        except (RuntimeError, WebSocketDisconnect):
+            return
+        if started:
+            await asyncio.to_thread(run_manager.request_stop, run_id)
+        stop_event.set()
+
+    async def stopped_within(timeout_s: float) -> bool:
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    lease = None
+    parallel_limit = None if cache_hit else load_parallel_limit(project_path)
+    started = False
+    admitted = False
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        # 1) shared slot 먼저: scheduler lease 를 쥔 채로 다른 worker 를 기다리면 이 host 의 다른 프로젝트까지 막힘
+        #    (store 호출은 sqlite -> event loop 밖에서)
+        waited = False
+        while not await asyncio.to_thread(run_manager.try_start, run_id, project_id, container_name, -1, stop_event, parallel_limit, loop):
+            if not waited:
+                await ws.send_text("[QUEUE] waiting for runs on other API workers\n")
+                waited = True
+            if await stopped_within(RUN_STATE_POLL_S):
+                return
+        started = True
+
+        # 2) host budget (stop / 끊김이면 대기 취소)
+        if not cache_hit:
+            acquire = asyncio.create_task(run_scheduler.acquire(
+                project_id,
+                opts.cpus,
+                opts.memory_mb,
+                limit=parallel_limit,
+                on_queue=on_queue,
+            ))
+            stop_wait = asyncio.create_task(stop_event.wait())
+            try:
+                await asyncio.wait({acquire, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                stop_wait.cancel()
+                if not acquire.done():
+                    acquire.cancel()
+                    await asyncio.gather(acquire, return_exceptions=True)
+            if acquire.cancelled():
+                return
+            lease = acquire.result()
+        admitted = True
+    except WebSocketDisconnect:
+        return
+    finally:
+        if not admitted:
+            # 자리 받기 전에 끝남: history 에는 안 남김
+            watcher.cancel()
+            if started:
+                await asyncio.to_thread(run_manager.stop_and_clear, run_id)
+
+    # (WS 로 보낼 것, history 에 남길 것) - 상한을 넘은 뒤의 live tail 은 WS 에만
+    queue: asyncio.Queue[Tuple[Optional[str], Optional[str]] | None] = asyncio.Queue()
 
-    # 실행 시작 -> run_id 생성
-    run_id = create_run(project_id)
+    result_holder = {"result": None}
+
+    # output 상한: head는 그대로, 넘치면 tail만 보관 (메모리 / history 는 head + tail 로 bounded)
+    budget = OutputBudget()
+
+    # 실행 시작 -> history 에 run 기록
+    try:
+        await asyncio.to_thread(create_run, project_id, run_id)
+    except Exception:
+        watcher.cancel()
+        if lease is not None:
+            run_scheduler.release(lease)
+        await asyncio.to_thread(run_manager.stop_and_clear, run_id)
+        raise
 
     def on_line(line: str):
-        loop.call_soon_threadsafe(queue.put_nowait, line)
+        truncated = budget.truncated
+        out = budget.feed(line)
+        if out:
+            queue.put_nowait((out, out))
+        elif not truncated and budget.truncated:
+            # history 에는 종료 시 마커 1개만, WS 에는 바로 알림
+            queue.put_nowait((
+                f"\n[TRUNCATED] output exceeded {budget.head_bytes} bytes, showing live tail "
+                f"(last {budget.tail_bytes} bytes are kept when the run ends)\n",
+                None,
+            ))
+
+    def on_notice(line: str):
+        # 시스템 메시지는 budget 밖: WS 에는 아직 안 보여준 live tail 먼저 (순서 유지)
+        live = budget.live() if budget.truncated else ""
+        if live:
+            queue.put_nowait((live, None))
+        queue.put_nowait((line, line))
 
-    def blocking_runner():
+    async def live_tail():
+        # 상한을 넘은 run 도 WS 에서는 멈춘 것처럼 안 보이게 (history 에는 안 씀)
+        while True:
+            await asyncio.sleep(OUTPUT_TAIL_FLUSH_S)
+            if budget.truncated:
+                live = budget.live()
+                if live:
+                    queue.put_nowait((live, None))
+
+    async def runner():
         try:
-            res = run_docker_blocking(
+            res = await supervise_run(
                 project_id=project_id,
-                project_path=project_path, 
-                container_name=run_manager.get_state(project_id).container_name, 
+                run_id=run_id,
+                project_path=project_path,
+                container_name=container_name,
                 on_line=on_line,
+                stop_event=stop_event,
+                cache=cache,
+                on_notice=on_notice,
             )
             result_holder["result"] = res
         except Exception as e:
-            loop.call_soon_threadsafe(queue.put_nowait, f"[ERROR] {e}\n")
+            queue.put_nowait((f"[ERROR] {e}\n", f"[ERROR] {e}\n"))
             result_holder["result"] = RunResult(
                 status="error",
                 exit_code=None,
@@ -66,30 +192,62 @@ async def run_ws(ws:WebSocket):
                 duration_ms=0,
             )
         finally:
-            loop.call_soon_threadsafe(queue.put_nowait, None)  # stdout 종료 신호
+            if budget.truncated:
+                # history 에는 [TRUNCATED n bytes] + tail 1번, WS 는 이미 live tail 을 봤으니 마커 + 못 본 부분만
+                live = budget.live()
+                queue.put_nowait((budget.marker() + live, budget.finish()))
+            queue.put_nowait(None)  # stdout 종료 신호
 
+    task = None
+    live_task = None
     try:
-        run_manager.try_start(project_id, "running", -1)
         await ws.send_text(f"[RUN_ID] {run_id}\n")
 
-        # docker 실횅을 Thread로
-        task = asyncio.create_task(asyncio.to_thread(blocking_runner))
+        # docker 실행은 event loop 위의 task (thread 안 씀)
+        task = asyncio.create_task(runner())
+        live_task = asyncio.create_task(live_tail())
 
         while True:
             item = await queue.get()
             if item is None:
                 break
-            append_output(project_id, run_id, item)
-            await ws.send_text(item)
+            to_ws, to_history = item
+            if to_history:
+                buffer_output(project_id, run_id, to_history)      # write-behind (disk I/O는 writer thread)
+            if to_ws:
+                await ws.send_text(to_ws)
 
     except WebSocketDisconnect:
-        run_manager.request_stop(project_id)          # WS 끊기면 곧바로 stop
+        await asyncio.to_thread(run_manager.request_stop, run_id)     # WS 끊기면 곧바로 stop
 
     finally:
+        if task is not None and not task.done():
+            # WS 끊김 / 전송 실패: 컨테이너 멈춘 뒤 결과까지 기다림
+            stop_event.set()
+            await task
+        if live_task is not None:
+            live_task.cancel()
+        # 컨테이너가 끝났으니 바로 budget 반납 (history 기록은 그 다음)
+        if lease is not None:
+            run_scheduler.release(lease)
+
         res = result_holder["result"]
+        extra = {
+            "output_dropped_bytes": budget.dropped_bytes,
+            "output_dropped_lines": budget.dropped_lines,
+        }
+        if res is not None and res.stop_latency_ms is not None:
+            extra["stop_latency_ms"] = res.stop_latency_ms
+        if res is not None and res.resources:
+            extra["resources"] = res.resources
+        if res is not None and res.cached_from:
+            extra["cached"] = True
+            extra["cached_from"] = res.cached_from
 
+        # finish_run은 버퍼 flush + disk I/O -> event loop 밖에서
         if res is None:
-            finish_run(
+            await asyncio.to_thread(
+                finish_run,
                 project_id,
                 run_id,
                 "error",
@@ -97,9 +255,11 @@ async def run_ws(ws:WebSocket):
                 signal=None,
                 reason="No result",
                 duration_ms=0,
+                extra=extra,
             )
         else:
-            finish_run(
+            await asyncio.to_thread(
+                finish_run,
                 project_id,
                 run_id,
                 res.status,
@@ -107,9 +267,11 @@ async def run_ws(ws:WebSocket):
                 signal=res.signal,
                 reason=res.reason,
                 duration_ms=res.duration_ms,
+                extra=extra,
             )
 
-        run_manager.stop_and_clear(project_id)
+        await asyncio.to_thread(run_manager.stop_and_clear, run_id)
 
+        watcher.cancel()
         if ws.application_state.name == "CONNECTED":
             await ws.close()
\ No newline at end of file
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import APIRouter, Query
 from app.services.run_manager import run_manager
 from app.services.run_service import stop_container
@@ -5,15 +7,28 @@ from app.services.run_service import stop_container
 router = APIRouter(prefix="/stop", tags=["run-control"])
 
 @router.post("")
-def stop_run(project_id: str = Query(...)):
-    print("STOP API HIT", project_id)
-    state = run_manager.get_state(project_id)
-    
-    if not state.is_running or not state.container_name:
+def stop_run(project_id: str = Query(...), run_id: Optional[str] = Query(None)):
+    print("STOP API HIT", project_id, run_id)
+    if run_id:
+        state = run_manager.get_state(run_id)
+        targets = {run_id: state} if state.is_running and state.project_id == project_id else {}
+    else:
+        # run_id 없으면 프로젝트의 실행 중인 run 전체 (이전 클라이언트 호환)
+        targets = run_manager.runs_of(project_id)
+
+    targets = {rid: st for rid, st in targets.items() if st.container_name}
+    if not targets:
         return {"status": "idle"}
     
-    run_manager.request_stop(project_id)
-    state.was_stopped = True
-    stop_container(state.container_name)
-    # WS 루프는 stdout 종료/에러로 빠져나오면서 finally에서 clear 됨
-    return {"status": "stopping", "container": state.container_name}
\ No newline at end of file
+    for rid, state in targets.items():
+        run_manager.request_stop(rid)
+        state.was_stopped = True
+        if not state.supervised:
+            # supervisor가 없는 run만 직접 정지 (있으면 signal -> grace -> kill 을 supervisor가 함, 다른 worker 프로세스여도)
+            stop_container(state.container_name)
+    # WS 루프는 supervisor가 끝나면서 finally에서 clear 됨
+    return {
+        "status": "stopping",
+        "run_ids": list(targets),
+        "containers": [st.container_name for st in targets.values()],
+    }
@@ -1,7 +1,124 @@
+import os
+import tempfile
+from pathlib import Path
+
 # Node 캐시/볼륨 관련 기본값
 NODE_NPM_CACHE_VOLUME = "freeweb_npm_cache"
-NODE_MODULES_VOLUME_PREFIX = "freeweb_node_modules__"
+NODE_MODULES_VOLUME_PREFIX = "freeweb_node_modules__"     # + lockfile hash (같은 lockfile 끼리 공유)
+
+# 의존성 install stage (npm ci 등) 최대 시간
+DEPS_INSTALL_TIMEOUT_S = int(os.getenv("DEPS_INSTALL_TIMEOUT_S", "300"))
+DEPS_LOCK_DIR = os.getenv("DEPS_LOCK_DIR", os.path.join(tempfile.gettempdir(), "freeweb_locks"))  # volume 별 install lock (프로세스 간)
+
+# Python requirements.txt -> requirements hash volume (오프라인: 로컬 wheelhouse 에서만 설치)
+PY_DEPS_VOLUME_PREFIX = "freeweb_py_deps__"
+PY_WHEELHOUSE_DIR = os.getenv("PY_WHEELHOUSE_DIR", str(Path(__file__).resolve().parents[2] / "wheelhouse"))
+
+# 프로젝트별 bytecode / compile cache volume (PYTHONPYCACHEPREFIX, NODE_COMPILE_CACHE)
+BUILD_CACHE_ENABLED = os.getenv("BUILD_CACHE", "1") == "1"
+BUILD_CACHE_VOLUME_PREFIX = "freeweb_build_cache__"
 
 
 # tmpfs 크기(환경에 맞게)
-NODE_TMPFS_SIZE = "1g"
\ No newline at end of file
+NODE_TMPFS_SIZE = "1g"
+
+# Run 상태 (실행 중 run / stop 요청 / 프로젝트별 옵션) 저장 위치
+# - "sqlite"(기본): WAL SQLite 1개를 API worker 프로세스끼리 공유
+#   (uvicorn --workers N 은 env 를 안 남겨서 worker 수를 알 수 없음 -> 1개여도 안전한 쪽이 기본)
+# - "memory": 프로세스 안 dict, worker 1개가 확실할 때만 (worker 여럿이면 /stop / 동시 실행 수가 프로세스마다 따로 놂)
+RUN_STATE_BACKEND = os.getenv("RUN_STATE_BACKEND", "sqlite")
+RUN_STATE_DB = os.getenv("RUN_STATE_DB", "")        # 비우면 backend/.data/run_state.sqlite3
+RUN_STATE_POLL_S = float(os.getenv("RUN_STATE_POLL_S", "0.1"))     # 다른 worker 가 받은 /stop 확인 주기
+
+# Run history (append-only 로그)
+HISTORY_SEGMENT_MAX_BYTES = 4 * 1024 * 1024     # segment 1개 최대 크기
+HISTORY_COMPACT_MIN_SEGMENTS = 4                # sealed segment가 이만큼 쌓이면 compaction
+# "log" 인덱스는 프로세스 메모리에 있음 -> run 상태를 공유할 때(여러 worker)는 sqlite 가 기본
+HISTORY_ENGINE = os.getenv("HISTORY_ENGINE", "sqlite" if RUN_STATE_BACKEND == "sqlite" else "log")   # "log" | "sqlite"
+HISTORY_SQLITE_PATH = os.getenv("HISTORY_SQLITE_PATH", "")  # 비우면 backend/.data/history.sqlite3
+
+# Run output write-behind (WS 루프 -> history)
+HISTORY_FLUSH_BYTES = 64 * 1024     # 버퍼가 이만큼 차면 flush
+HISTORY_FLUSH_INTERVAL_S = 0.5      # 또는 이 시간이 지나면 flush
+
+# output blob의 sparse line index 간격 (N줄마다 offset 1개)
+HISTORY_LINE_INDEX_STRIDE = 1000
+HISTORY_FRAME_BYTES = 64 * 1024    # 종료된 run output 압축 frame 크기 (zlib, frame 단위 독립 해제)
+
+# Run output 상한 (head + tail ring buffer)
+OUTPUT_HEAD_BYTES = int(os.getenv("OUTPUT_HEAD_KB", "1024")) * 1024
+OUTPUT_TAIL_BYTES = int(os.getenv("OUTPUT_TAIL_KB", "256")) * 1024
+OUTPUT_MAX_LINE_BYTES = 64 * 1024   # 개행 없는 긴 출력도 이 크기로 끊어 읽음
+OUTPUT_TAIL_FLUSH_S = float(os.getenv("OUTPUT_TAIL_FLUSH_S", "1.0"))   # 상한 넘은 뒤 WS 에 live tail 을 보내는 주기 (history 에는 안 씀)
+
+# History retention (프로젝트별, 0 = 제한 없음 / run.json "history"로 프로젝트마다 override)
+# 기본은 모두 꺼짐: 운영자가 명시적으로 켤 때만 기존 history 삭제
+HISTORY_MAX_RUNS = int(os.getenv("HISTORY_MAX_RUNS", "0"))
+HISTORY_MAX_AGE_DAYS = int(os.getenv("HISTORY_MAX_AGE_DAYS", "0"))
+HISTORY_MAX_OUTPUT_MB = int(os.getenv("HISTORY_MAX_OUTPUT_MB", "0"))
+HISTORY_ARCHIVE = os.getenv("HISTORY_ARCHIVE", "0") == "1"    # 1이면 삭제 대신 .history/archive/ 로 이동
+HISTORY_RETENTION_INTERVAL_S = 300  # 주기 점검 간격
+
+# History output 전문 검색
+SEARCH_MAX_OFFSETS = 4              # run 당 토큰별로 기억할 위치 수 (snippet용)
+SEARCH_MAX_TOKENS_PER_RUN = 20000   # run 1개에서 색인할 고유 토큰 상한
+
+# Warm container pool (image + sandbox flag 조합마다 idle 컨테이너 K개, 0 = 사용 안 함)
+CONTAINER_POOL_SIZE = int(os.getenv("CONTAINER_POOL_SIZE", "1"))
+CONTAINER_POOL_IDLE_TTL_S = 600     # 이 시간 동안 안 쓰인 idle 컨테이너는 제거
+
+# Docker 호출 방식: "api"(docker.sock 직접) | "cli"(docker 명령) | "auto"(socket 있으면 api)
+DOCKER_BACKEND = os.getenv("DOCKER_BACKEND", "auto")
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+
+# Run scheduler: host 전체에 동시에 내줄 수 있는 CPU / memory 합 (RunOptions.cpus / memory_mb 기준)
+HOST_CPU_BUDGET = float(os.getenv("HOST_CPU_BUDGET", str(os.cpu_count() or 2)))
+HOST_MEMORY_BUDGET_MB = int(os.getenv("HOST_MEMORY_BUDGET_MB", "4096"))
+SCHEDULER_DEFAULT_RUN_S = 5     # 실행 기록이 없을 때 ETA 계산용 run 시간
+
+# 프로젝트당 동시 실행 수 (run.json "max_parallel"로 프로젝트마다 opt-in, 상한 CAP)
+RUN_MAX_PARALLEL_PER_PROJECT = int(os.getenv("RUN_MAX_PARALLEL_PER_PROJECT", "1"))
+RUN_MAX_PARALLEL_CAP = 8
+
+# Stop: 이 signal 보내고 grace 동안 안 끝나면 SIGKILL
+STOP_SIGNAL = os.getenv("STOP_SIGNAL", "SIGTERM")
+STOP_GRACE_S = float(os.getenv("STOP_GRACE_S", "0.2"))
+
+# Run 자원 사용량 샘플링 (cgroup v2 / Engine API stats, 0 = 끔)
+RESOURCE_SAMPLE_INTERVAL_S = float(os.getenv("RESOURCE_SAMPLE_INTERVAL_S", "0.5"))
+RESOURCE_MAX_SAMPLES = 120      # run record에 남기는 series 최대 길이 (넘으면 솎아냄)
+CGROUP_ROOT = os.getenv("CGROUP_ROOT", "/sys/fs/cgroup")
+
+# Run 실행 backend: "docker"(기본) | "local"(host subprocess + rlimit / cgroup v2, docker 없는 CI / 부하 테스트용) | "remote"(worker)
+EXECUTOR_BACKEND = os.getenv("EXECUTOR_BACKEND", "docker")
+LOCAL_CGROUP_PARENT = os.getenv("LOCAL_CGROUP_PARENT", os.path.join(CGROUP_ROOT, "freeweb"))
+
+# Remote executor (EXECUTOR_BACKEND=remote): broker 로 worker 에게 run 분배
+# RUN_BROKER_URL 비어 있으면 API 프로세스 안에 broker + worker N개 (stand-in)
+RUN_BROKER_URL = os.getenv("RUN_BROKER_URL", "")       # "tcp://host:7070" | "unix:///path.sock"
+RUN_BROKER_LOCAL_WORKERS = int(os.getenv("RUN_BROKER_LOCAL_WORKERS", "2"))
+# broker 에 붙는 client / worker 공유 secret (hello 에서 확인)
+# - worker 는 받은 job 을 그대로 실행 + 프로젝트 파일이 오가므로 인증 없는 broker 는 곧 원격 코드 실행
+# - 단독 broker 는 기본 127.0.0.1 에만 bind, loopback 밖(tcp://0.0.0.0:...)으로 열려면 이 값이 필수
+RUN_BROKER_TOKEN = os.getenv("RUN_BROKER_TOKEN", "")
+BROKER_FRAME_LIMIT = 4 * 1024 * 1024       # frame(JSON 1줄) 최대 크기
+BROKER_STATS_TIMEOUT_S = 2.0
+BROKER_CLIENT_QUEUE = 1024                  # client 당 미전송 frame 상한 (넘치면 그 client 만 끊음)
+
+# Worker daemon (python -m app.services.run_worker)
+WORKER_EXECUTOR = os.getenv("WORKER_EXECUTOR", "docker")   # worker 에서 실제 실행: "docker" | "local"
+WORKER_SLOTS = int(os.getenv("WORKER_SLOTS", str(os.cpu_count() or 2)))
+WORKER_PROJECTS_DIR = os.getenv("WORKER_PROJECTS_DIR", "")  # WORKSPACE_SYNC=0 일 때 (공유 filesystem), 비어 있으면 PROJECTS_DIR
+
+# Workspace delta sync: API 가 manifest(파일 hash) 를 보내고 worker 에 없는 blob 만 전송
+WORKSPACE_SYNC = os.getenv("WORKSPACE_SYNC", "1") == "1"
+WORKSPACE_SYNC_TIMEOUT_S = 120
+WORKER_DATA_DIR = os.getenv("WORKER_DATA_DIR", os.path.join(tempfile.gettempdir(), "freeweb_worker"))     # blobs/ + workspaces/
+WORKER_BLOB_CACHE_MB = int(os.getenv("WORKER_BLOB_CACHE_MB", "2048"))
+
+# Run 결과 캐시 (opt-in): 파일 내용 + RunSpec + RunOptions 가 같으면 컨테이너 없이 저장된 출력 재생
+# run.json "cache": false/true 로 프로젝트마다 override
+RUN_CACHE_ENABLED = os.getenv("RUN_CACHE", "0") == "1"
+RUN_CACHE_REPLAY = os.getenv("RUN_CACHE_REPLAY", "timed")     # "timed"(원래 간격대로) | "instant"
+RUN_CACHE_MAX_OUTPUT_BYTES = 1024 * 1024    # 이보다 출력이 큰 run은 저장 안 함
+RUN_CACHE_MAX_ENTRIES = 32                  # 프로젝트당 보관 개수 (오래된 것부터 삭제)
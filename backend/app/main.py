@@ -14,6 +14,9 @@ from app.api.run_presets import router as run_presets_router
 from app.agent.api.agent import router as agent_router
 from app.api.logs import router as logs_router
 # (옵션) from app.api.logs_sse import router as logs_sse_router
+from app.services.container_backend import cleanup_orphan_runs
+from app.services.container_pool import container_pool
+from app.services.build_cache import build_cache
 
 app = FastAPI(title="Freeweb Agent MVP API")
 
@@ -38,6 +41,21 @@ app.include_router(agent_router, prefix="")
 app.include_router(logs_router)
 #app.include_router(logs_sse_router)
 
+@app.on_event("startup")
+def cleanup_container_pool():
+    # 죽은 서버 프로세스가 남긴 warm 컨테이너 정리 (다른 worker 것은 둠)
+    container_pool.cleanup_orphans()
+
+@app.on_event("startup")
+def cleanup_run_containers():
+    # 죽은 서버 프로세스의 cold path run 컨테이너 (freeweb_run_*) 정리
+    cleanup_orphan_runs()
+
+@app.on_event("startup")
+def gc_build_cache():
+    # 삭제된 프로젝트의 bytecode / compile cache volume 정리
+    build_cache.gc()
+
 @app.get("/")
 def root():
     return {"status": "ok"}
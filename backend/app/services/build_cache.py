@@ -0,0 +1,108 @@
+import hashlib
+import subprocess
+import threading
+from typing import List, Optional, Set
+
+from app.core.config import PROJECTS_DIR
+from app.core.settings import BUILD_CACHE_ENABLED, BUILD_CACHE_VOLUME_PREFIX
+
+
+BUILD_CACHE_LABEL = "freeweb.build_cache=1"
+PROJECT_LABEL = "freeweb.project"
+
+
+def _docker(args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["docker", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        timeout=timeout,
+    )
+
+
+def cache_volume_name(project_id: str) -> str:
+    # project_id 그대로는 volume 이름에 못 쓰는 문자가 있을 수 있어서 hash
+    return f"{BUILD_CACHE_VOLUME_PREFIX}{hashlib.sha256(project_id.encode('utf-8')).hexdigest()[:16]}"
+
+
+def cache_env_flags(volume: str, is_node: bool) -> List[str]:
+    """
+    프로젝트는 /app:ro 라 __pycache__ 를 못 씀 -> bytecode / compile cache 를 /cache volume 으로
+    """
+    flags = ["-v", f"{volume}:/cache"]
+    if is_node:
+        # node 22.1+ 에서 동작 (그 전 버전은 무시)
+        flags += ["-e", "NODE_COMPILE_CACHE=/cache/node"]
+    else:
+        flags += ["-e", "PYTHONPYCACHEPREFIX=/cache/pyc"]
+    return flags
+
+
+class BuildCache:
+    """
+    프로젝트별 bytecode / compile cache volume
+    - label 로 프로젝트를 기록 -> 프로젝트 디렉터리가 사라지면 gc() 가 같이 삭제
+    - volume 이름만 쓰면 docker 가 label 없이 자동 생성하므로, 첫 사용 전에 label 붙여 create
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._created: Set[str] = set()
+
+    def ensure(self, project_id: str) -> Optional[str]:
+        """
+        return: volume 이름 / None(docker 호출 실패 -> cache 없이 실행)
+        """
+        if not BUILD_CACHE_ENABLED:
+            return None
+        volume = cache_volume_name(project_id)
+        with self._lock:
+            if volume in self._created:
+                return volume
+        try:
+            res = _docker([
+                "volume", "create",
+                "--label", BUILD_CACHE_LABEL,
+                "--label", f"{PROJECT_LABEL}={project_id}",
+                volume,
+            ], timeout=30)
+        except Exception:
+            return None
+        if res.returncode != 0:
+            return None
+        with self._lock:
+            self._created.add(volume)
+        return volume
+
+    def remove(self, project_id: str) -> None:
+        volume = cache_volume_name(project_id)
+        with self._lock:
+            self._created.discard(volume)
+        try:
+            _docker(["volume", "rm", "-f", volume], timeout=30)
+        except Exception:
+            pass
+
+    def gc(self) -> List[str]:
+        """
+        프로젝트 디렉터리가 없는 cache volume 삭제 (서버 시작 시)
+        return: 삭제한 project_id 목록
+        """
+        try:
+            res = _docker([
+                "volume", "ls",
+                "--filter", f"label={BUILD_CACHE_LABEL}",
+                "--format", f'{{{{.Label "{PROJECT_LABEL}"}}}}',
+            ], timeout=30)
+        except Exception:
+            return []
+        removed = []
+        for project_id in {line.strip() for line in res.stdout.splitlines() if line.strip()}:
+            if not (PROJECTS_DIR / project_id).is_dir():
+                self.remove(project_id)
+                removed.append(project_id)
+        return removed
+
+
+# 싱글톤(프로세스 내 1개)
+build_cache = BuildCache()
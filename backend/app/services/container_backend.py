@@ -0,0 +1,258 @@
+import asyncio
+import json
+import math
+import os
+import subprocess
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.settings import DOCKER_BACKEND, DOCKER_SOCKET, STOP_GRACE_S
+from app.services.container_pool import OWNER_LABEL, reap_orphans
+from app.services.docker_api import DockerAPI, DockerAPIError, RawStream, config_from_cli
+from app.services.run_state_store import process_owner
+
+
+READ_CHUNK_BYTES = 64 * 1024
+
+# cold path run 컨테이너 (auto-remove 없음: 종료 후 OOMKilled 확인 -> 직접 삭제)
+# API 프로세스가 그 사이에 죽으면 남으므로 label 로 찾아서 시작 시 정리
+RUN_LABEL = "freeweb.run=1"
+
+
+class CliRun:
+    """
+    docker CLI (docker run / docker exec) 로 실행 - fallback
+    asyncio subprocess라 run 당 thread 없음
+    owned: 이 run 전용 컨테이너 (--rm 없이 띄우고 종료 후 OOM 여부 확인 -> 직접 삭제)
+    """
+    def __init__(self, process: asyncio.subprocess.Process, container: str, owned: bool):
+        self.process = process
+        self.container = container
+        self.owned = owned
+        self.oom_killed: Optional[bool] = None
+
+    @classmethod
+    async def start(cls, cmd: List[str], container: str, owned: bool = False) -> "CliRun":
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        return cls(process, container, owned)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        assert self.process.stdout is not None
+        while True:
+            data = await self.process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                return
+            yield data
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        # CLI 프로세스만 죽이면 컨테이너는 계속 돈다 -> 컨테이너에 signal
+        try:
+            killer = await asyncio.create_subprocess_exec(
+                "docker", "kill", f"--signal={signal}", self.container,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await killer.wait()
+        except OSError:
+            pass
+        if signal == "SIGKILL":
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def wait(self) -> Optional[int]:
+        code = await self.process.wait()
+        if self.owned:
+            info = await inspect_container(self.container)
+            if info:
+                self.oom_killed = bool((info.get("State") or {}).get("OOMKilled"))
+            await _docker_cli("rm", "-f", self.container)
+        return code
+
+
+class ApiRun:
+    """
+    Engine API로 실행
+    - cold: create -> attach -> start (attach를 먼저 해야 첫 출력부터 받음)
+    - pooled: 떠 있는 컨테이너에 exec create -> exec start
+    stdout / stderr frame은 CLI 때처럼 한 스트림으로 합친다
+    짧은 control 호출(create / start / kill ...)만 thread, 출력 스트림은 event loop
+    """
+    def __init__(self, api: DockerAPI, container: str, stream: RawStream, exec_id: Optional[str] = None):
+        self.api = api
+        self.container = container
+        self.stream = stream
+        self.exec_id = exec_id
+        self.oom_killed: Optional[bool] = None
+
+    @classmethod
+    async def cold(cls, api: DockerAPI, name: str, image: str, cmd: List[str], flags: List[str]) -> "ApiRun":
+        config = config_from_cli(image, cmd, flags)
+        cid = await asyncio.to_thread(api.create, name, config)
+        try:
+            stream = await api.attach(cid)
+            await asyncio.to_thread(api.start, cid)
+        except Exception:
+            await asyncio.to_thread(_quiet, api.remove, cid)
+            raise
+        return cls(api, cid, stream)
+
+    @classmethod
+    async def pooled(cls, api: DockerAPI, container: str, cmd: List[str]) -> "ApiRun":
+        exec_id = await asyncio.to_thread(api.exec_create, container, cmd)
+        return cls(api, container, await api.exec_start(exec_id), exec_id)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        async for _, payload in self.stream.frames():
+            yield payload
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        await asyncio.to_thread(_quiet, self.api.kill, self.container, signal)
+
+    async def wait(self) -> Optional[int]:
+        self.stream.close()
+        if self.exec_id:
+            # pool 컨테이너 정리는 container_pool.discard 가 함
+            res = await asyncio.to_thread(self.api.exec_inspect, self.exec_id)
+            return res.get("ExitCode")
+        try:
+            code = await asyncio.to_thread(self.api.wait, self.container)
+            # 커널 OOM killer 여부는 삭제 전에 State.OOMKilled 로 확인
+            info = await asyncio.to_thread(self.api.inspect, self.container)
+            self.oom_killed = bool((info.get("State") or {}).get("OOMKilled"))
+            return code
+        finally:
+            await asyncio.to_thread(_quiet, self.api.remove, self.container)
+
+
+def _quiet(fn, *args) -> None:
+    try:
+        fn(*args)
+    except (DockerAPIError, OSError):
+        pass
+
+
+_api: Optional[DockerAPI] = None
+
+
+def get_api() -> Optional[DockerAPI]:
+    """
+    DOCKER_BACKEND: "api" | "cli" | "auto"(socket이 있으면 api)
+    """
+    global _api
+    if DOCKER_BACKEND == "cli":
+        return None
+    if DOCKER_BACKEND == "auto" and not os.path.exists(DOCKER_SOCKET):
+        return None
+    if _api is None:
+        _api = DockerAPI(DOCKER_SOCKET)
+    return _api
+
+
+async def start_container_run(container_name: str, image: str, cmd: List[str], flags: List[str], pooled: Optional[str] = None):
+    """
+    return: CliRun | ApiRun  (chunks() / kill(signal) / wait())
+    API 쪽에서 시작 전에 실패하면 (image 없음, socket 오류, 모르는 flag 등) CLI로 다시 시도
+    """
+    if not pooled:
+        flags = ["--label", RUN_LABEL, "--label", f"{OWNER_LABEL}={process_owner()}", *flags]
+
+    api = get_api()
+    if api is not None:
+        try:
+            if pooled:
+                return await ApiRun.pooled(api, pooled, cmd)
+            return await ApiRun.cold(api, container_name, image, cmd, flags)
+        except (DockerAPIError, OSError, ValueError) as e:
+            print("[docker-api] fallback to cli:", e)
+
+    if pooled:
+        return await CliRun.start(["docker", "exec", pooled, *cmd], pooled)
+    return await CliRun.start([
+        "docker", "run",
+        "--name", container_name,
+        *flags,
+        image,
+        *cmd,
+    ], container_name, owned=True)
+
+
+async def _docker_cli(*args: str) -> Optional[bytes]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "docker", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+    except OSError:
+        return None
+    return out if proc.returncode == 0 else None
+
+
+async def inspect_container(container: str) -> Optional[Dict]:
+    """
+    docker inspect (없으면 None)
+    """
+    api = get_api()
+    if api is not None:
+        try:
+            return await asyncio.to_thread(api.inspect, container)
+        except (DockerAPIError, OSError):
+            return None
+    out = await _docker_cli("inspect", container)
+    if not out:
+        return None
+    try:
+        return json.loads(out)[0]
+    except (ValueError, IndexError):
+        return None
+
+
+async def container_stats(container: str) -> Optional[Dict]:
+    """
+    Engine API stats 1회 (cgroup 파일을 못 읽을 때 fallback, CLI 모드면 None)
+    """
+    api = get_api()
+    if api is None:
+        return None
+    try:
+        return await asyncio.to_thread(api.stats, container)
+    except (DockerAPIError, OSError):
+        return None
+
+
+def stop_container(container_name: str) -> None:
+    """
+    컨테이너 중지 (없어도 에러 안 나게)
+    grace는 STOP_GRACE_S (docker 기본 10초 대신), 초 단위로 올림
+    """
+    grace_s = math.ceil(STOP_GRACE_S)
+    api = get_api()
+    if api is not None:
+        try:
+            api.stop(container_name, grace_s)
+            return
+        except DockerAPIError as e:
+            if e.status in (304, 404):
+                return
+        except OSError:
+            pass
+
+    subprocess.run(
+        ["docker", "stop", "-t", str(grace_s), container_name],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+
+
+def cleanup_orphan_runs() -> None:
+    """
+    죽은 프로세스가 남긴 cold path run 컨테이너 (freeweb_run_*) 제거 (서버 / worker 시작 시)
+    """
+    reap_orphans(RUN_LABEL)
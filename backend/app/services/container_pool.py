@@ -0,0 +1,157 @@
+import subprocess
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.settings import CONTAINER_POOL_SIZE, CONTAINER_POOL_IDLE_TTL_S
+from app.services.run_state_store import owner_dead, process_owner
+
+
+POOL_LABEL = "freeweb.pool=1"
+OWNER_LABEL = "freeweb.owner"       # 만든 프로세스 (host:pid) -> 살아 있는 다른 worker 의 pool 은 안 건드림
+
+# (image, create flags...) -> 같은 key면 같은 sandbox 설정
+PoolKey = Tuple[str, ...]
+
+
+@dataclass
+class _Warm:
+    name: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+def _docker(args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["docker", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        timeout=timeout,
+    )
+
+
+def reap_orphans(label: str) -> None:
+    """
+    label 이 붙은 컨테이너 중 만든 프로세스가 죽은 것 제거 (서버 / worker 시작 시)
+    - 같은 docker 를 쓰는 다른 API worker / run worker 의 컨테이너는 owner 가 살아 있으면 둠
+    - owner label 이 없는 것 (이전 버전) 은 제거
+    """
+    try:
+        res = _docker(
+            ["ps", "-a", "--filter", f"label={label}", "--format", f'{{{{.ID}}}} {{{{.Label "{OWNER_LABEL}"}}}}'],
+            timeout=30,
+        )
+    except Exception:
+        return
+    ids = []
+    for line in res.stdout.splitlines():
+        cid, _, owner = line.strip().partition(" ")
+        if cid and (not owner or owner_dead(owner)):
+            ids.append(cid)
+    if ids:
+        _docker(["rm", "-f", *ids], timeout=60)
+
+
+class ContainerPool:
+    """
+    image + sandbox flag 조합 별로 미리 띄워둔 idle 컨테이너 (sleep infinity)
+    - acquire(): idle 1개를 넘겨주고 background로 다시 채움 (없으면 None -> cold docker run)
+    - 실행은 docker exec, 끝나면 discard()로 제거 (1회용: /tmp 등 상태가 다음 run에 안 남게)
+    - 프로젝트 bind mount는 생성 시점에만 가능 -> flag에 project 경로가 포함되어 프로젝트별 pool
+    """
+    def __init__(self, size: int = CONTAINER_POOL_SIZE, idle_ttl_s: float = CONTAINER_POOL_IDLE_TTL_S):
+        self.size = size
+        self.idle_ttl_s = idle_ttl_s
+        self._lock = threading.Lock()
+        self._idle: Dict[PoolKey, List[_Warm]] = {}
+        self._filling: Dict[PoolKey, int] = {}
+        self._reaper: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def acquire(self, image: str, flags: List[str]) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        key: PoolKey = (image, *flags)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            warm = idle.pop() if idle else None
+            self._ensure_reaper()
+        self._replenish(key)
+        return warm.name if warm else None
+
+    def discard(self, name: str) -> None:
+        threading.Thread(target=_docker, args=(["rm", "-f", name], 30), daemon=True).start()
+
+    # ------------------------------
+    # background
+    # ------------------------------
+    def _replenish(self, key: PoolKey) -> None:
+        with self._lock:
+            missing = self.size - len(self._idle.get(key, [])) - self._filling.get(key, 0)
+            if missing <= 0:
+                return
+            self._filling[key] = self._filling.get(key, 0) + missing
+
+        for _ in range(missing):
+            threading.Thread(target=self._create, args=(key,), daemon=True).start()
+
+    def _create(self, key: PoolKey) -> None:
+        image, *flags = key
+        name = f"freeweb_pool_{uuid.uuid4().hex[:12]}"
+        try:
+            res = _docker([
+                "run", "-d", "--rm",
+                "--name", name,
+                "--label", POOL_LABEL,
+                "--label", f"{OWNER_LABEL}={process_owner()}",
+                *flags,
+                "--entrypoint", "sleep",
+                image, "infinity",
+            ], timeout=60)
+            ok = res.returncode == 0
+        except Exception as e:
+            print("[container-pool] create failed", e)
+            ok = False
+
+        with self._lock:
+            self._filling[key] -= 1
+            if ok:
+                self._idle.setdefault(key, []).append(_Warm(name))
+
+    def _ensure_reaper(self) -> None:
+        # lock 잡은 상태에서 호출
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name="container-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        """
+        오래 안 쓰인 idle 컨테이너 정리 (옵션이 바뀌어 key가 달라진 경우 등)
+        """
+        while True:
+            time.sleep(min(60.0, self.idle_ttl_s))
+            now = time.monotonic()
+            stale: List[str] = []
+            with self._lock:
+                for key, idle in self._idle.items():
+                    keep = [w for w in idle if now - w.created_at < self.idle_ttl_s]
+                    stale += [w.name for w in idle if w not in keep]
+                    self._idle[key] = keep
+            for name in stale:
+                self.discard(name)
+
+    def cleanup_orphans(self) -> None:
+        """
+        죽은 프로세스가 남긴 pool 컨테이너 제거 (서버 시작 시)
+        """
+        reap_orphans(POOL_LABEL)
+
+
+# 싱글톤(프로세스 내 1개)
+container_pool = ContainerPool()
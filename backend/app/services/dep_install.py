@@ -0,0 +1,214 @@
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import os
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from app.core.settings import (
+    DEPS_LOCK_DIR,
+    NODE_NPM_CACHE_VOLUME,
+    NODE_MODULES_VOLUME_PREFIX,
+    DEPS_INSTALL_TIMEOUT_S,
+    PY_DEPS_VOLUME_PREFIX,
+    PY_WHEELHOUSE_DIR,
+)
+
+
+# install 완료 표시 (volume 안): 중간에 죽은 install volume은 이 파일이 없음
+READY_MARKER = ".freeweb-ready"
+
+
+def deps_hash(image: str, lockfile: Path) -> str:
+    """
+    lockfile 내용 + image (native module은 image마다 다름)
+    """
+    h = hashlib.sha256()
+    h.update(image.encode("utf-8") + b"\0")
+    h.update(lockfile.read_bytes())
+    return h.hexdigest()[:16]
+
+
+@contextlib.asynccontextmanager
+async def _host_lock(volume: str) -> AsyncIterator[None]:
+    """
+    같은 host 의 다른 프로세스 (uvicorn worker / run worker) 와 volume 단위 배타 (flock)
+    - docker volume 은 host 단위라 host lock 이면 충분, 프로세스가 죽으면 kernel 이 풀어줌
+    - blocking flock 은 event loop 를 막으므로 non-blocking 으로 재시도
+    """
+    os.makedirs(DEPS_LOCK_DIR, exist_ok=True)
+    fd = os.open(os.path.join(DEPS_LOCK_DIR, f"{volume}.lock"), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(0.2)
+        yield
+    finally:
+        os.close(fd)    # lock 도 같이 풀림
+
+
+async def _docker(*args: str, on_line: Optional[Callable[[str], None]] = None, timeout_s: Optional[float] = None, container: Optional[str] = None) -> Optional[int]:
+    """
+    docker 명령 1회 (on_line 이 있으면 출력 줄 단위 전달), return: exit code / None(docker 없음, timeout)
+    - container: 이 명령이 띄우는 컨테이너 이름 -> timeout / cancel(stop) 시 CLI 뿐 아니라 컨테이너도 제거
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "docker", *args,
+            stdout=asyncio.subprocess.PIPE if on_line else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.STDOUT if on_line else asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    async def pump():
+        if on_line and proc.stdout is not None:
+            async for raw in proc.stdout:
+                on_line(raw.decode("utf-8", errors="replace"))
+        return await proc.wait()
+
+    async def kill() -> None:
+        if proc.returncode is None:
+            proc.kill()
+        if container:
+            # docker run CLI 를 죽여도 컨테이너는 계속 돎
+            rm = await asyncio.create_subprocess_exec(
+                "docker", "rm", "-f", container,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            )
+            await rm.wait()
+        await proc.wait()
+
+    try:
+        return await asyncio.wait_for(pump(), timeout_s)
+    except asyncio.TimeoutError:
+        await kill()
+        return None
+    except asyncio.CancelledError:
+        # run stop: install 도 바로 중단
+        await asyncio.shield(kill())
+        raise
+
+
+class DepInstaller:
+    """
+    의존성 install stage: lockfile hash 로 key 된 volume 에 1번만 설치
+    - 같은 lockfile 인 프로젝트끼리 volume 공유, run 에는 read-only mount
+    - volume 준비 여부는 READY_MARKER 로 확인 (프로세스 안에서는 메모)
+    - 같은 hash install 이 동시에 오면 1개만 돌고 나머지는 기다림 (프로세스 안: asyncio.Lock, 프로세스 간: flock)
+    - event loop 안에서만 사용
+    """
+    def __init__(self):
+        self._ready: Set[str] = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _is_ready(self, image: str, volume: str) -> bool:
+        if volume in self._ready:
+            return True
+        code = await _docker(
+            "run", "--rm", "--network=none",
+            "-v", f"{volume}:/deps:ro",
+            "--entrypoint", "test",
+            image, "-f", f"/deps/{READY_MARKER}",
+        )
+        if code == 0:
+            self._ready.add(volume)
+            return True
+        return False
+
+    async def _install(self, volume: str, install: List[str], on_line: Callable[[str], None]) -> bool:
+        # 반쯤 설치된 volume이 남아 있을 수 있으니 비우고 시작
+        await _docker("volume", "rm", "-f", volume)
+        name = install[install.index("--name") + 1] if "--name" in install else None
+        code = await _docker(*install, on_line=on_line, timeout_s=DEPS_INSTALL_TIMEOUT_S, container=name)
+        if code == 0:
+            self._ready.add(volume)
+            return True
+        await _docker("volume", "rm", "-f", volume)
+        return False
+
+    async def ensure(self, volume: str, image: str, install: List[str], label: str, on_line: Callable[[str], None]) -> bool:
+        lock = self._locks.setdefault(volume, asyncio.Lock())
+        async with lock, _host_lock(volume):
+            if await self._is_ready(image, volume):
+                on_line(f"[DEPS] {label}: cache hit ({volume})\n")
+                return True
+            on_line(f"[DEPS] {label}: installing into {volume}\n")
+            ok = await self._install(volume, install, on_line)
+            on_line(f"[DEPS] {label}: {'installed' if ok else 'install failed'}\n")
+            return ok
+
+    # ------------------------------
+    # node
+    # ------------------------------
+    async def ensure_node_modules(self, project_path: Path, image: str, on_line: Callable[[str], None]) -> Optional[str]:
+        """
+        package-lock.json -> npm ci (1회) -> freeweb_node_modules__<hash>
+        return: volume 이름 / None(install 실패)
+        """
+        h = deps_hash(image, project_path / "package-lock.json")
+        volume = f"{NODE_MODULES_VOLUME_PREFIX}{h}"
+        install = [
+            "run", "--rm",
+            "--name", f"freeweb_install_{h}",
+            "--cpus=1", "--memory=1024m", "--pids-limit=256",
+            "--security-opt", "no-new-privileges",
+            # registry 접근이 필요한 건 이 stage 뿐 (run 은 --network=none)
+            "-v", f"{project_path / 'package.json'}:/src/package.json:ro",
+            "-v", f"{project_path / 'package-lock.json'}:/src/package-lock.json:ro",
+            "-v", f"{volume}:/out",
+            "-v", f"{NODE_NPM_CACHE_VOLUME}:/home/node/.npm",
+            "-e", "HOME=/home/node",
+            "-e", "NPM_CONFIG_CACHE=/home/node/.npm",
+            "-w", "/app",
+            image,
+            "sh", "-c",
+            # npm ci 는 node_modules 를 지우고 시작 -> mountpoint 가 아닌 곳에 설치 후 volume 으로 복사
+            "cp /src/package.json /src/package-lock.json /app/ && npm ci --no-audit --no-fund"
+            f" && cp -a node_modules/. /out/ && touch /out/{READY_MARKER}",
+        ]
+        ok = await self.ensure(volume, image, install, f"npm ci (lock {h})", on_line)
+        return volume if ok else None
+
+    # ------------------------------
+    # python
+    # ------------------------------
+    async def ensure_python_deps(self, project_path: Path, image: str, on_line: Callable[[str], None]) -> Optional[str]:
+        """
+        requirements.txt -> pip install --target (1회) -> freeweb_py_deps__<hash>
+        index 없이 PY_WHEELHOUSE_DIR 의 wheel 만 사용 (install 도 --network=none)
+        return: volume 이름 / None(install 실패)
+        """
+        wheelhouse = Path(PY_WHEELHOUSE_DIR)
+        if not wheelhouse.is_dir():
+            on_line(f"[DEPS][ERROR] requirements.txt found but wheelhouse {wheelhouse} does not exist.\n")
+            on_line("Fix: pip download -d <wheelhouse> -r requirements.txt (or set PY_WHEELHOUSE_DIR)\n")
+            return None
+
+        h = deps_hash(image, project_path / "requirements.txt")
+        volume = f"{PY_DEPS_VOLUME_PREFIX}{h}"
+        install = [
+            "run", "--rm",
+            "--name", f"freeweb_install_{h}",
+            "--network=none",
+            "--cpus=1", "--memory=1024m", "--pids-limit=256",
+            "--security-opt", "no-new-privileges",
+            "-v", f"{wheelhouse}:/wheels:ro",
+            "-v", f"{project_path / 'requirements.txt'}:/src/requirements.txt:ro",
+            "-v", f"{volume}:/out",
+            image,
+            "sh", "-c",
+            "pip install --no-index --find-links /wheels --target /out"
+            " --no-cache-dir --disable-pip-version-check -r /src/requirements.txt"
+            f" && touch /out/{READY_MARKER}",
+        ]
+        ok = await self.ensure(volume, image, install, f"pip install (requirements {h})", on_line)
+        return volume if ok else None
+
+
+# 싱글톤(프로세스 내 1개)
+dep_installer = DepInstaller()
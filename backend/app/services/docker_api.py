@@ -0,0 +1,334 @@
+import asyncio
+import http.client
+import json
+import socket
+import struct
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from app.core.settings import DOCKER_SOCKET
+
+
+# attach / exec stream (tty 아님): 8 byte header [stream, 0, 0, 0, size(uint32 BE)] + payload
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+_FRAME_HEADER = struct.Struct(">BxxxL")
+
+
+class DockerAPIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float]):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class RawStream:
+    """
+    attach / exec start 응답 스트림 (asyncio, connection 하나를 통째로 씀)
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, socket_path: str, method: str, url: str, body: Optional[bytes], headers: Dict[str, str]) -> "RawStream":
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        head = [f"{method} {url} HTTP/1.1", "Host: docker", f"Content-Length: {len(body or b'')}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await writer.drain()
+
+        try:
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            resp_headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                resp_headers[k.strip().lower()] = v.strip()
+
+            if status >= 400:
+                n = int(resp_headers.get("content-length") or 0)
+                payload = await reader.readexactly(n) if n else await reader.read(64 * 1024)
+                try:
+                    message = json.loads(payload).get("message", "")
+                except ValueError:
+                    message = payload.decode("utf-8", errors="replace")
+                raise DockerAPIError(status, message)
+        except (ValueError, IndexError) as e:
+            writer.close()
+            raise DockerAPIError(0, f"bad response: {e}")
+        except Exception:
+            writer.close()
+            raise
+        return cls(reader, writer)
+
+    async def frames(self) -> AsyncIterator[Tuple[int, bytes]]:
+        """
+        (stream, payload) 순서대로. 컨테이너 / exec가 끝나면 EOF
+        """
+        while True:
+            try:
+                header = await self._reader.readexactly(_FRAME_HEADER.size)
+                stream, size = _FRAME_HEADER.unpack(header)
+                payload = await self._reader.readexactly(size)
+            except asyncio.IncompleteReadError:
+                return
+            if payload:
+                yield stream, payload
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class DockerAPI:
+    """
+    Docker Engine HTTP API client (/var/run/docker.sock)
+    - 일반 요청은 keep-alive connection 재사용 (idle 몇 개 보관)
+    - wait 처럼 오래 걸리는 요청은 전용 connection
+    - attach / exec start 출력 스트림은 asyncio (run 당 thread 없음)
+    """
+    def __init__(self, socket_path: str = DOCKER_SOCKET, max_idle: int = 4, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: List[_UnixConnection] = []
+
+    # ------------------------------
+    # connection
+    # ------------------------------
+    def _acquire(self) -> _UnixConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _UnixConnection(self.socket_path, self.timeout)
+
+    def _release(self, conn: _UnixConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @staticmethod
+    def _url(path: str, params: Optional[Dict[str, Any]]) -> str:
+        if not params:
+            return path
+        return path + "?" + urlencode({k: v for k, v in params.items() if v is not None})
+
+    @staticmethod
+    def _body(body: Any) -> Tuple[Optional[bytes], Dict[str, str]]:
+        if body is None:
+            return None, {}
+        data = json.dumps(body).encode("utf-8")
+        return data, {"Content-Type": "application/json"}
+
+    def request(self, method: str, path: str, body: Any = None, params: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        data, headers = self._body(body)
+        url = self._url(path, params)
+
+        for attempt in range(2):
+            conn = self._acquire()
+            try:
+                conn.request(method, url, body=data, headers=headers)
+                resp = conn.getresponse()
+                payload = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # 재사용한 connection이 서버 쪽에서 닫혔음 -> 새 connection으로 1번 더
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return resp.status, payload
+        raise ConnectionError("docker api: request failed")
+
+    def _call(self, method: str, path: str, body: Any = None, params: Optional[Dict[str, Any]] = None) -> Any:
+        status, payload = self.request(method, path, body, params)
+        if status >= 400:
+            try:
+                message = json.loads(payload).get("message", "")
+            except ValueError:
+                message = payload.decode("utf-8", errors="replace")
+            raise DockerAPIError(status, message)
+        if not payload:
+            return None
+        return json.loads(payload)
+
+    async def _stream(self, method: str, path: str, body: Any = None, params: Optional[Dict[str, Any]] = None) -> RawStream:
+        data, headers = self._body(body)
+        return await RawStream.open(self.socket_path, method, self._url(path, params), data, headers)
+
+    # ------------------------------
+    # containers
+    # ------------------------------
+    def ping(self) -> bool:
+        try:
+            status, _ = self.request("GET", "/_ping")
+        except OSError:
+            return False
+        return status == 200
+
+    def create(self, name: Optional[str], config: Dict) -> str:
+        res = self._call("POST", "/containers/create", config, {"name": name})
+        return res["Id"]
+
+    async def attach(self, container: str) -> RawStream:
+        return await self._stream("POST", f"/containers/{quote(container)}/attach",
+                            params={"stream": 1, "stdout": 1, "stderr": 1, "logs": 1})
+
+    def start(self, container: str) -> None:
+        self._call("POST", f"/containers/{quote(container)}/start")
+
+    def wait(self, container: str) -> int:
+        # 끝날 때까지 block -> 전용 connection (timeout 없음)
+        conn = _UnixConnection(self.socket_path, None)
+        try:
+            conn.request("POST", f"/containers/{quote(container)}/wait")
+            resp = conn.getresponse()
+            payload = resp.read()
+        finally:
+            conn.close()
+        if resp.status >= 400:
+            raise DockerAPIError(resp.status, payload.decode("utf-8", errors="replace"))
+        return int(json.loads(payload)["StatusCode"])
+
+    def kill(self, container: str, signal: str = "SIGKILL") -> None:
+        self._call("POST", f"/containers/{quote(container)}/kill", params={"signal": signal})
+
+    def stop(self, container: str, timeout_s: int = 10) -> None:
+        self._call("POST", f"/containers/{quote(container)}/stop", params={"t": timeout_s})
+
+    def inspect(self, container: str) -> Dict:
+        return self._call("GET", f"/containers/{quote(container)}/json")
+
+    def stats(self, container: str) -> Dict:
+        # stream=false + one-shot: 이전 샘플 기다리지 않고 바로 1개
+        return self._call("GET", f"/containers/{quote(container)}/stats", params={"stream": "false", "one-shot": "true"})
+
+    def remove(self, container: str, force: bool = True) -> None:
+        self._call("DELETE", f"/containers/{quote(container)}", params={"force": int(force)})
+
+    # ------------------------------
+    # exec (warm pool 컨테이너에서 실행)
+    # ------------------------------
+    def exec_create(self, container: str, cmd: List[str]) -> str:
+        res = self._call("POST", f"/containers/{quote(container)}/exec", {
+            "Cmd": list(cmd),
+            "AttachStdout": True,
+            "AttachStderr": True,
+        })
+        return res["Id"]
+
+    async def exec_start(self, exec_id: str) -> RawStream:
+        return await self._stream("POST", f"/exec/{quote(exec_id)}/start", {"Detach": False, "Tty": False})
+
+    def exec_inspect(self, exec_id: str) -> Dict:
+        return self._call("GET", f"/exec/{quote(exec_id)}/json")
+
+
+# ------------------------------
+# CLI flag -> create config
+# ------------------------------
+_VALUE_FLAGS = {
+    "-v", "--volume", "-e", "--env", "-w", "--workdir", "--tmpfs", "--security-opt",
+    "--label", "--entrypoint", "--network", "--cpus", "--memory", "--pids-limit", "--user",
+}
+_BOOL_FLAGS = {"--read-only", "--rm", "--init"}
+_MEM_UNITS = {"b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def _parse_memory(value: str) -> int:
+    unit = value[-1].lower()
+    if unit in _MEM_UNITS:
+        return int(float(value[:-1]) * _MEM_UNITS[unit])
+    return int(value)
+
+
+def config_from_cli(image: str, cmd: List[str], flags: List[str]) -> Dict:
+    """
+    run_service 가 만드는 docker run flag -> /containers/create body
+    모르는 flag면 ValueError (호출 쪽에서 CLI로 fallback)
+    """
+    host: Dict[str, Any] = {"Binds": [], "Tmpfs": {}, "SecurityOpt": []}
+    cfg: Dict[str, Any] = {
+        "Image": image,
+        "Cmd": list(cmd),
+        "Env": [],
+        "Labels": {},
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "HostConfig": host,
+    }
+
+    it = iter(flags)
+    for flag in it:
+        name, eq, value = flag.partition("=")
+        if name in _BOOL_FLAGS and not eq:
+            value = ""
+        elif name in _VALUE_FLAGS:
+            if not eq:
+                value = next(it, None)
+                if value is None:
+                    raise ValueError(f"missing value for {name}")
+        else:
+            raise ValueError(f"unsupported docker flag: {flag}")
+
+        if name in ("-v", "--volume"):
+            host["Binds"].append(value)
+        elif name in ("-e", "--env"):
+            cfg["Env"].append(value)
+        elif name in ("-w", "--workdir"):
+            cfg["WorkingDir"] = value
+        elif name == "--tmpfs":
+            path, _, opts = value.partition(":")
+            host["Tmpfs"][path] = opts
+        elif name == "--security-opt":
+            host["SecurityOpt"].append(value)
+        elif name == "--label":
+            k, _, v = value.partition("=")
+            cfg["Labels"][k] = v
+        elif name == "--entrypoint":
+            cfg["Entrypoint"] = [value]
+        elif name == "--network":
+            host["NetworkMode"] = value
+            if value == "none":
+                cfg["NetworkDisabled"] = True
+        elif name == "--cpus":
+            host["NanoCpus"] = int(float(value) * 1e9)
+        elif name == "--memory":
+            host["Memory"] = _parse_memory(value)
+        elif name == "--pids-limit":
+            host["PidsLimit"] = int(value)
+        elif name == "--user":
+            cfg["User"] = value
+        elif name == "--read-only":
+            host["ReadonlyRootfs"] = True
+        elif name == "--rm":
+            host["AutoRemove"] = True
+        elif name == "--init":
+            host["Init"] = True
+    return cfg
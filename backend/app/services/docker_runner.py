@@ -1,6 +1,7 @@
 from pathlib import Path
 from app.core.settings import NODE_NPM_CACHE_VOLUME, NODE_MODULES_VOLUME_PREFIX, NODE_TMPFS_SIZE
 from app.utils.docker_names import sanitize_project_id
+from app.services.build_cache import cache_env_flags
 
 
 def node_extra_mounts_and_flags(project_id: str) -> tuple[list[str], list[str]]:
@@ -28,7 +29,19 @@ def node_extra_mounts_and_flags(project_id: str) -> tuple[list[str], list[str]]:
     return mounts, flags
 
 
-def docker_fs_secu(project_id: str, project_path: Path, is_node: bool) -> list[str]:
+def docker_fs_secu(
+    project_id: str,
+    project_path: Path,
+    is_node: bool,
+    node_modules_volume: str | None = None,
+    python_deps_volume: str | None = None,
+    cache_volume: str | None = None,
+) -> list[str]:
+    """
+    node_modules_volume: dep_install 이 lockfile hash 로 준비한 volume (있으면 read-only 공유 mount)
+    python_deps_volume: requirements.txt hash volume (pip --target) -> /deps:ro + PYTHONPATH
+    cache_volume: 프로젝트별 bytecode / compile cache (build_cache) -> /cache
+    """
     # ------------------------------------
     # filesystem / security
     # ------------------------------------
@@ -36,7 +49,10 @@ def docker_fs_secu(project_id: str, project_path: Path, is_node: bool) -> list[s
     if is_node:
         pid = sanitize_project_id(project_id)
 
-        node_moduls_vol = f"{NODE_MODULES_VOLUME_PREFIX}{pid}"
+        if node_modules_volume:
+            node_modules_mount = f"{node_modules_volume}:/app/node_modules:ro"
+        else:
+            node_modules_mount = f"{NODE_MODULES_VOLUME_PREFIX}{pid}:/app/node_modules"
 
         cmd +=[
             # 보안 옵션
@@ -45,8 +61,8 @@ def docker_fs_secu(project_id: str, project_path: Path, is_node: bool) -> list[s
             # project source (ro)
             "-v", f"{project_path}:/app:ro",
 
-            # project 별 node_modules
-            "-v", f"{node_moduls_vol}:/app/node_modules",
+            # node_modules (lockfile hash volume, ro)
+            "-v", node_modules_mount,
 
             # npm cache(공유)
             "-v", f"{NODE_NPM_CACHE_VOLUME}:/home/node/.npm",
@@ -56,7 +72,7 @@ def docker_fs_secu(project_id: str, project_path: Path, is_node: bool) -> list[s
 
             # npm 환경
             "-e", "HOME=/home/node",
-            "-e", "NPM_CONFIG_CACHE=/home/nde/.npm",
+            "-e", "NPM_CONFIG_CACHE=/home/node/.npm",
         ]
     else:
         # 기존 python / bash
@@ -68,6 +84,14 @@ def docker_fs_secu(project_id: str, project_path: Path, is_node: bool) -> list[s
             "-v", f"{project_path}:/app:ro",
             "--tmpfs", "/tmp:rw,noexec,nosuid,size=64m",
         ]
+        if python_deps_volume:
+            cmd += [
+                "-v", f"{python_deps_volume}:/deps:ro",
+                "-e", "PYTHONPATH=/deps",
+            ]
+
+    if cache_volume:
+        cmd += cache_env_flags(cache_volume, is_node)
 
     cmd += ["-w", "/app",]
     
@@ -0,0 +1,588 @@
+import asyncio
+import base64
+import os
+import resource
+import shutil
+import signal as signals
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.run_options import RunOptions
+from app.core.settings import (
+    BROKER_STATS_TIMEOUT_S,
+    EXECUTOR_BACKEND,
+    LOCAL_CGROUP_PARENT,
+    RUN_BROKER_TOKEN,
+    RUN_BROKER_URL,
+    WORKSPACE_SYNC,
+)
+from app.services.build_cache import build_cache
+from app.services.container_backend import READ_CHUNK_BYTES, start_container_run
+from app.services.container_pool import container_pool
+from app.services.dep_install import dep_installer
+from app.services.docker_runner import docker_fs_secu
+from app.services.run_detect import RunSpec
+from app.services.run_manager import run_manager
+from app.services.run_broker import Conn
+from app.services.run_preflight import node_preflight
+from app.services.run_sampler import ContainerStats, read_cgroup
+from app.services.workspace_sync import BLOB_PART_BYTES, workspace_manifests
+
+
+@dataclass(frozen=True)
+class RunJob:
+    """
+    executor 에 넘기는 run 1개 (backend 와 무관한 정보만)
+    """
+    project_id: str
+    run_id: str
+    project_path: Path
+    container_name: str
+    spec: RunSpec
+    opts: RunOptions
+
+
+class PrepareError(Exception):
+    """
+    실행 전 단계 실패 (preflight / 의존성 설치 등) -> run status error, reason = str(e)
+    """
+
+
+class RunHandle:
+    """
+    실행 중인 run 1개
+    - chunks(): 출력 (stdout+stderr 합친 bytes)
+    - kill(signal): stop / timeout
+    - wait(): exit code (signal 종료는 128+N, docker 와 같은 규칙) + 정리
+    - stats(): 자원 사용량 샘플 1개 ("source" 포함, run_sampler 형식) / None
+    """
+    container: str = ""
+    graceful: bool = True               # False 면 stop 시 STOP_SIGNAL 없이 바로 SIGKILL
+    oom_killed: Optional[bool] = None   # 알 수 없으면 None
+
+    def chunks(self) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        raise NotImplementedError
+
+    async def wait(self) -> Optional[int]:
+        raise NotImplementedError
+
+    async def stats(self) -> Optional[Dict]:
+        return None
+
+
+class Executor:
+    """
+    run 실행 backend (EXECUTOR_BACKEND 로 선택)
+    - prepare(): 실행 전 단계 (의존성 설치 등) -> start 에 넘길 값, 실패는 PrepareError
+    - start(): 프로세스 / 컨테이너 시작 -> RunHandle
+    """
+    name = ""
+
+    async def prepare(self, job: RunJob, on_line: Callable[[str], None]) -> Optional[Dict]:
+        return None
+
+    async def start(self, job: RunJob, prepared: Optional[Dict] = None) -> RunHandle:
+        raise NotImplementedError
+
+
+# ==================================================
+# docker
+# ==================================================
+class DockerRunHandle(RunHandle):
+    """
+    CliRun / ApiRun + warm pool 컨테이너 정리 + cgroup / API stats
+    """
+    def __init__(self, inner, pooled: Optional[str]):
+        self.inner = inner
+        self.pooled = pooled
+        self.container = inner.container      # ApiRun은 container id, CliRun은 이름
+        # pool 컨테이너는 exec 프로세스에 signal이 안 가므로 바로 SIGKILL
+        self.graceful = not pooled
+        self._stats = ContainerStats(inner.container)
+
+    @property
+    def oom_killed(self) -> Optional[bool]:
+        return self.inner.oom_killed
+
+    def chunks(self) -> AsyncIterator[bytes]:
+        return self.inner.chunks()
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        await self.inner.kill(signal)
+
+    async def wait(self) -> Optional[int]:
+        try:
+            return await self.inner.wait()
+        finally:
+            if self.pooled:
+                # 1회용: exec가 끝나면 컨테이너째 제거 (남은 프로세스 / tmpfs 정리)
+                container_pool.discard(self.pooled)
+
+    async def stats(self) -> Optional[Dict]:
+        return await self._stats.sample()
+
+
+class DockerExecutor(Executor):
+    """
+    기존 docker 실행 경로: preflight + 의존성 volume -> sandbox flag -> warm pool / Engine API / CLI
+    """
+    name = "docker"
+
+    async def prepare(self, job: RunJob, on_line: Callable[[str], None]) -> Optional[Dict]:
+        spec = job.spec
+        vols: Dict[str, Optional[str]] = {"node_modules": None, "python_deps": None}
+
+        if spec.lang == "node":
+            # 컨테이너를 띄우기 전에 사용자에게 해결책 제시
+            pf = node_preflight(job.project_id, job.project_path)
+            for m in pf.messages:
+                on_line(m + "\n")
+            if pf.fatal:
+                raise PrepareError("Node preflight failed")
+
+            # install stage: lockfile hash volume 이 없을 때만 npm ci (run timeout 과 별개)
+            vols["node_modules"] = await dep_installer.ensure_node_modules(job.project_path, spec.image, on_line)
+            if vols["node_modules"] is None:
+                raise PrepareError("npm ci failed")
+
+        # requirements.txt 가 있으면 같은 방식으로 hash volume 준비 (wheelhouse, 오프라인)
+        if spec.lang == "python" and has_requirements(job.project_path):
+            vols["python_deps"] = await dep_installer.ensure_python_deps(job.project_path, spec.image, on_line)
+            if vols["python_deps"] is None:
+                raise PrepareError("pip install failed")
+
+        return vols
+
+    def _flags(self, job: RunJob, vols: Dict[str, Optional[str]], cache_volume: Optional[str]) -> List[str]:
+        opts = job.opts
+        flags = [
+            # 리소스 제한
+            f"--cpus={opts.cpus}",
+            f"--memory={opts.memory_mb}m",
+            "--pids-limit=64",
+
+            # PID 1 = tini: stop signal이 사용자 프로그램까지 전달되게
+            "--init",
+
+            # 보안 옵션
+            "--network=none",
+            "--security-opt", "no-new-privileges",
+        ]
+
+        # ------------------------------------
+        # filesystem / security
+        # ------------------------------------
+        flags += docker_fs_secu(
+            job.project_id,
+            job.project_path,
+            job.spec.lang == "node",
+            node_modules_volume=vols.get("node_modules"),
+            python_deps_volume=vols.get("python_deps"),
+            cache_volume=cache_volume,
+        )
+        return flags
+
+    async def start(self, job: RunJob, prepared: Optional[Dict] = None) -> RunHandle:
+        flags = self._flags(job, prepared or {}, await asyncio.to_thread(build_cache.ensure, job.project_id))
+
+        # ------------------------------------
+        # warm pool: 같은 설정으로 미리 떠 있는 컨테이너가 있으면 exec만
+        # ------------------------------------
+        pooled = container_pool.acquire(job.spec.image, flags)
+        if pooled:
+            run_manager.set_container(job.run_id, pooled)
+
+        # Engine API (docker.sock) 우선, 안 되면 docker CLI
+        inner = await start_container_run(job.container_name, job.spec.image, job.spec.cmd, flags, pooled)
+        return DockerRunHandle(inner, pooled)
+
+
+def has_requirements(project_path: Path) -> bool:
+    p = project_path / "requirements.txt"
+    if not p.is_file():
+        return False
+    # 주석 / 빈 줄만 있으면 설치할 게 없음
+    return any(line.strip() and not line.strip().startswith("#") for line in p.read_text(encoding="utf-8").splitlines())
+
+
+# ==================================================
+# local (docker 없는 머신 / CI 부하 테스트용, sandbox 아님)
+# ==================================================
+def _copy_ignore(src: str, names: List[str]) -> List[str]:
+    # .history / .git / .agent_backup 등은 실행에 필요 없음 (node_modules 는 로컬 실행에 필요해서 복사)
+    return [n for n in names if n.startswith(".")]
+
+
+def _local_cmd(cmd: List[str]) -> List[str]:
+    # 컨테이너의 "python" = 이 서버의 interpreter (python 이 PATH 에 없을 수 있음)
+    if cmd and cmd[0] in ("python", "python3"):
+        return [sys.executable, *cmd[1:]]
+    return list(cmd)
+
+
+def _setup_cgroup(run_id: str, opts: RunOptions) -> Optional[Path]:
+    """
+    cgroup v2 에 쓸 수 있으면 run 전용 child cgroup (memory / cpu / pids 제한)
+    """
+    parent = Path(LOCAL_CGROUP_PARENT)
+    try:
+        parent.mkdir(exist_ok=True)
+        controllers = (parent.parent / "cgroup.subtree_control").read_text().split()
+        if not {"memory", "cpu", "pids"} <= set(controllers):
+            return None
+        (parent / "cgroup.subtree_control").write_text("+memory +cpu +pids")
+        cg = parent / f"run_{run_id}"
+        cg.mkdir()
+        (cg / "memory.max").write_text(str(opts.memory_mb * 1024 * 1024))
+        (cg / "memory.swap.max").write_text("0")
+        (cg / "cpu.max").write_text(f"{int(opts.cpus * 100000)} 100000")
+        (cg / "pids.max").write_text("64")
+        return cg
+    except OSError:
+        return None
+
+
+def _read_proc(pid: int) -> Optional[Dict]:
+    """
+    cgroup 이 없을 때: /proc/<pid> (자식 프로세스는 안 셈)
+    """
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        status = Path(f"/proc/{pid}/status").read_text()
+        io = {}
+        io_path = Path(f"/proc/{pid}/io")
+        if os.access(io_path, os.R_OK):
+            io = dict(line.split(": ") for line in io_path.read_text().splitlines())
+    except (FileNotFoundError, ProcessLookupError, IndexError):
+        return None
+
+    rss_kb = 0
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_ms": (int(fields[11]) + int(fields[12])) * 1000 // ticks,     # utime + stime
+        "mem_bytes": rss_kb * 1024,
+        "mem_peak_bytes": None,
+        "pids": int(fields[17]),        # num_threads (프로세스 1개 기준)
+        "io_read_bytes": int(io.get("read_bytes", 0)),
+        "io_write_bytes": int(io.get("write_bytes", 0)),
+        "oom_kills": 0,
+        "source": "proc",
+    }
+
+
+class LocalRunHandle(RunHandle):
+    def __init__(self, process: asyncio.subprocess.Process, workdir: Path, cgroup: Optional[Path], name: str):
+        self.process = process
+        self.workdir = workdir
+        self.cgroup = cgroup
+        self.container = name
+        self.oom_killed: Optional[bool] = None
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        assert self.process.stdout is not None
+        while True:
+            data = await self.process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                return
+            yield data
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        # 프로세스 그룹 전체 (start_new_session)
+        try:
+            os.killpg(self.process.pid, getattr(signals, signal, signals.SIGKILL))
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def wait(self) -> Optional[int]:
+        code = await self.process.wait()
+        # 남은 자식 정리
+        await self.kill("SIGKILL")
+        if self.cgroup is not None:
+            s = read_cgroup(self.cgroup)
+            self.oom_killed = bool(s and s["oom_kills"])
+            await asyncio.to_thread(_remove_cgroup, self.cgroup)
+        await asyncio.to_thread(shutil.rmtree, self.workdir, True)
+        # docker 와 같은 규칙: signal 종료 = 128 + N
+        return 128 - code if code is not None and code < 0 else code
+
+    async def stats(self) -> Optional[Dict]:
+        if self.cgroup is not None:
+            s = read_cgroup(self.cgroup)
+            return {**s, "source": "cgroup"} if s else None
+        return _read_proc(self.process.pid)
+
+
+def _remove_cgroup(cg: Path) -> None:
+    # 프로세스가 다 빠질 때까지 잠깐 기다렸다가 rmdir
+    for _ in range(50):
+        try:
+            cg.rmdir()
+            return
+        except OSError:
+            try:
+                (cg / "cgroup.kill").write_text("1")
+            except OSError:
+                pass
+            time.sleep(0.02)
+
+
+class LocalExecutor(Executor):
+    """
+    docker 없이 host subprocess 로 실행 (파이프라인 부하 테스트 / CI 용)
+    - 프로젝트는 tmp 디렉터리에 복사해서 실행 (원본은 안 건드림)
+    - rlimit: CPU 시간 / 파일 크기 / fd / core, 주소공간은 node 제외 (V8 이 크게 예약함)
+    - cgroup v2 에 쓸 수 있으면 memory / cpu / pids 를 run 별 child cgroup 으로 제한
+    - network / filesystem 격리 없음: 신뢰할 수 있는 코드 전용
+    """
+    name = "local"
+
+    async def start(self, job: RunJob, prepared: Optional[Dict] = None) -> RunHandle:
+        workdir = Path(tempfile.mkdtemp(prefix=f"freeweb_run_{job.run_id}_"))
+        await asyncio.to_thread(shutil.copytree, job.project_path, workdir / "app", ignore=_copy_ignore)
+        app_dir = workdir / "app"
+
+        opts = job.opts
+        cgroup = await asyncio.to_thread(_setup_cgroup, job.run_id, opts)
+        limit_as = cgroup is None and job.spec.lang != "node"
+
+        def preexec():
+            if cgroup is not None:
+                (cgroup / "cgroup.procs").write_text(str(os.getpid()))
+            cpu_s = max(1, int(opts.timeout_s or 60) + 1)
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_s, cpu_s))
+            resource.setrlimit(resource.RLIMIT_FSIZE, (64 * 1024 * 1024,) * 2)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (256, 256))
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+            if limit_as:
+                mem = opts.memory_mb * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+
+        env = {
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "HOME": str(workdir),
+            "TMPDIR": str(workdir),
+            "LANG": "C.UTF-8",
+            "PYTHONUNBUFFERED": "1",
+            "PYTHONPYCACHEPREFIX": str(workdir / "pyc"),
+        }
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *_local_cmd(job.spec.cmd),
+                cwd=str(app_dir),
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+                preexec_fn=preexec,
+            )
+        except Exception:
+            if cgroup is not None:
+                await asyncio.to_thread(_remove_cgroup, cgroup)
+            shutil.rmtree(workdir, True)
+            raise
+        return LocalRunHandle(process, workdir, cgroup, f"local_{job.run_id}")
+
+
+# ==================================================
+# remote (broker -> worker daemon)
+# ==================================================
+class RemoteRunHandle(RunHandle):
+    """
+    worker 에서 실행 중인 run: broker 연결 1개로 frame 송수신
+    """
+    def __init__(self, conn: Conn, started: Dict):
+        self.conn = conn
+        self.container = started.get("container") or ""
+        self.graceful = bool(started.get("graceful", True))
+        self.worker_id = started.get("worker_id")
+        self.oom_killed: Optional[bool] = None
+        self._chunks: asyncio.Queue = asyncio.Queue()
+        self._exit: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._stats: Optional[asyncio.Future] = None
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            while True:
+                m = await self.conn.recv()
+                if m is None:
+                    break
+                kind = m.get("type")
+                if kind == "chunk":
+                    self._chunks.put_nowait(base64.b64decode(m["data"]))
+                elif kind == "line":
+                    self._chunks.put_nowait(m["data"].encode("utf-8"))
+                elif kind == "stats":
+                    if self._stats is not None and not self._stats.done():
+                        self._stats.set_result(m.get("data"))
+                elif kind == "exit":
+                    self.oom_killed = m.get("oom_killed")
+                    if m.get("error"):
+                        self._chunks.put_nowait(f"\n[WORKER] {m['error']}\n".encode("utf-8"))
+                    self._exit.set_result(m.get("code"))
+                    break
+        finally:
+            if not self._exit.done():
+                self._chunks.put_nowait(b"\n[WORKER] broker connection lost\n")
+                self._exit.set_result(None)
+            self._chunks.put_nowait(None)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            data = await self._chunks.get()
+            if data is None:
+                return
+            yield data
+
+    async def kill(self, signal: str = "SIGKILL") -> None:
+        try:
+            await self.conn.send({"type": "kill", "signal": signal})
+        except ConnectionError:
+            pass
+
+    async def wait(self) -> Optional[int]:
+        try:
+            return await self._exit
+        finally:
+            self.conn.close()
+
+    async def stats(self) -> Optional[Dict]:
+        if self._exit.done():
+            return None
+        self._stats = asyncio.get_running_loop().create_future()
+        try:
+            await self.conn.send({"type": "stats"})
+            return await asyncio.wait_for(self._stats, BROKER_STATS_TIMEOUT_S)
+        except (ConnectionError, asyncio.TimeoutError):
+            return None
+
+
+class RemoteExecutor(Executor):
+    """
+    run job (RunSpec / RunOptions) 을 broker 에 넣고 worker 가 실행
+    - prepare: worker 배정 -> workspace delta sync (WORKSPACE_SYNC) -> worker 쪽 prepare
+      (의존성 설치 출력은 그대로 on_line) 까지 대기
+    - 이후 출력 / kill / stats 는 같은 연결의 frame
+    - RUN_BROKER_URL 이 없으면 이 프로세스 안의 stand-in broker + worker
+    """
+    name = "remote"
+
+    async def _url(self) -> str:
+        if RUN_BROKER_URL:
+            return RUN_BROKER_URL
+        # run_worker 가 executor 를 import 하므로 여기서 import
+        from app.services.run_worker import ensure_local_broker
+        return await ensure_local_broker()
+
+    async def prepare(self, job: RunJob, on_line: Callable[[str], None]) -> Optional[Dict]:
+        try:
+            conn = await Conn.open(await self._url())
+        except OSError as e:
+            raise PrepareError(f"run broker unavailable: {e}")
+
+        msg = {
+            "type": "job",
+            "job_id": job.run_id,
+            "project_id": job.project_id,
+            "run_id": job.run_id,
+            "container_name": job.container_name,
+            "spec": asdict(job.spec),
+            "opts": asdict(job.opts),
+        }
+        manifest = None
+        if WORKSPACE_SYNC:
+            manifest = msg["manifest"] = await asyncio.to_thread(workspace_manifests.manifest, job.project_path)
+
+        try:
+            await conn.send({"type": "hello", "role": "client", "token": RUN_BROKER_TOKEN})
+            await conn.send(msg)
+            while True:
+                m = await conn.recv()
+                if m is None:
+                    raise PrepareError("run broker connection lost")
+                kind = m.get("type")
+                if kind == "queued":
+                    on_line(f"[WORKER] waiting for a free worker (position {m.get('position')})\n")
+                elif kind == "line":
+                    on_line(m["data"])
+                elif kind == "need" and m.get("hashes") and manifest is not None:
+                    await self._upload(conn, job.project_path, manifest, m["hashes"])
+                elif kind == "started":
+                    on_line(f"[WORKER] {m.get('worker_id')}\n")
+                    return {"conn": conn, "started": m}
+                elif kind == "exit":
+                    raise PrepareError(m.get("prepare_error") or m.get("error") or "worker failed before start")
+        except asyncio.CancelledError:
+            # stop: worker 대기 / sync / 의존성 설치 중이어도 worker 쪽 job 취소
+            conn.send_nowait({"type": "kill", "signal": "SIGKILL"})
+            conn.close()
+            raise
+        except BaseException:
+            conn.close()
+            raise
+
+    async def _upload(self, conn: Conn, project_path: Path, manifest: Dict[str, str], hashes: List[str]) -> None:
+        """
+        worker 에 없는 blob 만 BLOB_PART_BYTES 단위로 전송
+        (전송 결과 [SYNC] 줄은 worker 가 받은 수 기준으로 보냄)
+        """
+        by_hash: Dict[str, str] = {}
+        for rel, h in manifest.items():
+            by_hash.setdefault(h, rel)
+
+        for h in hashes:
+            rel = by_hash.get(h)
+            if rel is None:
+                continue
+            data = await asyncio.to_thread((project_path / rel).read_bytes)
+            offset = 0
+            while True:
+                part = data[offset: offset + BLOB_PART_BYTES]
+                last = offset + len(part) >= len(data)
+                await conn.send({
+                    "type": "blob",
+                    "hash": h,
+                    "offset": offset,
+                    "data": base64.b64encode(part).decode("ascii"),
+                    "last": last,
+                })
+                offset += len(part)
+                if last:
+                    break
+        await conn.send({"type": "blobs_done"})
+
+    async def start(self, job: RunJob, prepared: Optional[Dict] = None) -> RunHandle:
+        if not prepared:
+            raise RuntimeError("remote executor: prepare() must run first")
+        return RemoteRunHandle(prepared["conn"], prepared["started"])
+
+
+_executors: Dict[str, Executor] = {}
+
+
+def get_executor(name: str = EXECUTOR_BACKEND) -> Executor:
+    """
+    EXECUTOR_BACKEND: "docker"(기본) | "local" | "remote"
+    """
+    if name not in _executors:
+        if name == "docker":
+            _executors[name] = DockerExecutor()
+        elif name == "local":
+            _executors[name] = LocalExecutor()
+        elif name == "remote":
+            _executors[name] = RemoteExecutor()
+        else:
+            raise ValueError(f"unknown EXECUTOR_BACKEND: {name}")
+    return _executors[name]
@@ -0,0 +1,367 @@
+import bisect
+import io
+import os
+import threading
+import zlib
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from app.core.settings import HISTORY_LINE_INDEX_STRIDE, HISTORY_FRAME_BYTES
+
+
+BLOB_SUFFIX = ".out"        # 실행 중 raw output (append)
+FRAMES_SUFFIX = ".z"        # 종료 후: 독립 zlib frame 들
+FRAME_INDEX_SUFFIX = ".zidx"  # frame 시작 (raw offset, 압축 offset) uint64 쌍 + 끝 sentinel
+LINES_SUFFIX = ".lines"     # sparse line index: stride 줄마다 줄 시작 byte offset (uint64)
+
+
+def _utf8_safe_end(data: bytes) -> int:
+    """
+    data 끝에 잘린 utf-8 문자가 있으면 그 앞까지의 길이
+    """
+    for back in range(1, min(4, len(data)) + 1):
+        b = data[-back]
+        if b & 0xC0 == 0x80:    # continuation byte
+            continue
+        need = 2 if b & 0xE0 == 0xC0 else 3 if b & 0xF0 == 0xE0 else 4 if b & 0xF8 == 0xF0 else 1
+        return len(data) if back >= need else len(data) - back
+    return len(data)
+
+
+class _FrameReader(io.RawIOBase):
+    """
+    압축 frame 파일을 raw byte stream처럼 seek/read
+    - 읽는 위치가 걸친 frame만 압축 해제 (마지막 1개 cache)
+    """
+    def __init__(self, frames_path: Path, index: array):
+        self._f = frames_path.open("rb")
+        # index = [raw0, comp0, raw1, comp1, ..., raw_total, comp_total]
+        self._raw = index[0::2]
+        self._comp = index[1::2]
+        self._pos = 0
+        self._cached: Optional[int] = None
+        self._cached_data = b""
+
+    @property
+    def raw_size(self) -> int:
+        return self._raw[-1]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.raw_size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def _frame(self, i: int) -> bytes:
+        if self._cached != i:
+            self._f.seek(self._comp[i])
+            self._cached_data = zlib.decompress(self._f.read(self._comp[i + 1] - self._comp[i]))
+            self._cached = i
+        return self._cached_data
+
+    def readinto(self, b) -> int:
+        if self._pos >= self.raw_size:
+            return 0
+        i = bisect.bisect_right(self._raw, self._pos) - 1
+        frame = self._frame(i)
+        start = self._pos - self._raw[i]
+        n = min(len(b), len(frame) - start)
+        b[:n] = frame[start:start + n]
+        self._pos += n
+        return n
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+class BlobStore:
+    """
+    run 별 output 파일 (.history/<run_id>.out)
+    - history 인덱스(meta)와 분리 -> 목록/종료 처리에서 output을 안 읽는다
+    - append는 파일 끝에 붙이기만 함
+    - append 하면서 sparse line index(.lines)를 같이 만든다 -> 줄 범위 읽기
+    - run 종료 시 ~64KB 독립 zlib frame(.z) + frame index(.zidx)로 압축
+      -> 범위 읽기는 걸친 frame만, preview/tail은 마지막 frame만 해제
+    """
+    def __init__(self, projects_dir: Path, dirname: str = ".history", line_stride: int = HISTORY_LINE_INDEX_STRIDE):
+        self.projects_dir = projects_dir
+        self.dirname = dirname
+        self.line_stride = line_stride
+        self._lock = threading.Lock()
+        self._line_counts: Dict[Tuple[str, str], int] = {}
+
+    def path(self, project_id: str, run_id: str) -> Path:
+        for name in (project_id, run_id):
+            if not name or "/" in name or "\\" in name or ".." in name:
+                raise ValueError("Invalid path")
+        return self.projects_dir / project_id / self.dirname / f"{run_id}{BLOB_SUFFIX}"
+
+    def lines_path(self, project_id: str, run_id: str) -> Path:
+        return self.path(project_id, run_id).with_suffix(LINES_SUFFIX)
+
+    def frames_path(self, project_id: str, run_id: str) -> Path:
+        return self.path(project_id, run_id).with_suffix(FRAMES_SUFFIX)
+
+    def frame_index_path(self, project_id: str, run_id: str) -> Path:
+        return self.path(project_id, run_id).with_suffix(FRAME_INDEX_SUFFIX)
+
+    def _open(self, project_id: str, run_id: str) -> Optional[BinaryIO]:
+        """
+        raw(.out) 또는 압축(.z) 어느 쪽이든 같은 binary reader로
+        """
+        idx_path = self.frame_index_path(project_id, run_id)
+        if idx_path.exists():
+            index = array("Q")
+            index.frombytes(idx_path.read_bytes())
+            return io.BufferedReader(_FrameReader(self.frames_path(project_id, run_id), index))
+
+        p = self.path(project_id, run_id)
+        if p.exists():
+            return p.open("rb")
+        return None
+
+    def append(self, project_id: str, run_id: str, chunk: str) -> int:
+        """
+        return: append 후 전체 byte 길이
+        """
+        data = chunk.encode("utf-8")
+        key = (project_id, run_id)
+        p = self.path(project_id, run_id)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            with p.open("ab") as f:
+                start = f.tell()
+                f.write(data)
+                end = f.tell()
+
+            lines = self._line_counts.get(key)
+            if lines is None:
+                lines = self._count_lines(project_id, run_id, start)
+            self._line_counts[key] = self._index_lines(project_id, run_id, data, start, lines)
+            return end
+
+    def _count_lines(self, project_id: str, run_id: str, upto: int) -> int:
+        if upto == 0:
+            return 0
+        count = 0
+        f = self._open(project_id, run_id)
+        if f is None:
+            return 0
+        with f:
+            remaining = upto
+            while remaining > 0:
+                data = f.read(min(remaining, 1024 * 1024))
+                if not data:
+                    break
+                count += data.count(b"\n")
+                remaining -= len(data)
+        return count
+
+    def _index_lines(self, project_id: str, run_id: str, data: bytes, start: int, lines: int) -> int:
+        """
+        stride 번째 줄마다 다음 줄 시작 offset을 .lines에 기록
+        return: 갱신된 줄 수
+        """
+        stride = self.line_stride
+        count = data.count(b"\n")
+        if lines % stride + count < stride:
+            return lines + count
+
+        marks = array("Q")
+        pos = data.find(b"\n")
+        while pos != -1:
+            lines += 1
+            if lines % stride == 0:
+                marks.append(start + pos + 1)
+            pos = data.find(b"\n", pos + 1)
+
+        with self.lines_path(project_id, run_id).open("ab") as f:
+            f.write(marks.tobytes())
+        return lines
+
+    def finish(self, project_id: str, run_id: str) -> int:
+        """
+        run 종료: 메모리 줄 카운터 정리 + frame 압축
+        return: 전체 줄 수 (마지막 개행 없는 줄 포함)
+        """
+        with self._lock:
+            lines = self._line_counts.pop((project_id, run_id), None)
+        size = self.size(project_id, run_id)
+        if lines is None:
+            lines = self._count_lines(project_id, run_id, size)
+        if size and self.read_range(project_id, run_id, size - 1, 1)[0] != "\n":
+            lines += 1
+
+        self.compress(project_id, run_id)
+        return lines
+
+    def compress(self, project_id: str, run_id: str, frame_bytes: int = HISTORY_FRAME_BYTES) -> None:
+        """
+        raw .out -> 독립 zlib frame (.z) + frame index (.zidx)
+        - frame 끼리 의존이 없어서 아무 frame이나 단독으로 해제 가능
+        """
+        p = self.path(project_id, run_id)
+        if not p.exists():
+            return
+
+        frames_path = self.frames_path(project_id, run_id)
+        idx_path = self.frame_index_path(project_id, run_id)
+        tmp_frames = frames_path.with_name(frames_path.name + ".tmp")
+
+        index = array("Q")
+        raw_off = comp_off = 0
+        with p.open("rb") as src, tmp_frames.open("wb") as dst:
+            while True:
+                data = src.read(frame_bytes)
+                if not data:
+                    break
+                comp = zlib.compress(data, 6)
+                index.extend((raw_off, comp_off))
+                dst.write(comp)
+                raw_off += len(data)
+                comp_off += len(comp)
+        index.extend((raw_off, comp_off))
+
+        # frames -> index -> raw 삭제 순서 (중간에 죽어도 .out이 남아 있으면 raw로 읽힘)
+        os.replace(tmp_frames, frames_path)
+        tmp_idx = idx_path.with_name(idx_path.name + ".tmp")
+        tmp_idx.write_bytes(index.tobytes())
+        os.replace(tmp_idx, idx_path)
+        p.unlink()
+
+    def write(self, project_id: str, run_id: str, text: str) -> int:
+        p = self.path(project_id, run_id)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        p.write_bytes(data)
+
+        self.lines_path(project_id, run_id).unlink(missing_ok=True)
+        self._index_lines(project_id, run_id, data, 0, 0)
+        self.compress(project_id, run_id)
+        return len(data)
+
+    def size(self, project_id: str, run_id: str) -> int:
+        """
+        압축 전 기준 byte 길이
+        """
+        idx_path = self.frame_index_path(project_id, run_id)
+        if idx_path.exists():
+            index = array("Q")
+            index.frombytes(idx_path.read_bytes()[-16:])
+            return index[0]
+        p = self.path(project_id, run_id)
+        return p.stat().st_size if p.exists() else 0
+
+    def read(self, project_id: str, run_id: str) -> str:
+        f = self._open(project_id, run_id)
+        if f is None:
+            return ""
+        with f:
+            return f.read().decode("utf-8", errors="replace")
+
+    def read_range(self, project_id: str, run_id: str, cursor: int, limit: int) -> Tuple[str, int]:
+        """
+        byte offset 기반 읽기 (logs API와 같은 cursor 방식)
+        return: (text, cursor_next) - utf-8 문자 중간에서 끊기지 않게 cursor_next 조정
+        """
+        f = self._open(project_id, run_id)
+        if f is None:
+            return "", cursor
+        with f:
+            f.seek(cursor)
+            data = f.read(limit)
+        end = _utf8_safe_end(data) if len(data) == limit else len(data)
+        if end == 0 and data:
+            end = len(data)     # limit이 한 글자보다 작은 경우
+        return data[:end].decode("utf-8", errors="replace"), cursor + end
+
+    def read_lines(self, project_id: str, run_id: str, from_line: int, to_line: int) -> str:
+        """
+        [from_line, to_line) 줄 읽기 (0부터)
+        - sparse index로 가장 가까운 앞 지점까지 seek 후 나머지만 스캔
+        """
+        if to_line <= from_line:
+            return ""
+        f = self._open(project_id, run_id)
+        if f is None:
+            return ""
+
+        offsets = array("Q")
+        lp = self.lines_path(project_id, run_id)
+        if lp.exists():
+            offsets.frombytes(lp.read_bytes())
+
+        # offsets[i] = (i+1)*stride 번째 줄의 시작 위치
+        k = min(from_line // self.line_stride, len(offsets))
+        base = offsets[k - 1] if k > 0 else 0
+        line_no = k * self.line_stride
+
+        parts = []
+        with f:
+            f.seek(base)
+            for raw in f:
+                if line_no >= to_line:
+                    break
+                if line_no >= from_line:
+                    parts.append(raw)
+                line_no += 1
+        return b"".join(parts).decode("utf-8", errors="replace")
+
+    def iter_bytes(self, project_id: str, run_id: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        f = self._open(project_id, run_id)
+        if f is None:
+            return
+        with f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                yield data
+
+    def tail(self, project_id: str, run_id: str, max_chars: int = 200) -> str:
+        """
+        파일 끝 일부만 읽어 preview 생성 (utf-8 최대 4byte/char)
+        - 압축된 경우 마지막 frame만 해제
+        """
+        f = self._open(project_id, run_id)
+        if f is None:
+            return ""
+        with f:
+            size = f.seek(0, 2)
+            f.seek(max(0, size - max_chars * 4))
+            text = f.read().decode("utf-8", errors="ignore")
+        return text[-max_chars:]
+
+    def _files(self, project_id: str, run_id: str) -> list[Path]:
+        p = self.path(project_id, run_id)
+        return [p, self.frames_path(project_id, run_id), self.frame_index_path(project_id, run_id), self.lines_path(project_id, run_id)]
+
+    def delete(self, project_id: str, run_id: str) -> int:
+        """
+        return: 지운 파일 byte 합
+        """
+        freed = 0
+        for p in self._files(project_id, run_id):
+            if p.exists():
+                freed += p.stat().st_size
+                p.unlink(missing_ok=True)
+        return freed
+
+    def archive(self, project_id: str, run_id: str, archive_dir: Path) -> None:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        for p in self._files(project_id, run_id):
+            if p.exists():
+                os.replace(p, archive_dir / p.name)
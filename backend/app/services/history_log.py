@@ -0,0 +1,308 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.settings import HISTORY_SEGMENT_MAX_BYTES, HISTORY_COMPACT_MIN_SEGMENTS
+from app.services.history_blobs import BlobStore
+
+
+# 레코드 1줄 = JSON 1개
+# - {"op": "run", "id": ..., <meta 필드>}   : run 생성/상태 갱신 (upsert)
+# - {"op": "del", "id": ...}                 : retention으로 삭제
+# output은 segment에 넣지 않고 run 별 blob 파일 (history_blobs)
+SEGMENT_SUFFIX = ".seg"
+
+
+def _segment_name(seg: int) -> str:
+    return f"{seg:08d}{SEGMENT_SUFFIX}"
+
+
+def _encode(record: Dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _iter_records(path: Path) -> Iterable[Tuple[int, int, Optional[Dict]]]:
+    """
+    segment 파일을 (offset, length, record) 로 순회
+    - 마지막 줄이 깨져있으면(쓰다가 죽은 경우) record=None
+    """
+    offset = 0
+    with path.open("rb") as f:
+        for raw in f:
+            length = len(raw)
+            record = None
+            if raw.endswith(b"\n"):
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    record = None
+            yield offset, length, record
+            offset += length
+
+
+class _ProjectLog:
+    """
+    프로젝트 1개의 append-only 로그 + 메모리 인덱스
+    """
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.runs: Dict[str, Dict] = {}     # run_id -> meta (시작 순서)
+        self.segments: List[int] = []
+        self.active_size = 0
+        self.compacting = False
+        self._fh = None
+
+    # ------------------------------
+    # load / replay
+    # ------------------------------
+    def load(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segments = sorted(
+            int(p.name[:-len(SEGMENT_SUFFIX)])
+            for p in self.root.glob(f"*{SEGMENT_SUFFIX}")
+        )
+        if not self.segments:
+            self.segments = [1]
+            self._path(1).touch()
+
+        for seg in self.segments:
+            path = self._path(seg)
+            good_end = 0
+            for offset, length, record in _iter_records(path):
+                if record is None:
+                    break
+                self._apply(record)
+                good_end = offset + length
+
+            # active segment 끝의 깨진 레코드는 잘라낸다 (다음 append와 섞이지 않게)
+            if seg == self.segments[-1] and path.stat().st_size != good_end:
+                with path.open("r+b") as f:
+                    f.truncate(good_end)
+
+        self.active_size = self._path(self.segments[-1]).stat().st_size
+
+    def _apply(self, record: Dict) -> None:
+        run_id = record.get("id")
+        if not run_id:
+            return
+        if record.get("op") == "del":
+            self.runs.pop(run_id, None)
+            return
+        if record.get("op") != "run":
+            return
+
+        meta = self.runs.setdefault(run_id, {"id": run_id})
+        for k, v in record.items():
+            if k not in ("op", "id"):
+                meta[k] = v
+
+    def _path(self, seg: int) -> Path:
+        return self.root / _segment_name(seg)
+
+    # ------------------------------
+    # append
+    # ------------------------------
+    def append(self, record: Dict) -> None:
+        """
+        lock을 잡은 상태에서 호출
+        """
+        data = _encode(record)
+        if self.active_size and self.active_size + len(data) > HISTORY_SEGMENT_MAX_BYTES:
+            self._roll()
+
+        if self._fh is None:
+            self._fh = self._path(self.segments[-1]).open("ab")
+
+        self._fh.write(data)
+        self._fh.flush()
+        self.active_size += len(data)
+        self._apply(record)
+
+    def _roll(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+        seg = self.segments[-1] + 1
+        self._path(seg).touch()
+        self.segments.append(seg)
+        self.active_size = 0
+
+    def sealed_segments(self) -> List[int]:
+        return self.segments[:-1]
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class LogHistoryStore:
+    """
+    - run 생성 / 종료 상태를 레코드로 append 만 한다 (파일 전체 rewrite 없음)
+    - 메모리에 run meta 인덱스 유지 (output은 BlobStore)
+    - sealed segment가 쌓이면 background thread에서 compaction
+    """
+    def __init__(self, projects_dir: Path, blobs: BlobStore, dirname: str = ".history"):
+        self.projects_dir = projects_dir
+        self.blobs = blobs
+        self.dirname = dirname
+        self._lock = threading.Lock()
+        self._logs: Dict[str, _ProjectLog] = {}
+
+    def _root(self, project_id: str) -> Path:
+        return self.projects_dir / project_id / self.dirname
+
+    def _log(self, project_id: str) -> _ProjectLog:
+        with self._lock:
+            log = self._logs.get(project_id)
+            if log is not None:
+                return log
+
+            root = self._root(project_id)
+            is_new = not root.exists()
+            log = _ProjectLog(root)
+            log.load()
+            if is_new:
+                self._import_legacy(project_id, log)
+            self._logs[project_id] = log
+            return log
+
+    def _import_legacy(self, project_id: str, log: _ProjectLog) -> None:
+        """
+        기존 .history.json (전체 JSON 배열) -> 로그 레코드로 1회 이관
+        """
+        legacy = self.projects_dir / project_id / ".history.json"
+        if not legacy.exists():
+            return
+        try:
+            items = json.loads(legacy.read_text(encoding="utf-8") or "[]")
+        except ValueError:
+            return
+
+        with log.lock:
+            # legacy는 최신이 앞 -> 오래된 것부터 append
+            for it in reversed(items):
+                meta = {k: v for k, v in it.items() if k != "output"}
+                meta["output_bytes"] = self.blobs.write(project_id, it["id"], it.get("output") or "")
+                log.append({"op": "run", **meta})
+
+    # ------------------------------
+    # write path
+    # ------------------------------
+    def create_run(self, project_id: str, meta: Dict) -> None:
+        log = self._log(project_id)
+        with log.lock:
+            log.append({"op": "run", **meta})
+
+    def update_run(self, project_id: str, run_id: str, fields: Dict) -> None:
+        log = self._log(project_id)
+        with log.lock:
+            if run_id not in log.runs:
+                return
+            log.append({"op": "run", "id": run_id, **fields})
+            rolled = len(log.sealed_segments()) >= HISTORY_COMPACT_MIN_SEGMENTS
+        if rolled:
+            self._schedule_compaction(log)
+
+    def delete_runs(self, project_id: str, run_ids: List[str]) -> None:
+        log = self._log(project_id)
+        with log.lock:
+            for run_id in run_ids:
+                if run_id in log.runs:
+                    log.append({"op": "del", "id": run_id})
+            rolled = len(log.sealed_segments()) >= HISTORY_COMPACT_MIN_SEGMENTS
+        if rolled:
+            self._schedule_compaction(log)
+
+    # ------------------------------
+    # read path
+    # ------------------------------
+    def list_runs(self, project_id: str, limit: int, before: Optional[Tuple[int, str]] = None, status: Optional[str] = None) -> List[Dict]:
+        """
+        (started_at, id) 내림차순, before=(started_at, id) 보다 뒤만 (keyset pagination)
+        """
+        log = self._log(project_id)
+        with log.lock:
+            metas = list(log.runs.values())
+
+        # 같은 ms 에 시작한 run 도 페이지 경계에서 빠지거나 겹치지 않게 id 까지 정렬 기준
+        metas.sort(key=lambda m: (m.get("started_at", 0), m["id"]), reverse=True)
+        out = []
+        for m in metas:
+            if before is not None and (m.get("started_at", 0), m["id"]) >= before:
+                continue
+            if status and m.get("status") != status:
+                continue
+            out.append(dict(m))
+            if len(out) >= limit:
+                break
+        return out
+
+    def get_meta(self, project_id: str, run_id: str) -> Optional[Dict]:
+        log = self._log(project_id)
+        with log.lock:
+            meta = log.runs.get(run_id)
+            return dict(meta) if meta else None
+
+    # ------------------------------
+    # compaction
+    # ------------------------------
+    def _schedule_compaction(self, log: _ProjectLog) -> None:
+        with log.lock:
+            if log.compacting:
+                return
+            log.compacting = True
+
+        t = threading.Thread(target=self._compact_safe, args=(log,), daemon=True)
+        t.start()
+
+    def _compact_safe(self, log: _ProjectLog) -> None:
+        try:
+            # compaction 도중 새로 sealed 된 segment가 쌓였으면 한 번 더
+            while True:
+                self.compact(log)
+                with log.lock:
+                    if len(log.sealed_segments()) < HISTORY_COMPACT_MIN_SEGMENTS:
+                        break
+        finally:
+            with log.lock:
+                log.compacting = False
+
+    def compact(self, log: _ProjectLog) -> None:
+        """
+        sealed segment 전체 -> run 당 meta 1줄로 병합
+        - sealed segment는 더 이상 append 되지 않으므로 lock 없이 읽는다
+        - 교체(rename/인덱스 갱신)만 lock 안에서
+        """
+        with log.lock:
+            sealed = log.sealed_segments()
+        if len(sealed) < 2:
+            return
+
+        target = sealed[-1]
+        merged: Dict[str, Dict] = {}
+        for seg in sealed:
+            for _, _, record in _iter_records(log._path(seg)):
+                if record is None:
+                    break
+                if record.get("op") == "run":
+                    merged.setdefault(record.get("id"), {}).update(record)
+                elif record.get("op") == "del":
+                    merged.pop(record.get("id"), None)
+
+        tmp = log.root / (_segment_name(target) + ".compact")
+        with tmp.open("wb") as f:
+            for record in merged.values():
+                f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with log.lock:
+            os.replace(tmp, log._path(target))
+            for seg in sealed[:-1]:
+                log._path(seg).unlink(missing_ok=True)
+            log.segments = [s for s in log.segments if s >= target]
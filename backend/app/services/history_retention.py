@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Set
+
+from app.core.presets import TIMEOUT_CHOICES
+from app.core.settings import (
+    DEPS_INSTALL_TIMEOUT_S,
+    HISTORY_MAX_RUNS,
+    HISTORY_MAX_AGE_DAYS,
+    HISTORY_MAX_OUTPUT_MB,
+    HISTORY_ARCHIVE,
+    HISTORY_RETENTION_INTERVAL_S,
+)
+from app.services.history_blobs import BlobStore
+
+
+# 이보다 오래 "running" 인 row 는 서버 crash 등으로 finish_run 이 안 된 것 (최대 timeout + 의존성 설치 + 여유)
+STALE_RUNNING_MS = (max(TIMEOUT_CHOICES) + DEPS_INSTALL_TIMEOUT_S + 60) * 1000
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_runs: int = HISTORY_MAX_RUNS            # 0 = 제한 없음
+    max_age_days: int = HISTORY_MAX_AGE_DAYS
+    max_output_mb: int = HISTORY_MAX_OUTPUT_MB
+    archive: bool = HISTORY_ARCHIVE
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_runs or self.max_age_days or self.max_output_mb)
+
+
+def load_policy(project_path: Path) -> RetentionPolicy:
+    """
+    기본값 + run.json 의 "history" 블록 override
+    예) {"history": {"max_runs": 50, "max_age_days": 7, "max_output_mb": 64, "archive": true}}
+    """
+    default = RetentionPolicy()
+    p = project_path / "run.json"
+    if not p.exists():
+        return default
+    try:
+        cfg = json.loads(p.read_text(encoding="utf-8")).get("history") or {}
+    except Exception:
+        return default
+    if not isinstance(cfg, dict):
+        return default
+
+    def _int(key: str, fallback: int) -> int:
+        try:
+            return max(0, int(cfg.get(key, fallback)))
+        except (TypeError, ValueError):
+            return fallback
+
+    return RetentionPolicy(
+        max_runs=_int("max_runs", default.max_runs),
+        max_age_days=_int("max_age_days", default.max_age_days),
+        max_output_mb=_int("max_output_mb", default.max_output_mb),
+        archive=bool(cfg.get("archive", default.archive)),
+    )
+
+
+def select_evictions(runs: List[Dict], policy: RetentionPolicy, now_ms: int, is_live: Callable[[str], bool] = lambda run_id: False) -> List[str]:
+    """
+    runs: 최신 순 meta 목록
+    - 실행 중(running) run은 제외 대상 아님 (개수 / 크기 상한 계산에도 안 들어감)
+      단 STALE_RUNNING_MS 보다 오래됐고 is_live(run_id) 도 아니면 crash 로 남은 찌꺼기로 보고 제외
+    - 최신부터 세면서 개수 / 나이 / output 누적 크기 중 하나라도 넘으면 제외
+    """
+    max_age_ms = policy.max_age_days * 24 * 3600 * 1000
+    max_bytes = policy.max_output_mb * 1024 * 1024
+
+    evict = []
+    kept = 0
+    total_bytes = 0
+    for it in runs:
+        if it.get("status") == "running":
+            if now_ms - (it.get("started_at") or 0) > STALE_RUNNING_MS and not is_live(it["id"]):
+                evict.append(it["id"])
+            continue
+
+        size = it.get("output_bytes") or 0
+        too_many = policy.max_runs and kept >= policy.max_runs
+        too_old = policy.max_age_days and now_ms - (it.get("started_at") or 0) > max_age_ms
+        too_big = policy.max_output_mb and total_bytes + size > max_bytes
+
+        if too_many or too_old or too_big:
+            evict.append(it["id"])
+            continue
+        kept += 1
+        total_bytes += size
+    return evict
+
+
+class RetentionCompactor:
+    """
+    history retention background thread
+    - finish_run -> notify(project_id): 바로 리턴, 점검은 thread에서
+    - HISTORY_RETENTION_INTERVAL_S 마다 본 적 있는 프로젝트 전체 점검
+    - 요청 경로(WS / API)는 절대 기다리지 않는다
+    - is_live(run_id): 오래된 running row 가 실제로 아직 도는지 (run_manager / shared run-state store)
+    """
+    def __init__(self, store, blobs: BlobStore, projects_dir: Path, interval_s: float = HISTORY_RETENTION_INTERVAL_S, is_live: Callable[[str], bool] = lambda run_id: False):
+        self.store = store
+        self.is_live = is_live
+        self.blobs = blobs
+        self.projects_dir = projects_dir
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: Set[str] = set()
+        self._known: Set[str] = set()
+        self._thread: threading.Thread | None = None
+        self._on_evict: List[Callable[[str, List[str]], None]] = []
+
+    def on_evict(self, callback: Callable[[str, List[str]], None]) -> None:
+        """
+        callback(project_id, run_ids): run 삭제 후 부가 인덱스(검색 등) 정리
+        """
+        self._on_evict.append(callback)
+
+    def notify(self, project_id: str) -> None:
+        with self._lock:
+            self._pending.add(project_id)
+            self._known.add(project_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="history-retention", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _loop(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            self._wake.wait(timeout=self.interval_s)
+            self._wake.clear()
+
+            with self._lock:
+                targets = set(self._pending)
+                self._pending.clear()
+                if time.monotonic() - last_sweep >= self.interval_s:
+                    targets |= self._known
+                    last_sweep = time.monotonic()
+
+            for project_id in targets:
+                try:
+                    self.apply(project_id)
+                except Exception as e:
+                    print("[history-retention] failed", project_id, e)
+
+    def apply(self, project_id: str) -> List[str]:
+        """
+        정책 적용 1회 (동기). return: 제외된 run_id
+        """
+        project_path = self.projects_dir / project_id
+        if not project_path.exists():
+            return []
+
+        policy = load_policy(project_path)
+        if not policy.enabled:
+            # retention 끔: running 찌꺼기 정리도 안 함
+            return []
+        runs = self.store.list_runs(project_id, 10 ** 9)
+        evict = select_evictions(runs, policy, int(time.time() * 1000), self.is_live)
+        if not evict:
+            return []
+
+        self.store.delete_runs(project_id, evict)
+
+        archive_dir = project_path / ".history" / "archive"
+        if policy.archive:
+            # meta는 archive/runs.jsonl 에 1줄씩
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            metas = {it["id"]: it for it in runs}
+            with (archive_dir / "runs.jsonl").open("a", encoding="utf-8") as f:
+                for run_id in evict:
+                    f.write(json.dumps(metas[run_id], ensure_ascii=False) + "\n")
+
+        for run_id in evict:
+            if policy.archive:
+                self.blobs.archive(project_id, run_id, archive_dir)
+            else:
+                self.blobs.delete(project_id, run_id)
+
+        for cb in self._on_evict:
+            cb(project_id, evict)
+        return evict
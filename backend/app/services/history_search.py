@@ -0,0 +1,304 @@
+import json
+import math
+import os
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.settings import SEARCH_MAX_OFFSETS, SEARCH_MAX_TOKENS_PER_RUN
+from app.services.history_blobs import BlobStore
+from app.utils.file_lock import file_lock
+
+
+# 토큰 = ASCII 단어([A-Za-z0-9_]) 또는 연속된 non-ASCII byte (한글 등)
+# bytes 기준이라 offset이 그대로 output blob의 byte offset
+_TOKEN_RE = re.compile(rb"[A-Za-z0-9_]+|[\x80-\xff]+")
+_MAX_TOKEN_BYTES = 64
+# 상한을 넘은 토큰이 다음 chunk 로 이어질 때 버릴 앞부분 (토큰 종류별)
+_ASCII_RUN_RE = re.compile(rb"[A-Za-z0-9_]*")
+_NON_ASCII_RUN_RE = re.compile(rb"[\x80-\xff]*")
+
+# token -> run_id -> (등장 횟수, 앞쪽 offset 몇 개)
+Postings = Dict[str, Dict[str, Tuple[int, List[int]]]]
+
+
+def tokenize(data: bytes, base: int = 0) -> Iterable[Tuple[str, int]]:
+    for m in _TOKEN_RE.finditer(data):
+        tok = m.group()
+        if len(tok) > _MAX_TOKEN_BYTES:
+            continue
+        yield tok.lower().decode("utf-8", errors="replace"), base + m.start()
+
+
+def _index_stream(chunks: Iterable[bytes]) -> Dict[str, Tuple[int, List[int]]]:
+    """
+    chunk 경계에 걸친 토큰은 다음 chunk와 합쳐서 처리
+    """
+    terms: Dict[str, Tuple[int, List[int]]] = {}
+    carry = b""
+    base = 0
+
+    def _add(data: bytes, at: int) -> None:
+        for tok, off in tokenize(data, at):
+            entry = terms.get(tok)
+            if entry is None:
+                if len(terms) >= SEARCH_MAX_TOKENS_PER_RUN:
+                    continue
+                entry = terms[tok] = (0, [])
+            count, offsets = entry
+            if len(offsets) < SEARCH_MAX_OFFSETS:
+                offsets.append(off)
+            terms[tok] = (count + 1, offsets)
+
+    skip = None     # 앞 chunk 끝의 토큰이 상한보다 길었음 -> 이어지는 부분도 색인 안 함
+    for chunk in chunks:
+        if skip is not None:
+            n = skip.match(chunk).end()
+            base += n
+            chunk = chunk[n:]
+            if not chunk:
+                continue
+            skip = None
+        buf = carry + chunk
+        # 끝에 걸린 토큰: 마지막 MAX+1 byte 를 뒤집어서 앞에서 1번 match (토큰 문자 class 는 뒤집어도 같음)
+        m = _TOKEN_RE.match(buf[-(_MAX_TOKEN_BYTES + 1):][::-1])
+        tail = m.end() if m else 0
+        if tail > _MAX_TOKEN_BYTES:
+            # 어차피 색인 안 되는 긴 토큰: carry 로 안 들고 다님
+            cut = len(buf)
+            skip = _ASCII_RUN_RE if m.group()[0] < 0x80 else _NON_ASCII_RUN_RE
+        else:
+            cut = len(buf) - tail
+        _add(buf[:cut], base)
+        base += cut
+        carry = buf[cut:]
+    if carry:
+        _add(carry, base)
+    return terms
+
+
+class _ProjectIndex:
+    """
+    search.jsonl 의 메모리 사본
+    - API worker 프로세스 여럿이 같은 파일에 씀 -> search.lock (flock) 안에서 append / rewrite
+    - 읽기 전 refresh: 같은 파일이면 늘어난 줄만, 다른 프로세스가 rewrite 했으면 (inode 변경) 처음부터
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.postings: Postings = {}
+        self.runs: Dict[str, List[str]] = {}    # run_id -> 토큰 목록 (삭제용)
+        self.dead_records = 0               # 파일 재작성 판단용
+        self._ino = None                    # 읽은 파일의 inode
+        self._pos = 0                       # 읽은 byte 수 (완성된 줄까지)
+
+    def file_lock(self, shared: bool = False):
+        return file_lock(self.path.with_name("search.lock"), shared=shared)
+
+    def refresh(self) -> None:
+        """
+        다른 프로세스가 쓴 레코드 반영 (file lock 안에서)
+        """
+        try:
+            f = self.path.open("rb")
+        except FileNotFoundError:
+            if self._ino is not None:
+                self._reset()
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._ino or st.st_size < self._pos:
+                self._reset()
+                self._ino = st.st_ino
+            if st.st_size == self._pos:
+                return
+            f.seek(self._pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1    # 쓰다 만 줄은 다음에
+        for line in data[:end].splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if "del" in rec:
+                self._remove(rec["del"])
+                self.dead_records += 2
+            else:
+                if rec["id"] in self.runs:
+                    self.dead_records += 1
+                self._add(rec["id"], {k: (v[0], v[1]) for k, v in rec["terms"].items()})
+        self._pos += end
+
+    def _reset(self) -> None:
+        self.postings = {}
+        self.runs = {}
+        self.dead_records = 0
+        self._ino = None
+        self._pos = 0
+
+    def _add(self, run_id: str, terms: Dict[str, Tuple[int, List[int]]]) -> None:
+        if run_id in self.runs:
+            self._remove(run_id)
+        self.runs[run_id] = list(terms)
+        for tok, entry in terms.items():
+            self.postings.setdefault(tok, {})[run_id] = entry
+
+    def _remove(self, run_id: str) -> None:
+        for tok in self.runs.pop(run_id, []):
+            runs = self.postings.get(tok)
+            if runs is None:
+                continue
+            runs.pop(run_id, None)
+            if not runs:
+                del self.postings[tok]
+
+    def append(self, rec: Dict) -> None:
+        """
+        refresh 직후 (exclusive file lock 안에서): 방금 쓴 줄은 이미 메모리에 반영된 것으로 봄
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as f:
+            st = os.fstat(f.fileno())
+            # 쓰다 죽은 줄 뒤에 붙이면 이 레코드까지 깨짐
+            line = (b"\n" if st.st_size > self._pos else b"") + json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+        self._ino = st.st_ino
+        self._pos = st.st_size + len(line)
+
+    def rewrite(self) -> None:
+        """
+        삭제 레코드가 쌓이면 살아있는 run만으로 다시 쓰기 (exclusive file lock 안에서)
+        """
+        per_run: Dict[str, Dict[str, List]] = {run_id: {} for run_id in self.runs}
+        for tok, runs in self.postings.items():
+            for run_id, (count, offsets) in runs.items():
+                per_run[run_id][tok] = [count, offsets]
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for run_id, terms in per_run.items():
+                f.write(json.dumps({"id": run_id, "terms": terms}, ensure_ascii=False) + "\n")
+        tmp.replace(self.path)
+        st = self.path.stat()
+        self._ino, self._pos = st.st_ino, st.st_size
+        self.dead_records = 0
+
+
+class SearchIndex:
+    """
+    프로젝트별 inverted index (token -> run_id + offset)
+    - finish_run 때 해당 run만 색인 (background thread)
+    - .history/search.jsonl 에 run 당 1줄 append, 메모리에 posting 유지 (다른 프로세스가 쓴 줄은 읽기 전에 이어 읽음)
+    - 검색: 모든 query 토큰을 가진 run만, tf-idf 점수 순 + match 주변 snippet
+    """
+    def __init__(self, blobs: BlobStore, projects_dir: Path, dirname: str = ".history"):
+        self.blobs = blobs
+        self.projects_dir = projects_dir
+        self.dirname = dirname
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, _ProjectIndex] = {}
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def _index(self, project_id: str) -> _ProjectIndex:
+        with self._lock:
+            idx = self._indexes.get(project_id)
+            if idx is None:
+                idx = _ProjectIndex(self.projects_dir / project_id / self.dirname / "search.jsonl")
+                self._indexes[project_id] = idx
+            return idx
+
+    # ------------------------------
+    # write path
+    # ------------------------------
+    def schedule(self, project_id: str, run_id: str) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="history-search", daemon=True)
+                self._thread.start()
+        self._queue.put((project_id, run_id))
+
+    def _loop(self) -> None:
+        while True:
+            project_id, run_id = self._queue.get()
+            try:
+                self.add_run(project_id, run_id)
+            except Exception as e:
+                print("[history-search] index failed", project_id, run_id, e)
+
+    def add_run(self, project_id: str, run_id: str) -> None:
+        terms = _index_stream(self.blobs.iter_bytes(project_id, run_id))
+        idx = self._index(project_id)
+        with idx.lock, idx.file_lock():
+            idx.refresh()
+            if run_id in idx.runs:
+                idx.dead_records += 1   # 재색인: 이전 레코드는 무효
+            idx._add(run_id, terms)
+            idx.append({"id": run_id, "terms": {t: [c, o] for t, (c, o) in terms.items()}})
+
+    def remove_runs(self, project_id: str, run_ids: List[str]) -> None:
+        idx = self._index(project_id)
+        with idx.lock, idx.file_lock():
+            idx.refresh()
+            for run_id in run_ids:
+                if run_id in idx.runs:
+                    idx._remove(run_id)
+                    idx.append({"del": run_id})
+                    idx.dead_records += 2
+            if idx.dead_records > len(idx.runs):
+                idx.rewrite()
+
+    def missing(self, project_id: str, run_ids: Iterable[str]) -> List[str]:
+        idx = self._index(project_id)
+        with idx.lock, idx.file_lock(shared=True):
+            idx.refresh()
+            return [r for r in run_ids if r not in idx.runs]
+
+    # ------------------------------
+    # query
+    # ------------------------------
+    def search(self, project_id: str, q: str, limit: int = 20, snippet_bytes: int = 160) -> List[Dict]:
+        tokens = list(dict.fromkeys(tok for tok, _ in tokenize(q.encode("utf-8"))))
+        if not tokens:
+            return []
+
+        idx = self._index(project_id)
+        with idx.lock:
+            with idx.file_lock(shared=True):
+                idx.refresh()
+            lists = [idx.postings.get(tok, {}) for tok in tokens]
+            if not all(lists):
+                return []
+            n_runs = max(1, len(idx.runs))
+
+            # 가장 희귀한 토큰의 run 집합부터 교집합
+            order = sorted(range(len(tokens)), key=lambda i: len(lists[i]))
+            candidates = set(lists[order[0]])
+            for i in order[1:]:
+                candidates &= lists[i].keys()
+
+            scored = []
+            for run_id in candidates:
+                score = 0.0
+                for posting in lists:
+                    count, _ = posting[run_id]
+                    idf = math.log(1 + n_runs / len(posting))
+                    score += (1 + math.log(count)) * idf
+                # 첫 match 위치 = 가장 희귀한 토큰의 첫 offset
+                offset = lists[order[0]][run_id][1][0] if lists[order[0]][run_id][1] else 0
+                scored.append((score, run_id, offset))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+        out = []
+        for score, run_id, offset in scored[:limit]:
+            start = max(0, offset - snippet_bytes // 2)
+            text, _ = self.blobs.read_range(project_id, run_id, start, snippet_bytes)
+            out.append({
+                "id": run_id,
+                "score": round(score, 4),
+                "offset": offset,
+                "snippet": text.lstrip("\ufffd"),
+            })
+        return out
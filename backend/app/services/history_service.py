@@ -1,57 +1,109 @@
-import json
 import time
 import uuid
 from pathlib import Path
-from typing import List, Dict, Optional
-from app.core.config import PROJECTS_DIR
+from typing import List, Dict, Iterator, Optional, Tuple
+from app.core.config import BASE_DIR, PROJECTS_DIR
+from app.core.settings import HISTORY_ENGINE, HISTORY_SQLITE_PATH
+from app.services.history_blobs import BlobStore
+from app.services.history_log import LogHistoryStore
+from app.services.history_retention import RetentionCompactor
+from app.services.history_search import SearchIndex
+from app.services.history_stats import RunStats
+from app.services.history_writer import OutputWriter
+from app.services.run_manager import run_manager
 
 #DATA_PATH = Path(__file__).resolve().parents[2] / ".data" / "run_history.json"
 def history_path(project_id: str) -> Path:
+    # legacy: 전체 JSON 배열 파일 (LogHistoryStore가 최초 1회 이관)
     return PROJECTS_DIR / project_id / ".history.json"
 
 
-def _load(project_id: str) -> List[Dict]:
-    path = history_path(project_id)
+# output은 engine과 무관하게 run 별 blob 파일 (.history/<run_id>.out)
+_blobs = BlobStore(PROJECTS_DIR)
 
-    if not path.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text("[]", encoding="utf-8")
 
-    return json.loads(path.read_text(encoding="utf-8") or "[]")
+def _make_store():
+    """
+    HISTORY_ENGINE (run meta 인덱스)
+    - "log"    : 프로젝트별 .history/ 아래 append-only segment 로그 (기본)
+    - "sqlite" : WAL 모드 SQLite 1개 (project_id, started_at 인덱스)
+    """
+    if HISTORY_ENGINE == "sqlite":
+        from app.services.history_sqlite import SqliteHistoryStore
+        db_path = Path(HISTORY_SQLITE_PATH) if HISTORY_SQLITE_PATH else BASE_DIR / ".data" / "history.sqlite3"
+        return SqliteHistoryStore(db_path, PROJECTS_DIR, _blobs)
+    return LogHistoryStore(PROJECTS_DIR, _blobs)
 
 
-def _save(prohect_id: str, items: List[Dict]) -> None:
-    path = history_path(prohect_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    # ensure_ascii=False는 한글 깨지지 않게, indent=2는 들여쓰기로 가독성 있게.
-    path.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
+_store = _make_store()
 
+# output 전문 검색 (run 종료 시 background 색인)
+_search = SearchIndex(_blobs, PROJECTS_DIR)
+_search_backfilled: set[str] = set()
 
-def list_runs(project_id: str, limit: int = 30) -> List[Dict]:
-    items = _load(project_id)
+# 종료 통계 컬럼 시계열 (처음 접근 시 기존 history로 채움)
+_stats = RunStats(PROJECTS_DIR, seed=lambda project_id: _store.list_runs(project_id, 10 ** 9))
+
+# retention(개수/나이/output 크기) 은 background thread에서
+_retention = RetentionCompactor(_store, _blobs, PROJECTS_DIR, is_live=run_manager.is_live)
+_retention.on_evict(_search.remove_runs)
+
+# output write-behind: append_output을 N KB / 일정 시간마다 한 번으로 묶는다
+_writer = OutputWriter(lambda project_id, run_id, chunk: append_output(project_id, run_id, chunk))
+
+
+def encode_cursor(item: Dict) -> str:
+    # 다음 페이지 token: "<started_at>:<id>"
+    return f"{item['started_at']}:{item['id']}"
+
+
+def parse_cursor(cursor: str) -> Tuple[int, str]:
+    started_at, sep, run_id = cursor.partition(":")
+    if not sep or not started_at.isdigit() or not run_id:
+        raise ValueError(f"invalid cursor: {cursor}")
+    return int(started_at), run_id
+
+
+def list_runs(project_id: str, limit: int = 30, before: Optional[int] = None, status: Optional[str] = None, cursor: Optional[str] = None) -> List[Dict]:
+    """
+    최신 순 meta 목록 (output 제외), (started_at, id) 내림차순
+    - cursor: 이전 응답의 next_cursor ("<started_at>:<id>") 보다 뒤만 (keyset pagination)
+    - before: (legacy) 이 started_at 보다 오래된 run만
+    - status: 상태 필터
+    """
+    key = None
+    if cursor is not None:
+        key = parse_cursor(cursor)
+    elif before is not None:
+        key = (before, "")      # id 는 항상 "" 보다 큼 -> started_at < before 와 같음
     out = []
-    for it in items:
-        output = it.get("output", "")
+    for it in _store.list_runs(project_id, limit, before=key, status=status):
         out.append({
             "id": it["id"],
             "started_at": it["started_at"],
-            "ended_at": it["ended_at"],
+            "ended_at": it.get("ended_at"),
             "status": it["status"],
             "exit_code": it.get("exit_code"),
             "signal": it.get("signal"),
             "reason": it.get("reason"),
             "duration_ms": it.get("duration_ms"),
             "preview": it.get("preview", ""),
-            #"preview": output[-200:] if output else "",     # output[-200:]은 끝에서 200글자만 가져온다.
+            "output_bytes": it.get("output_bytes", 0),
         })
     return out
 
 
-def create_run(project_id: str) -> str:
-    items = _load(project_id)
-    run_id = uuid.uuid4().hex[:12]
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def create_run(project_id: str, run_id: Optional[str] = None) -> str:
+    """
+    run_id: admission 전에 미리 정한 id (없으면 새로)
+    """
+    run_id = run_id or new_run_id()
     now = int(time.time() * 1000)
-    items.insert(0, {
+    _store.create_run(project_id, {
         "id": run_id,
         "started_at": now,
         "ended_at": None,
@@ -59,45 +111,125 @@ def create_run(project_id: str) -> str:
         "exit_code":None,
         "signal":None,
         "reason": None,
-        "duration_ms": None, 
-        "output": "",
+        "duration_ms": None,
+        "output_bytes": 0,
     })
-    _save(project_id, items)
     return run_id
 
 def append_output(project_id, run_id: str, chunk: str) -> None:
-    items = _load(project_id)
-    for it in items:
-        if it["id"] == run_id:
-            it["output"] += chunk
-            _save(project_id, items)
-            return
-        
-def finish_run(project_id: str, run_id: str, status: str, exit_code=None, signal=None, reason="", duration_ms=0) -> None:
-    items = _load(project_id)
+    if chunk:
+        _blobs.append(project_id, run_id, chunk)
+
+def buffer_output(project_id: str, run_id: str, chunk: str) -> None:
+    """
+    메모리 버퍼에만 쌓고 바로 리턴 (disk I/O는 writer thread)
+    - finish_run에서 남은 버퍼를 flush
+    """
+    _writer.write(project_id, run_id, chunk)
+
+def finish_run(project_id: str, run_id: str, status: str, exit_code=None, signal=None, reason="", duration_ms=0, extra: Optional[Dict] = None) -> None:
+    """
+    extra: run record에 같이 남길 부가 필드 (예: output_dropped_bytes)
+    """
+    # 버퍼에 남은 output 먼저 기록
+    _writer.flush(project_id, run_id, close=True)
     now = int(time.time() * 1000)
 
-    for it in items:
-        if it["id"] == run_id:
-            it["status"] = status
-            it["ended_at"] = now
-            it["exit_code"] = exit_code
-            it["signal"] = signal
-            it["reason"] = reason
-            it["duration_ms"] = duration_ms
-            
-            # preview는 output의 마지막 일부
-            out = it.get("output", "")
-            it["preview"] = out[-200:] if out else ""
-            break
-
-    _save(project_id, items)
+    # 통계는 meta 갱신 전에 (최초 seed에 이 run이 중복으로 들어가지 않게)
+    _stats.record(project_id, now, duration_ms, status)
+
+    # 줄 수 확정 + output blob 압축
+    output_lines = _blobs.finish(project_id, run_id)
+
+    _store.update_run(project_id, run_id, {
+        "status": status,
+        "ended_at": now,
+        "exit_code": exit_code,
+        "signal": signal,
+        "reason": reason,
+        "duration_ms": duration_ms,
+        # preview는 output의 마지막 일부 (마지막 frame만 읽음)
+        "preview": _blobs.tail(project_id, run_id, 200),
+        "output_bytes": _blobs.size(project_id, run_id),
+        "output_lines": output_lines,
+        **(extra or {}),
+    })
+
+    # 색인 / 한도 점검은 요청만 하고 바로 리턴
+    _search.schedule(project_id, run_id)
+    _retention.notify(project_id)
     return
 
-def get_run(project_id: str, run_id: str) -> Optional[Dict]:
-    items = _load(project_id)
-    for it in items:
-        if it["id"] == run_id:
-            return it
-    
-    return None
+def get_run(project_id: str, run_id: str, include_output: bool = True) -> Optional[Dict]:
+    """
+    meta는 인덱스에서, output은 요청 시점에 해당 run의 blob만 읽는다
+    """
+    it = _store.get_meta(project_id, run_id)
+    if not it:
+        return None
+
+    it.setdefault("preview", "")
+    if include_output:
+        it["output"] = _blobs.read(project_id, run_id)
+    return it
+
+def read_output_range(project_id: str, run_id: str, cursor: int, limit: int) -> Dict:
+    """
+    byte cursor 기반 output 일부 (run이 진행 중이어도 읽을 수 있게 버퍼 먼저 flush)
+    """
+    _writer.flush(project_id, run_id)
+    size = _blobs.size(project_id, run_id)
+    cursor = min(cursor, size)
+    text, cursor_next = _blobs.read_range(project_id, run_id, cursor, limit)
+    return {
+        "output": text,
+        "cursor": cursor,
+        "cursor_next": cursor_next,
+        "is_eof": cursor_next >= size,
+    }
+
+def read_output_lines(project_id: str, run_id: str, from_line: int, to_line: int) -> Dict:
+    _writer.flush(project_id, run_id)
+    return {
+        "output": _blobs.read_lines(project_id, run_id, from_line, to_line),
+        "from_line": from_line,
+        "to_line": to_line,
+    }
+
+def search_runs(project_id: str, q: str, limit: int = 20) -> List[Dict]:
+    """
+    output 전문 검색: 점수 순 run meta + snippet
+    - 색인 도입 전에 끝난 run은 여기서 발견되면 background 색인 예약
+    """
+    if project_id not in _search_backfilled:
+        _search_backfilled.add(project_id)
+        finished = [it["id"] for it in _store.list_runs(project_id, 10 ** 9) if it.get("status") != "running"]
+        for run_id in _search.missing(project_id, finished):
+            _search.schedule(project_id, run_id)
+
+    out = []
+    for hit in _search.search(project_id, q, limit=limit):
+        meta = _store.get_meta(project_id, hit["id"])
+        if not meta:
+            continue
+        out.append({
+            "id": meta["id"],
+            "started_at": meta["started_at"],
+            "status": meta["status"],
+            "duration_ms": meta.get("duration_ms"),
+            **hit,
+        })
+    return out
+
+def run_stats(project_id: str, bucket_ms: int, since: Optional[int] = None) -> Dict:
+    """
+    status 별 개수, 성공률, duration p50/p95/p99 (전체 + 시간 bucket 별)
+    """
+    return _stats.summary(project_id, bucket_ms, since=since)
+
+def iter_output(project_id: str, run_id: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    output blob을 통째로 메모리에 올리지 않고 chunk 단위로 스트리밍
+    """
+    _writer.flush(project_id, run_id)
+    return _blobs.iter_bytes(project_id, run_id, chunk_size)
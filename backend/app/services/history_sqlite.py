@@ -0,0 +1,185 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.services.history_blobs import BlobStore
+
+
+# meta 컬럼 (나머지 필드는 extra JSON에)
+RUN_COLUMNS = (
+    "id", "project_id", "started_at", "ended_at", "status",
+    "exit_code", "signal", "reason", "duration_ms", "preview",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          TEXT PRIMARY KEY,
+    project_id  TEXT NOT NULL,
+    started_at  INTEGER NOT NULL,
+    ended_at    INTEGER,
+    status      TEXT NOT NULL,
+    exit_code   INTEGER,
+    signal      INTEGER,
+    reason      TEXT,
+    duration_ms INTEGER,
+    preview     TEXT NOT NULL DEFAULT '',
+    extra       TEXT
+);
+-- (started_at, id) keyset: 같은 ms 에 시작한 run 도 순서가 정해짐
+DROP INDEX IF EXISTS idx_runs_project_started;
+DROP INDEX IF EXISTS idx_runs_project_status_started;
+CREATE INDEX IF NOT EXISTS idx_runs_project_started_id ON runs(project_id, started_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_project_status_started_id ON runs(project_id, status, started_at DESC, id DESC);
+"""
+
+
+class SqliteHistoryStore:
+    """
+    - WAL 모드 SQLite (읽기/쓰기 동시 진행)
+    - runs: meta만 (project_id, started_at) 인덱스
+    - output은 DB 밖 run 별 blob 파일 (BlobStore, 목록 조회 시 안 읽음)
+    - connection은 thread 별 1개
+    """
+    def __init__(self, db_path: Path, projects_dir: Path, blobs: BlobStore):
+        self.db_path = db_path
+        self.projects_dir = projects_dir
+        self.blobs = blobs
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._checked_legacy: set[str] = set()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_project(self, project_id: str) -> None:
+        """
+        최초 접근 시 legacy .history.json 이관 (해당 프로젝트 row가 없을 때만)
+        """
+        if project_id in self._checked_legacy:
+            return
+        with self._lock:
+            if project_id in self._checked_legacy:
+                return
+            self._checked_legacy.add(project_id)
+
+            conn = self._conn()
+            row = conn.execute("SELECT 1 FROM runs WHERE project_id = ? LIMIT 1", (project_id,)).fetchone()
+            legacy = self.projects_dir / project_id / ".history.json"
+            if row or not legacy.exists():
+                return
+            try:
+                items = json.loads(legacy.read_text(encoding="utf-8") or "[]")
+            except ValueError:
+                return
+
+            with conn:
+                # 다른 API worker 프로세스가 먼저 이관했을 수 있음 -> write lock 잡고 다시 확인
+                conn.execute("BEGIN IMMEDIATE")
+                if conn.execute("SELECT 1 FROM runs WHERE project_id = ? LIMIT 1", (project_id,)).fetchone():
+                    return
+                for it in items:
+                    meta = {k: v for k, v in it.items() if k != "output"}
+                    meta["output_bytes"] = self.blobs.write(project_id, it["id"], it.get("output") or "")
+                    self._insert(conn, project_id, meta)
+
+    # ------------------------------
+    # row <-> dict
+    # ------------------------------
+    @staticmethod
+    def _split(meta: Dict) -> tuple[Dict, Dict]:
+        cols = {k: v for k, v in meta.items() if k in RUN_COLUMNS}
+        extra = {k: v for k, v in meta.items() if k not in RUN_COLUMNS}
+        return cols, extra
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        d = {k: row[k] for k in RUN_COLUMNS if k != "project_id"}
+        if row["extra"]:
+            d.update(json.loads(row["extra"]))
+        return d
+
+    def _insert(self, conn: sqlite3.Connection, project_id: str, meta: Dict) -> None:
+        cols, extra = self._split(meta)
+        cols["project_id"] = project_id
+        cols.setdefault("preview", "")
+        cols["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+        names = ", ".join(cols)
+        marks = ", ".join("?" for _ in cols)
+        conn.execute(f"INSERT OR REPLACE INTO runs({names}) VALUES ({marks})", tuple(cols.values()))
+
+    # ------------------------------
+    # write path
+    # ------------------------------
+    def create_run(self, project_id: str, meta: Dict) -> None:
+        self._ensure_project(project_id)
+        conn = self._conn()
+        with conn:
+            self._insert(conn, project_id, meta)
+
+    def update_run(self, project_id: str, run_id: str, fields: Dict) -> None:
+        conn = self._conn()
+        cols, extra = self._split(fields)
+        with conn:
+            if extra:
+                row = conn.execute("SELECT extra FROM runs WHERE id = ?", (run_id,)).fetchone()
+                if row is None:
+                    return
+                merged = json.loads(row["extra"]) if row["extra"] else {}
+                merged.update(extra)
+                cols["extra"] = json.dumps(merged, ensure_ascii=False)
+            if not cols:
+                return
+            sets = ", ".join(f"{k} = ?" for k in cols)
+            conn.execute(f"UPDATE runs SET {sets} WHERE id = ?", (*cols.values(), run_id))
+
+    def delete_runs(self, project_id: str, run_ids: List[str]) -> None:
+        if not run_ids:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "DELETE FROM runs WHERE id = ? AND project_id = ?",
+                [(run_id, project_id) for run_id in run_ids],
+            )
+
+    # ------------------------------
+    # read path
+    # ------------------------------
+    def list_runs(self, project_id: str, limit: int, before: Optional[Tuple[int, str]] = None, status: Optional[str] = None) -> List[Dict]:
+        """
+        keyset pagination: before=(started_at, id) 보다 뒤 (started_at, id 내림차순)
+        """
+        self._ensure_project(project_id)
+        sql = "SELECT * FROM runs WHERE project_id = ?"
+        params: list = [project_id]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        if before is not None:
+            sql += " AND (started_at < ? OR (started_at = ? AND id < ?))"
+            params.extend([before[0], before[0], before[1]])
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = self._conn().execute(sql, params).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    def get_meta(self, project_id: str, run_id: str) -> Optional[Dict]:
+        self._ensure_project(project_id)
+        row = self._conn().execute(
+            "SELECT * FROM runs WHERE id = ? AND project_id = ?", (run_id, project_id)
+        ).fetchone()
+        return self._row_to_dict(row) if row else None
@@ -0,0 +1,190 @@
+import bisect
+import math
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.run_status import RunStatus
+from app.utils.file_lock import file_lock
+
+
+# status -> 1 byte 코드 (순서 바꾸지 말 것: 파일에 저장됨)
+STATUS_CODES: List[str] = ["success", "error", "timeout", "oom", "stopped", "disconnected"]
+OTHER_STATUS = 255
+
+# 컬럼 파일: 이름 -> array typecode
+COLUMNS = {
+    "ended_at": "q",        # ms
+    "duration_ms": "i",     # -1 = 없음
+    "status": "B",
+}
+
+
+def _status_code(status: str) -> int:
+    try:
+        return STATUS_CODES.index(status)
+    except ValueError:
+        return OTHER_STATUS
+
+
+def _percentile(sorted_values: List[int], p: float) -> Optional[int]:
+    # nearest-rank
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def _summarize(durations: List[int], statuses: List[int]) -> Dict:
+    by_status: Dict[str, int] = {}
+    for code in statuses:
+        name = STATUS_CODES[code] if code < len(STATUS_CODES) else "other"
+        by_status[name] = by_status.get(name, 0) + 1
+
+    count = len(statuses)
+    durs = sorted(d for d in durations if d >= 0)
+    return {
+        "count": count,
+        "by_status": by_status,
+        "success_rate": round(by_status.get("success", 0) / count, 4) if count else None,
+        "duration_ms": {
+            "p50": _percentile(durs, 50),
+            "p95": _percentile(durs, 95),
+            "p99": _percentile(durs, 99),
+        },
+    }
+
+
+class _ProjectSeries:
+    """
+    컬럼 파일 = 같은 길이의 시계열 1개
+    - API worker 프로세스 여럿이 같은 파일에 append -> stats.lock (flock) 안에서 3개 컬럼을 같이 씀
+    - 메모리 array 는 파일 앞부분의 cache: 읽기 전에 늘어난 만큼만 이어 읽음
+    """
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.cols: Dict[str, array] = {name: array(code) for name, code in COLUMNS.items()}
+
+    def _path(self, name: str) -> Path:
+        return self.root / f"stats.{name}.{COLUMNS[name]}"
+
+    def _lock_path(self) -> Path:
+        return self.root / "stats.lock"
+
+    def exists(self) -> bool:
+        return self._path("status").exists()
+
+    def _refresh(self) -> None:
+        """
+        다른 프로세스가 append 한 행 이어 읽기 (file lock 안에서)
+        - 쓰다가 죽어서 컬럼 길이가 다르면 가장 짧은 길이까지만
+        """
+        sizes = [self._path(name).stat().st_size if self._path(name).exists() else 0 for name in self.cols]
+        n = min(size // col.itemsize for size, col in zip(sizes, self.cols.values()))
+        have = len(self.cols["status"])
+        if n < have:
+            for col in self.cols.values():
+                del col[:]
+            have = 0
+        if n == have:
+            return
+        for name, col in self.cols.items():
+            with self._path(name).open("rb") as f:
+                f.seek(have * col.itemsize)
+                col.frombytes(f.read((n - have) * col.itemsize))
+
+    def sync(self) -> None:
+        with file_lock(self._lock_path(), shared=True):
+            self._refresh()
+
+    def append(self, rows: List[Tuple[int, Optional[int], str]], if_new: bool = False) -> None:
+        """
+        rows: (ended_at, duration_ms, status)
+        if_new: 파일이 이미 있으면 안 씀 (seed 를 다른 프로세스가 먼저 함)
+        """
+        with file_lock(self._lock_path()):
+            if if_new and self.exists():
+                self._refresh()
+                return
+            self._refresh()
+            n = len(self.cols["status"])
+            values = {
+                "ended_at": [ended_at for ended_at, _, _ in rows],
+                "duration_ms": [-1 if d is None else int(d) for _, d, _ in rows],
+                "status": [_status_code(status) for _, _, status in rows],
+            }
+            for name, col in self.cols.items():
+                with self._path(name).open("ab") as f:
+                    f.truncate(n * col.itemsize)    # 쓰다 죽은 행이 있으면 잘라내고 이어 씀
+                    f.write(array(COLUMNS[name], values[name]).tobytes())
+                col.extend(values[name])
+
+
+class RunStats:
+    """
+    run 종료 통계 (status / duration) 컬럼 시계열
+    - finish_run 때 값 1개씩 append (.history/stats.<col>.<typecode>)
+    - 조회는 메모리 array에서 바로 집계 (history JSON 재스캔 없음, 다른 프로세스가 쓴 행은 이어 읽음)
+    - retention과 무관하게 누적 (지워진 run도 추세에는 남음)
+    """
+    def __init__(self, projects_dir: Path, seed: Optional[Callable[[str], Iterable[Dict]]] = None, dirname: str = ".history"):
+        self.projects_dir = projects_dir
+        self.dirname = dirname
+        self._seed = seed
+        self._lock = threading.Lock()
+        self._series: Dict[str, _ProjectSeries] = {}
+
+    def _get(self, project_id: str) -> _ProjectSeries:
+        with self._lock:
+            series = self._series.get(project_id)
+            if series is not None:
+                return series
+
+            series = _ProjectSeries(self.projects_dir / project_id / self.dirname)
+            if not series.exists() and self._seed is not None:
+                # 최초 1회: 기존 history meta로 채움 (오래된 것부터)
+                runs = [it for it in self._seed(project_id) if it.get("ended_at")]
+                runs.sort(key=lambda it: it["ended_at"])
+                rows = [(it["ended_at"], it.get("duration_ms"), it.get("status") or "") for it in runs]
+                if rows:
+                    series.append(rows, if_new=True)
+            self._series[project_id] = series
+            return series
+
+    def record(self, project_id: str, ended_at: int, duration_ms: Optional[int], status: RunStatus) -> None:
+        series = self._get(project_id)
+        with series.lock:
+            series.append([(ended_at, duration_ms, status)])
+
+    def summary(self, project_id: str, bucket_ms: int, since: Optional[int] = None, max_buckets: int = 168) -> Dict:
+        series = self._get(project_id)
+        with series.lock:
+            series.sync()
+            ended = series.cols["ended_at"].tolist()
+            durations = series.cols["duration_ms"].tolist()
+            statuses = series.cols["status"].tolist()
+
+        if since is not None:
+            # append 순서 = 종료 순서라 정렬되어 있음
+            start = bisect.bisect_left(ended, since)
+            ended, durations, statuses = ended[start:], durations[start:], statuses[start:]
+
+        groups: Dict[int, List[int]] = {}
+        for i, t in enumerate(ended):
+            groups.setdefault(t // bucket_ms * bucket_ms, []).append(i)
+
+        buckets = []
+        for start in sorted(groups)[-max_buckets:]:
+            idx = groups[start]
+            buckets.append({
+                "start": start,
+                **_summarize([durations[i] for i in idx], [statuses[i] for i in idx]),
+            })
+
+        return {
+            "overall": _summarize(durations, statuses),
+            "bucket_ms": bucket_ms,
+            "buckets": buckets,
+        }
@@ -0,0 +1,104 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+from app.core.settings import HISTORY_FLUSH_BYTES, HISTORY_FLUSH_INTERVAL_S
+
+
+RunKey = Tuple[str, str]    # (project_id, run_id)
+
+
+@dataclass
+class _RunBuffer:
+    parts: List[str] = field(default_factory=list)
+    size: int = 0
+    first_at: float = 0.0
+    # flush 순서 보장용 (writer thread / 동기 flush가 동시에 쓰지 않게)
+    io_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class OutputWriter:
+    """
+    run output write-behind 버퍼
+    - write(): 메모리에 쌓기만 함 (event loop에서 호출해도 blocking 없음)
+    - writer thread 1개가 size / 시간 기준으로 store에 flush
+    - flush(): 해당 run 버퍼를 즉시 동기 flush (finish_run 직전)
+    """
+    def __init__(
+        self,
+        sink: Callable[[str, str, str], None],
+        flush_bytes: int = HISTORY_FLUSH_BYTES,
+        flush_interval_s: float = HISTORY_FLUSH_INTERVAL_S,
+    ):
+        self._sink = sink
+        self._flush_bytes = flush_bytes
+        self._flush_interval_s = flush_interval_s
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._buffers: Dict[RunKey, _RunBuffer] = {}
+        self._thread: threading.Thread | None = None
+
+    def write(self, project_id: str, run_id: str, chunk: str) -> None:
+        if not chunk:
+            return
+        with self._cond:
+            buf = self._buffers.get((project_id, run_id))
+            if buf is None:
+                buf = self._buffers[(project_id, run_id)] = _RunBuffer()
+            if not buf.parts:
+                buf.first_at = time.monotonic()
+            buf.parts.append(chunk)
+            buf.size += len(chunk)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="history-writer", daemon=True)
+                self._thread.start()
+            if buf.size >= self._flush_bytes:
+                self._cond.notify()
+
+    def flush(self, project_id: str, run_id: str, close: bool = False) -> None:
+        """
+        close=True면 flush 후 버퍼 제거 (run 종료)
+        """
+        key = (project_id, run_id)
+        with self._lock:
+            buf = self._buffers.get(key)
+        if buf is None:
+            return
+
+        self._drain(key, buf)
+
+        if close:
+            with self._lock:
+                self._buffers.pop(key, None)
+            # 제거 직전에 들어온 chunk가 있으면 마저 기록
+            self._drain(key, buf)
+
+    def _drain(self, key: RunKey, buf: _RunBuffer) -> None:
+        with buf.io_lock:
+            with self._lock:
+                if not buf.parts:
+                    return
+                data = "".join(buf.parts)
+                buf.parts = []
+                buf.size = 0
+            try:
+                self._sink(key[0], key[1], data)
+            except Exception as e:
+                print("[history-writer] flush failed", key, e)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=self._flush_interval_s)
+                now = time.monotonic()
+                due = [
+                    (key, buf) for key, buf in self._buffers.items()
+                    if buf.parts and (
+                        buf.size >= self._flush_bytes
+                        or now - buf.first_at >= self._flush_interval_s
+                    )
+                ]
+            for key, buf in due:
+                self._drain(key, buf)
@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Deque, Tuple
+
+from app.core.settings import OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES
+
+
+class OutputBudget:
+    """
+    run 1개의 output 상한 (head + tail)
+    - 처음 head_bytes 까지는 그대로 통과
+    - 그 이후는 마지막 tail_bytes 만 ring buffer로 보관, 밀려난 만큼 dropped 집계
+    - 종료 시 [TRUNCATED n bytes] 마커 1개 + tail 을 내보낸다 (history 기록용)
+    - live(): 진행 중에 WS 로만 보여줄 새 tail (history 에는 안 남김)
+    -> run 당 메모리 / disk 사용량이 head + tail 로 고정
+    """
+    def __init__(self, head_bytes: int = OUTPUT_HEAD_BYTES, tail_bytes: int = OUTPUT_TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.head_left = head_bytes
+        self.tail_bytes = tail_bytes
+        self.truncated = False
+        self.dropped_bytes = 0
+        self.dropped_lines = 0
+        self._tail: Deque[Tuple[str, int, int]] = deque()     # (chunk, bytes, seq)
+        self._tail_size = 0
+        self._seq = 0
+        self._live_seq = 0      # live() 로 보여준 마지막 seq
+
+    def feed(self, chunk: str) -> str:
+        """
+        return: 지금 내보낼 부분 ("" 이면 tail에 보관됨)
+        """
+        n = len(chunk.encode("utf-8"))
+        if not self.truncated:
+            if n <= self.head_left:
+                self.head_left -= n
+                return chunk
+            # 줄 중간에서 자르지 않고 이 chunk부터 tail로
+            self.truncated = True
+
+        self._seq += 1
+        self._tail.append((chunk, n, self._seq))
+        self._tail_size += n
+        self._evict()
+        return ""
+
+    def _evict(self) -> None:
+        while self._tail_size > self.tail_bytes and len(self._tail) > 1:
+            chunk, n, _ = self._tail.popleft()
+            self._tail_size -= n
+            self.dropped_bytes += n
+            self.dropped_lines += chunk.count("\n")
+
+        if self._tail_size > self.tail_bytes:
+            # chunk 1개가 tail 보다 큰 경우: 뒷부분만 남김
+            chunk, n, seq = self._tail.pop()
+            kept = chunk.encode("utf-8")[-self.tail_bytes:].decode("utf-8", errors="ignore")
+            kept_n = len(kept.encode("utf-8"))
+            self.dropped_bytes += n - kept_n
+            self.dropped_lines += chunk.count("\n") - kept.count("\n")
+            self._tail.append((kept, kept_n, seq))
+            self._tail_size = kept_n
+
+    def live(self) -> str:
+        """
+        지난 live() 이후 tail 에 들어온 부분 (WS 전용, ring buffer 는 그대로)
+        """
+        new = [(c, seq) for c, _, seq in self._tail if seq > self._live_seq]
+        if not new:
+            return ""
+        skipped = new[0][1] > self._live_seq + 1
+        self._live_seq = new[-1][1]
+        out = "".join(c for c, _ in new)
+        return ("\n[...]\n" + out) if skipped else out
+
+    def marker(self) -> str:
+        return f"\n[TRUNCATED {self.dropped_bytes} bytes]\n" if self.dropped_bytes else ""
+
+    def finish(self) -> str:
+        """
+        종료 시 1번 호출: 마커 + 보관 중인 tail
+        """
+        if not self.truncated:
+            return ""
+        tail = "".join(c for c, _, _ in self._tail)
+        self._tail.clear()
+        self._tail_size = 0
+        return self.marker() + tail
@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.core.settings import BROKER_CLIENT_QUEUE, BROKER_FRAME_LIMIT, RUN_BROKER_TOKEN
+
+
+# ==================================================
+# transport: JSON 1줄 = frame 1개 (bytes 출력은 base64)
+# url: "unix:///path/to.sock" | "tcp://host:port"
+# ==================================================
+def parse_url(url: str) -> Tuple[str, str, int]:
+    if url.startswith("unix://"):
+        return "unix", url[len("unix://"):], 0
+    if url.startswith("tcp://"):
+        host, _, port = url[len("tcp://"):].rpartition(":")
+        return "tcp", host or "127.0.0.1", int(port)
+    raise ValueError(f"invalid broker url: {url}")
+
+
+class Conn:
+    """
+    frame 단위 송수신 (send 는 lock 으로 직렬화 -> 여러 task 에서 써도 frame이 안 섞임)
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, url: str) -> "Conn":
+        kind, host, port = parse_url(url)
+        if kind == "unix":
+            r, w = await asyncio.open_unix_connection(host, limit=BROKER_FRAME_LIMIT)
+        else:
+            r, w = await asyncio.open_connection(host, port, limit=BROKER_FRAME_LIMIT)
+        return cls(r, w)
+
+    def send_nowait(self, msg: Dict) -> None:
+        # sync callback (on_line 등) 용: 한 줄 write 는 그 자체로 안 섞임
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(msg).encode("utf-8") + b"\n")
+
+    async def send(self, msg: Dict) -> None:
+        async with self._lock:
+            if self.writer.is_closing():
+                raise ConnectionResetError("connection closed")
+            self.writer.write(json.dumps(msg).encode("utf-8") + b"\n")
+            await self.writer.drain()
+
+    async def recv(self) -> Optional[Dict]:
+        try:
+            line = await self.reader.readline()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            return None
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def abort(self) -> None:
+        # 상대가 안 읽어서 buffer 가 안 빠질 때 (close 는 flush 를 기다림)
+        self.writer.transport.abort()
+
+
+async def serve(url: str, handler) -> asyncio.AbstractServer:
+    kind, host, port = parse_url(url)
+    if kind == "unix":
+        return await asyncio.start_unix_server(handler, host, limit=BROKER_FRAME_LIMIT)
+    return await asyncio.start_server(handler, host, port, limit=BROKER_FRAME_LIMIT)
+
+
+# ==================================================
+# broker
+# ==================================================
+@dataclass
+class _Job:
+    job_id: str
+    msg: Dict
+    client: Conn
+    worker: Optional["_Worker"] = None
+    done: bool = False
+    behind: bool = False        # outbox 가 넘쳐서 끊은 client (이후 frame 은 버림)
+    # client 로 보낼 frame (writer task 가 전송) - 느린 client 가 worker 읽기 루프를 막지 않게
+    outbox: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(BROKER_CLIENT_QUEUE))
+
+
+@dataclass
+class _Worker:
+    worker_id: str
+    conn: Conn
+    slots: int
+    running: Set[str] = field(default_factory=set)
+
+
+class Broker:
+    """
+    API(client) <-> worker 사이 run job 중계
+    - client: hello(role=client) -> job -> (need / line / started / chunk / stats / exit ...) 수신, blob / kill / stats 송신
+    - worker: hello(role=worker, slots) -> job 수신 -> frame 송신 (job_id 포함)
+    - 빈 slot 이 있는 worker 에게 FIFO 배정 (프로젝트 간 공정성은 API 쪽 run_scheduler 가 담당)
+    - client 가 끊기면 해당 job kill, worker 가 끊기면 그 worker 의 job 은 exit(error)
+    - client 별 outbox (BROKER_CLIENT_QUEUE frame): 넘치면 그 client 만 끊음 (-> job kill)
+    - token 이 있으면 hello 의 token 이 같아야 함 (아니면 바로 끊음)
+    """
+    def __init__(self, token: str = RUN_BROKER_TOKEN):
+        self.token = token
+        self.workers: Dict[str, _Worker] = {}
+        self.pending: Deque[_Job] = deque()
+        self.jobs: Dict[str, _Job] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()      # 연결 / client writer task (close 때 정리)
+
+    async def start(self, url: str) -> None:
+        self.server = await serve(url, self._handle)
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        tasks = list(self._tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def snapshot(self) -> Dict:
+        return {
+            "workers": {w.worker_id: {"slots": w.slots, "running": len(w.running)} for w in self.workers.values()},
+            "pending": len(self.pending),
+        }
+
+    # ------------------------------
+    # connection
+    # ------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = Conn(reader, writer)
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            hello = await conn.recv()
+            if not hello or hello.get("type") != "hello":
+                return
+            if self.token and not hmac.compare_digest(str(hello.get("token") or ""), self.token):
+                await conn.send({"type": "exit", "code": None, "error": "broker auth failed (RUN_BROKER_TOKEN)"})
+                return
+            if hello.get("role") == "worker":
+                await self._serve_worker(conn, hello)
+            else:
+                await self._serve_client(conn)
+        except asyncio.CancelledError:
+            # close() / loop 종료: python 3.11 stream callback 이 cancelled task 에 traceback 을 찍지 않게
+            pass
+        finally:
+            self._tasks.discard(task)
+            conn.close()
+
+    async def _serve_client(self, conn: Conn) -> None:
+        msg = await conn.recv()
+        if not msg or msg.get("type") != "job":
+            return
+        job = _Job(msg.get("job_id") or uuid.uuid4().hex[:12], msg, conn)
+        writer = asyncio.create_task(self._client_writer(job))
+        self._tasks.add(writer)
+        writer.add_done_callback(self._tasks.discard)
+        try:
+            self.jobs[job.job_id] = job
+            self.pending.append(job)
+            self._dispatch()
+            if job.worker is None:
+                self._to_client(job, {"type": "queued", "position": self._position(job)})
+
+            while True:
+                m = await conn.recv()
+                if m is None:
+                    break
+                if job.worker is not None:
+                    # kill / stats / blob ... 그대로 worker 에게
+                    await self._to_worker(job.worker, {**m, "job_id": job.job_id})
+                elif m.get("type") == "kill":
+                    # 아직 worker 배정 전: 그냥 취소
+                    self._finish(job)
+                    self._to_client(job, {"type": "exit", "code": None, "error": "cancelled before start"})
+                    return
+
+            # client 끊김: 실행 중이면 강제 종료, 대기 중이면 취소
+            if not job.done:
+                if job.worker is not None:
+                    await self._to_worker(job.worker, {"type": "kill", "job_id": job.job_id, "signal": "SIGKILL"})
+                else:
+                    self._finish(job)
+        finally:
+            # 남은 frame (exit 등) 전송 후 writer 종료
+            try:
+                job.outbox.put_nowait(None)
+            except asyncio.QueueFull:
+                writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+    async def _client_writer(self, job: _Job) -> None:
+        while True:
+            m = await job.outbox.get()
+            if m is None:
+                return
+            try:
+                await job.client.send(m)
+            except ConnectionError:
+                return
+
+    def _to_client(self, job: _Job, msg: Dict) -> None:
+        """
+        worker 읽기 루프에서 호출: 기다리지 않음
+        outbox 가 차면 (client 가 못 따라옴) 그 client 연결만 끊음 -> _serve_client 가 job kill
+        """
+        if job.behind:
+            return
+        try:
+            job.outbox.put_nowait(msg)
+        except asyncio.QueueFull:
+            job.behind = True
+            print(f"[run-broker] client of job {job.job_id} fell behind, disconnecting")
+            job.client.abort()
+
+    async def _serve_worker(self, conn: Conn, hello: Dict) -> None:
+        w = _Worker(hello.get("worker_id") or uuid.uuid4().hex[:8], conn, max(1, int(hello.get("slots") or 1)))
+        self.workers[w.worker_id] = w
+        self._dispatch()
+        try:
+            while True:
+                m = await conn.recv()
+                if m is None:
+                    break
+                job = self.jobs.get(m.get("job_id"))
+                if job is None:
+                    continue
+                self._to_client(job, m)
+                if m.get("type") == "exit":
+                    self._finish(job)
+        finally:
+            self.workers.pop(w.worker_id, None)
+            for job_id in list(w.running):
+                job = self.jobs.get(job_id)
+                if job is not None:
+                    self._finish(job)
+                    self._to_client(job, {"type": "exit", "code": None, "error": f"worker {w.worker_id} lost"})
+
+    # ------------------------------
+    # scheduling
+    # ------------------------------
+    def _dispatch(self) -> None:
+        while self.pending:
+            w = min(
+                (w for w in self.workers.values() if len(w.running) < w.slots),
+                key=lambda w: len(w.running) / w.slots,
+                default=None,
+            )
+            if w is None:
+                break
+            job = self.pending.popleft()
+            job.worker = w
+            w.running.add(job.job_id)
+            w.conn.send_nowait({**job.msg, "job_id": job.job_id})
+
+    def _position(self, job: _Job) -> int:
+        return list(self.pending).index(job) + 1 if job in self.pending else 0
+
+    def _finish(self, job: _Job) -> None:
+        job.done = True
+        self.jobs.pop(job.job_id, None)
+        if job in self.pending:
+            self.pending.remove(job)
+        if job.worker is not None:
+            job.worker.running.discard(job.job_id)
+        self._dispatch()
+
+    async def _to_worker(self, w: _Worker, msg: Dict) -> None:
+        try:
+            await w.conn.send(msg)
+        except ConnectionError:
+            pass
+
+
+def _is_loopback(url: str) -> bool:
+    kind, host, _ = parse_url(url)
+    if kind == "unix" or host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main() -> None:
+    # 단독 broker (API / worker 가 여러 호스트일 때)
+    # 실행: cd backend && RUN_BROKER_TOKEN=<secret> python -m app.services.run_broker --listen tcp://0.0.0.0:7070
+    # (API / worker 에도 같은 RUN_BROKER_TOKEN, token 없이는 loopback / unix socket 에만 bind)
+    ap = argparse.ArgumentParser(description="freeweb run broker")
+    ap.add_argument("--listen", default="tcp://127.0.0.1:7070", help="tcp://host:port | unix:///path.sock")
+    args = ap.parse_args()
+    if not RUN_BROKER_TOKEN and not _is_loopback(args.listen):
+        ap.error(f"refusing to listen on {args.listen} without RUN_BROKER_TOKEN (workers run whatever jobs they receive)")
+
+    async def _run():
+        broker = Broker()
+        await broker.start(args.listen)
+        print(f"[run-broker] listening on {args.listen}")
+        await broker.server.serve_forever()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.run_options import RunOptions
+from app.core.settings import (
+    RUN_CACHE_ENABLED,
+    RUN_CACHE_REPLAY,
+    RUN_CACHE_MAX_OUTPUT_BYTES,
+    RUN_CACHE_MAX_ENTRIES,
+)
+from app.services.file_service import is_hidden_path
+from app.services.run_detect import RunSpec, _read_run_json, detect_run_spec
+
+
+# key 형식이 바뀌면 올림 (예전 entry는 자연히 miss)
+CACHE_VERSION = 1
+
+
+def cache_enabled(project_path: Path) -> bool:
+    """
+    전역 RUN_CACHE + run.json "cache" override
+    예) {"cache": false}  -> 시간 / 난수 / 외부 상태에 따라 출력이 바뀌는 프로그램
+    """
+    cfg = _read_run_json(project_path) or {}
+    value = cfg.get("cache")
+    if isinstance(value, bool):
+        return value
+    return RUN_CACHE_ENABLED
+
+
+class OutputRecorder:
+    """
+    run 출력 (시작 기준 ms, line) 기록 - 재생용
+    RUN_CACHE_MAX_OUTPUT_BYTES 를 넘으면 기록 포기 (저장 안 함)
+    """
+    def __init__(self, max_bytes: int = RUN_CACHE_MAX_OUTPUT_BYTES):
+        self.max_bytes = max_bytes
+        self.events: List[Tuple[int, str]] = []
+        self.size = 0
+        self.overflow = False
+        self._started = time.monotonic()
+
+    def wrap(self, on_line: Callable[[str], None]) -> Callable[[str], None]:
+        def _on_line(line: str) -> None:
+            self.record(line)
+            on_line(line)
+        return _on_line
+
+    def record(self, line: str) -> None:
+        if self.overflow:
+            return
+        self.size += len(line.encode("utf-8"))
+        if self.size > self.max_bytes:
+            self.overflow = True
+            self.events = []
+            return
+        self.events.append((int((time.monotonic() - self._started) * 1000), line))
+
+
+class RunCache:
+    """
+    content-addressed run 결과 캐시
+    - key = sha256(파일 목록 + 내용 hash, RunSpec, RunOptions)  (is_hidden_path 제외)
+    - entry = 출력 (상대 시각 포함) + 종료 결과, <project>/.history/cache/<key>.json
+    - 파일 hash는 (size, mtime) 가 같으면 재사용 -> 반복 클릭 시 다시 읽지 않음
+    """
+    def __init__(self, dirname: str = ".history/cache", max_entries: int = RUN_CACHE_MAX_ENTRIES):
+        self.dirname = dirname
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}     # abs path -> (size, mtime_ns, sha256)
+
+    # ------------------------------
+    # key
+    # ------------------------------
+    def _hash_file(self, p: Path) -> str:
+        st = p.stat()
+        k = str(p)
+        with self._lock:
+            hit = self._file_hashes.get(k)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256(p.read_bytes()).hexdigest()
+        with self._lock:
+            self._file_hashes[k] = (st.st_size, st.st_mtime_ns, h)
+        return h
+
+    def tree_hash(self, project_path: Path) -> str:
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(project_path):
+            dirs[:] = sorted(d for d in dirs if not is_hidden_path(Path(root) / d))
+            for name in sorted(files):
+                p = Path(root) / name
+                if is_hidden_path(p) or not p.is_file():
+                    continue
+                rel = p.relative_to(project_path).as_posix()
+                h.update(f"{rel}\0{self._hash_file(p)}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def key(self, project_path: Path, spec: RunSpec, opts: RunOptions) -> str:
+        payload = json.dumps(
+            {
+                "v": CACHE_VERSION,
+                "files": self.tree_hash(project_path),
+                "spec": asdict(spec),
+                "options": asdict(opts),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def probe(self, project_path: Path, opts: RunOptions) -> Optional[Tuple[str, Optional[Dict]]]:
+        """
+        return: None(캐시 안 씀) | (key, entry or None)
+        blocking I/O (파일 hash) -> event loop 밖에서 호출
+        """
+        if not cache_enabled(project_path):
+            return None
+        try:
+            spec = detect_run_spec(project_path, lang_override=opts.lang)
+            key = self.key(project_path, spec, opts)
+        except Exception:
+            return None     # spec 오류는 실제 run 쪽에서 보고
+        return key, self.get(project_path, key)
+
+    # ------------------------------
+    # storage
+    # ------------------------------
+    def _dir(self, project_path: Path) -> Path:
+        return project_path / self.dirname
+
+    def get(self, project_path: Path, key: str) -> Optional[Dict]:
+        p = self._dir(project_path) / f"{key}.json"
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(p)     # LRU: 최근 hit 은 늦게 지워짐
+        return entry
+
+    def put(self, project_path: Path, key: str, entry: Dict) -> None:
+        d = self._dir(project_path)
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / f"{key}.json.tmp"
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, d / f"{key}.json")
+        self._evict(d)
+
+    def _evict(self, d: Path) -> None:
+        entries = sorted(d.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for p in entries[: max(0, len(entries) - self.max_entries)]:
+            p.unlink(missing_ok=True)
+
+
+async def replay(entry: Dict, on_line: Callable[[str], None], stop_event: asyncio.Event, timed: bool = RUN_CACHE_REPLAY == "timed") -> bool:
+    """
+    저장된 출력 재생 (timed: 원래 상대 시각대로)
+    return: stop 으로 중간에 끊겼으면 True
+    """
+    started = time.monotonic()
+    for t_ms, line in entry.get("events") or []:
+        if timed:
+            delay = t_ms / 1000 - (time.monotonic() - started)
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        if stop_event.is_set():
+            return True
+        on_line(line)
+    return False
+
+
+# 싱글톤(프로세스 내 1개)
+run_cache = RunCache()
@@ -1,65 +1,226 @@
+import asyncio
+import sqlite3
 import threading
+import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
 
+from app.core.config import BASE_DIR
 from app.core.presets import DEFAULT_OPTIONS
 from app.core.run_options import RunOptions
+from app.core.settings import RUN_STATE_BACKEND, RUN_STATE_DB, RUN_STATE_POLL_S
+from app.services.run_state_store import SqliteRunStateStore, owner_dead, process_owner
 
 
 @dataclass
 class RunState:
     is_running: bool = False
+    project_id: Optional[str] = None
     container_name: Optional[str] = None
     process_pid: Optional[str] = None
     was_stopped = False
+    # supervisor를 바로 깨우기 위한 event (+ 그 event가 속한 loop) - 이 프로세스가 supervise 하는 run만
+    stop_event: Optional[asyncio.Event] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    stop_requested_at: Optional[float] = None     # time.monotonic(), stop latency 측정용
+    supervised: bool = False                      # supervisor 가 있음 (다른 worker 프로세스일 수도 있음)
 
 class RunManager:
     """
-    - 메모리(in-process)에 상태 저장
+    - 실행 상태 / stop 플래그는 run_id 기준 (한 프로젝트에 run 여러 개 가능)
+    - 실행 옵션은 project_id 기준
+    - store 없으면 메모리(in-process)에만 저장
+    - store(SQLite) 있으면 API worker 프로세스끼리 공유:
+      다른 worker 로 들어온 /stop 은 DB 에 기록 -> run 을 가진 프로세스가 poll 로 보고 stop_event set
     """
-    def __init__(self):
+    def __init__(self, store: Optional[SqliteRunStateStore] = None, poll_s: float = RUN_STATE_POLL_S):
         self._lock = threading.Lock()
-        self._states: dict[str, RunState] = {}
+        self._states: dict[str, RunState] = {}      # 이 프로세스에서 시작한 run
         self._stop_requested: dict[str, bool] = {}
         self._options: dict[str, RunOptions] = {}
+        self._store = store
+        self._poll_s = poll_s
+        self._poller: Optional[threading.Thread] = None
+        if store is not None:
+            store.reap()
+
+    def try_start(self, run_id: str, project_id: str, container_name: str, pid: int, stop_event: Optional[asyncio.Event] = None, limit: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        """
+        limit: 프로젝트 동시 실행 수, 모든 worker 프로세스 합계 기준 (store 있을 때만 / 메모리면 run_scheduler 가 이미 셈)
+        loop: stop_event 가 속한 loop (to_thread 안에서 부를 때)
+        return: False = 이미 실행 중인 run_id / limit 도달
+        """
+        if self._store is not None:
+            if not self._store.insert(run_id, project_id, container_name, pid, process_owner(), stop_event is not None, limit):
+                return False
 
-    def try_start(self, project_id: str, container_name: str, pid: int) -> bool:
         with self._lock:
-            state = self._states.get(project_id)
+            state = self._states.get(run_id)
             if state and state.is_running:
                 return False
-            
-            self._states[project_id] = RunState(
+
+            self._states[run_id] = RunState(
                 is_running=True,
+                project_id=project_id,
                 container_name=container_name,
                 process_pid=pid,
+                stop_event=stop_event,
+                loop=(loop or asyncio.get_running_loop()) if stop_event else None,
+                supervised=stop_event is not None,
             )
-            self._stop_requested[project_id] = False
+            self._stop_requested[run_id] = False
+            if self._store is not None and stop_event is not None:
+                self._ensure_poller()
             return True
-        
-    def request_stop(self, project_id: str):
-        self._stop_requested[project_id] = True
 
-    def stop_and_clear(self, project_id: str):
+    def set_container(self, run_id: str, container_name: str):
+        """
+        실제 실행 컨테이너 이름 갱신 (warm pool에서 받은 경우 /stop 대상이 바뀜)
+        """
+        with self._lock:
+            state = self._states.get(run_id)
+            if state:
+                state.container_name = container_name
+        if self._store is not None:
+            self._store.set_container(run_id, container_name)
+
+    def request_stop(self, run_id: str):
+        if self._store is not None:
+            # run 이 다른 worker 프로세스에 있어도 DB 를 보고 멈춤
+            self._store.request_stop(run_id)
+        self._deliver_stop(run_id, time.monotonic())
+
+    def _deliver_stop(self, run_id: str, requested_at: float):
+        self._stop_requested[run_id] = True
+        with self._lock:
+            state = self._states.get(run_id)
+            if state and state.stop_requested_at is None:
+                state.stop_requested_at = requested_at
+        if state and state.stop_event and state.loop:
+            # /stop 은 threadpool 에서 호출됨 -> loop 쪽으로 넘겨서 set
+            try:
+                state.loop.call_soon_threadsafe(state.stop_event.set)
+            except RuntimeError:
+                pass    # loop 종료됨 (run도 이미 끝남)
+
+    def stop_and_clear(self, run_id: str):
+        with self._lock:
+            self._stop_requested.pop(run_id, None)
+            self._states.pop(run_id, None)
+        if self._store is not None:
+            self._store.delete(run_id)
+
+    def get_state(self, run_id: str) -> RunState:
+        with self._lock:
+            state = self._states.get(run_id)
+        if state is not None:
+            return state
+        if self._store is not None:
+            row = self._store.get(run_id)
+            if row is not None:
+                return self._row_state(row)
+        return RunState()
+
+    def is_live(self, run_id: str) -> bool:
+        """
+        아직 실행 중인 run 인지 (이 프로세스 + shared store, 죽은 worker 프로세스의 row 는 제외)
+        """
         with self._lock:
-            self._stop_requested[project_id] = False
-            self._states.pop(project_id, None)
+            if run_id in self._states:
+                return True
+        if self._store is not None:
+            row = self._store.get(run_id)
+            return row is not None and not owner_dead(row["owner"])
+        return False
 
-    def get_state(self, project_id: str) -> RunState:
+    def runs_of(self, project_id: str) -> dict[str, RunState]:
+        """
+        프로젝트의 실행 중인 run 전체 (run_id -> state)
+        """
         with self._lock:
-            return self._states.get(project_id, RunState())
-        
+            local = {rid: st for rid, st in self._states.items() if st.project_id == project_id and st.is_running}
+        if self._store is None:
+            return local
+        return {row["run_id"]: local.get(row["run_id"]) or self._row_state(row) for row in self._store.of_project(project_id)}
+
     def set_options(self, project_id: str, opts: RunOptions):
+        if self._store is not None:
+            self._store.set_options(project_id, opts)
+            return
         with self._lock:
             self._options[project_id] = opts
 
     def get_options(self, project_id: str) -> RunOptions:
+        if self._store is not None:
+            return self._store.get_options(project_id) or DEFAULT_OPTIONS
         with self._lock:
             return self._options.get(project_id, DEFAULT_OPTIONS)
 
-    def is_stop_requested(self, project_id: str) -> bool:
-        return self._stop_requested.get(project_id, False)
-                
-# 싱글톤(프로세스 내 1개)
-run_manager = RunManager()
-    
\ No newline at end of file
+    def is_stop_requested(self, run_id: str) -> bool:
+        if self._stop_requested.get(run_id, False):
+            return True
+        if self._store is not None:
+            row = self._store.get(run_id)
+            return row is not None and row["stop_requested_at"] is not None
+        return False
+
+    # ------------------------------
+    # shared store
+    # ------------------------------
+    @staticmethod
+    def _row_state(row: sqlite3.Row) -> RunState:
+        requested = row["stop_requested_at"]
+        return RunState(
+            is_running=True,
+            project_id=row["project_id"],
+            container_name=row["container_name"],
+            process_pid=row["pid"],
+            supervised=bool(row["supervised"]),
+            # wall clock -> 이 프로세스의 monotonic
+            stop_requested_at=time.monotonic() - (time.time() - requested) if requested is not None else None,
+        )
+
+    def _ensure_poller(self):
+        """
+        lock을 잡은 상태에서 호출
+        """
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll_stops, name="run-stop-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_stops(self):
+        """
+        이 프로세스가 supervise 하는 run 이 있는 동안만 돈다 (없으면 종료, 다음 try_start 때 다시 시작)
+        """
+        while True:
+            time.sleep(self._poll_s)
+            with self._lock:
+                waiting = {rid for rid, st in self._states.items() if st.stop_event is not None and not self._stop_requested.get(rid)}
+                if not any(st.stop_event is not None for st in self._states.values()):
+                    self._poller = None
+                    return
+            if not waiting:
+                continue
+            try:
+                requests = self._store.stop_requests(process_owner())
+            except sqlite3.Error:
+                continue
+            for run_id, wall in requests:
+                if run_id in waiting:
+                    self._deliver_stop(run_id, time.monotonic() - (time.time() - wall))
+
+
+def _make_store() -> Optional[SqliteRunStateStore]:
+    """
+    RUN_STATE_BACKEND
+    - "sqlite" : API worker 프로세스끼리 공유하는 WAL SQLite (기본)
+    - "memory" : 프로세스 안 dict (uvicorn worker 1개일 때만)
+    """
+    if RUN_STATE_BACKEND == "sqlite":
+        return SqliteRunStateStore(Path(RUN_STATE_DB) if RUN_STATE_DB else BASE_DIR / ".data" / "run_state.sqlite3")
+    return None
+
+
+# 싱글톤(프로세스 내 1개, 상태는 RUN_STATE_BACKEND 에 따라 프로세스 간 공유)
+run_manager = RunManager(_make_store())
@@ -42,7 +42,7 @@ def node_preflight(project_id: str, project_path: Path) -> NodePreflight:
     # lockfile 존재 여부 (정책 1: 없으면 중단)
     if not lock.exists():
         msgs.append("[NODE_PRECHECK][ERROR] package-lock.json not found.")
-        msgs.append("This runner uses read-only container + `npm ci` (reproducible).")
+        msgs.append("This runner installs dependencies with `npm ci` once per lockfile (shared read-only node_modules).")
         msgs.append("Fix (on your machine):")
         msgs.append(f"  cd {project_path}")
         msgs.append("  npm install")
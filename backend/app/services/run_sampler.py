@@ -0,0 +1,220 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.settings import CGROUP_ROOT, RESOURCE_MAX_SAMPLES, RESOURCE_SAMPLE_INTERVAL_S
+from app.services.container_backend import container_stats, inspect_container
+
+
+# series 컬럼 (run record에 컬럼 배열로 저장)
+SERIES = ("t_ms", "cpu_ms", "mem_bytes", "pids", "io_read_bytes", "io_write_bytes")
+
+
+def _cgroup_dir(container_id: str) -> Optional[Path]:
+    """
+    cgroup v2: systemd driver / cgroupfs driver 경로 둘 다 확인
+    """
+    root = Path(CGROUP_ROOT)
+    for p in (root / "system.slice" / f"docker-{container_id}.scope", root / "docker" / container_id):
+        if (p / "cgroup.procs").exists():
+            return p
+    return None
+
+
+def _read_int(path: Path) -> Optional[int]:
+    try:
+        return int(path.read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _read_kv(path: Path) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for line in path.read_text().splitlines():
+        k, _, v = line.partition(" ")
+        if v.strip().isdigit():
+            out[k] = int(v)
+    return out
+
+
+def read_cgroup(cg: Path) -> Optional[Dict]:
+    """
+    return: 누적/현재 값 1개 (컨테이너가 이미 사라졌으면 None)
+    """
+    try:
+        cpu = _read_kv(cg / "cpu.stat")
+        io_read = io_write = 0
+        io_stat = cg / "io.stat"
+        if io_stat.exists():
+            # "8:0 rbytes=.. wbytes=.. rios=.. wios=.."
+            for line in io_stat.read_text().splitlines():
+                for field in line.split()[1:]:
+                    k, _, v = field.partition("=")
+                    if k == "rbytes":
+                        io_read += int(v)
+                    elif k == "wbytes":
+                        io_write += int(v)
+        events = cg / "memory.events"
+        oom_kills = _read_kv(events).get("oom_kill", 0) if events.exists() else 0
+    except FileNotFoundError:
+        return None
+
+    return {
+        "cpu_ms": cpu.get("usage_usec", 0) // 1000,
+        "mem_bytes": _read_int(cg / "memory.current"),
+        "mem_peak_bytes": _read_int(cg / "memory.peak"),     # kernel 5.19+
+        "pids": _read_int(cg / "pids.current"),
+        "io_read_bytes": io_read,
+        "io_write_bytes": io_write,
+        "oom_kills": oom_kills,
+    }
+
+
+def parse_api_stats(st: Dict) -> Dict:
+    """
+    Engine API /stats (one-shot) -> read_cgroup 과 같은 모양
+    """
+    mem = st.get("memory_stats") or {}
+    io_read = io_write = 0
+    for it in (st.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        op = (it.get("op") or "").lower()
+        if op == "read":
+            io_read += it.get("value", 0)
+        elif op == "write":
+            io_write += it.get("value", 0)
+    return {
+        "cpu_ms": ((st.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0) // 1_000_000,
+        "mem_bytes": mem.get("usage"),
+        "mem_peak_bytes": mem.get("max_usage"),     # cgroup v1 에서만 옴
+        "pids": (st.get("pids_stats") or {}).get("current"),
+        "io_read_bytes": io_read,
+        "io_write_bytes": io_write,
+        "oom_kills": 0,
+    }
+
+
+class ContainerStats:
+    """
+    docker 컨테이너 1개의 샘플 소스 (executor handle.stats() 에서 사용)
+    cgroup v2 파일을 직접 읽음, 못 찾으면 Engine API stats (one-shot)
+    return 에 "source" 포함 ("cgroup" | "api")
+    """
+    def __init__(self, container: str):
+        self.container = container
+        self._cg: Optional[Path] = None
+        self._container_id: Optional[str] = None
+
+    async def _resolve(self) -> bool:
+        if self._container_id is None:
+            info = await inspect_container(self.container)
+            if not info:
+                return False
+            self._container_id = info["Id"]
+        if self._cg is None:
+            self._cg = _cgroup_dir(self._container_id)
+        return True
+
+    async def sample(self) -> Optional[Dict]:
+        if self._cg is not None:
+            s = read_cgroup(self._cg)     # 이미 찾았으면 inspect 없이 (종료 직전 마지막 1회도 빠르게)
+            return {**s, "source": "cgroup"} if s else None
+        if not await self._resolve():
+            return None     # 아직 생성 전 / 이미 삭제됨
+        if self._cg is not None:
+            s = read_cgroup(self._cg)
+            return {**s, "source": "cgroup"} if s else None
+        st = await container_stats(self._container_id)
+        if not st:
+            return None
+        return {**parse_api_stats(st), "source": "api"}
+
+
+class ResourceSampler:
+    """
+    run 1개의 자원 사용량 주기 샘플링 (event loop task)
+    - stats: executor handle.stats (cgroup / Engine API / /proc ...), "source" 포함 dict 또는 None
+    - series 가 RESOURCE_MAX_SAMPLES 에 차면 반으로 솎고 간격 2배 -> record 크기 고정
+    - peak / oom_kill 횟수는 솎기와 무관하게 매 샘플에서 갱신
+    """
+    def __init__(
+        self,
+        stats: Callable[[], Awaitable[Optional[Dict]]],
+        interval_s: float = RESOURCE_SAMPLE_INTERVAL_S,
+        max_samples: int = RESOURCE_MAX_SAMPLES,
+    ):
+        self.stats = stats
+        self.interval_s = interval_s
+        self.max_samples = max(2, max_samples)
+        self.series: Dict[str, List[int]] = {k: [] for k in SERIES}
+        self.peak: Dict[str, int] = {}
+        self.oom_kills = 0
+        self.source: Optional[str] = None
+        self._started = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval_s > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> Optional[Dict]:
+        """
+        샘플링 중단 + 마지막 1회 (cgroup 처럼 싼 소스일 때만) -> summary
+        """
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+        if self.source in ("cgroup", "proc"):
+            try:
+                self._record(await self.stats())
+            except Exception:
+                pass
+        return self.summary()
+
+    # ------------------------------
+    # internal
+    # ------------------------------
+    async def _loop(self) -> None:
+        while True:
+            try:
+                self._record(await self.stats())
+            except Exception as e:
+                print("[run-sampler] sample failed", e)
+            await asyncio.sleep(self.interval_s)
+
+    def _record(self, s: Optional[Dict]) -> None:
+        if not s:
+            return
+        self.source = s.get("source", self.source)
+
+        if len(self.series["t_ms"]) >= self.max_samples:
+            for k in SERIES:
+                self.series[k] = self.series[k][::2]
+            self.interval_s *= 2
+
+        s["t_ms"] = int((time.monotonic() - self._started) * 1000)
+        for k in SERIES:
+            self.series[k].append(s.get(k) or 0)
+
+        for k in ("cpu_ms", "mem_bytes", "pids", "io_read_bytes", "io_write_bytes"):
+            if s.get(k) is not None:
+                self.peak[k] = max(self.peak.get(k, 0), s[k])
+        if s.get("mem_peak_bytes"):
+            self.peak["mem_bytes"] = max(self.peak.get("mem_bytes", 0), s["mem_peak_bytes"])
+        self.oom_kills = max(self.oom_kills, s.get("oom_kills") or 0)
+
+    def summary(self) -> Optional[Dict]:
+        if not self.series["t_ms"]:
+            return None
+        return {
+            "source": self.source,
+            "interval_ms": int(self.interval_s * 1000),
+            "series": self.series,
+            # cpu_ms / io_* 는 누적값이라 peak = 합계
+            "peak": self.peak,
+            "oom_kills": self.oom_kills,
+        }
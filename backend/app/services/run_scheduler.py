@@ -0,0 +1,229 @@
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.core.settings import (
+    EXECUTOR_BACKEND,
+    HOST_CPU_BUDGET,
+    HOST_MEMORY_BUDGET_MB,
+    SCHEDULER_DEFAULT_RUN_S,
+    RUN_MAX_PARALLEL_PER_PROJECT,
+    RUN_MAX_PARALLEL_CAP,
+)
+
+
+def load_parallel_limit(project_path: Path) -> int:
+    """
+    프로젝트 동시 실행 수: 기본값 + run.json "max_parallel" (opt-in)
+    예) {"max_parallel": 2}  -> 벤치마크 / 테스트 변형을 나란히 실행
+    """
+    default = RUN_MAX_PARALLEL_PER_PROJECT
+    p = project_path / "run.json"
+    if not p.exists():
+        return default
+    try:
+        value = int(json.loads(p.read_text(encoding="utf-8")).get("max_parallel", default))
+    except Exception:
+        return default
+    return max(1, min(value, RUN_MAX_PARALLEL_CAP))
+
+
+@dataclass
+class Lease:
+    project_id: str
+    cpus: float
+    memory_mb: int
+    limit: int = 1          # 이 프로젝트 동시 실행 한도
+    started_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Ticket:
+    lease: Lease
+    future: asyncio.Future
+    changed: asyncio.Event = field(default_factory=asyncio.Event)     # 순서 / 상태 변경 알림
+
+
+# on_queue(position(1부터), eta_s)
+QueueCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+
+class RunScheduler:
+    """
+    host 전체 CPU / memory budget 기준 admission control
+    - 실행 중인 run의 RunOptions.cpus / memory_mb 합이 budget을 넘지 않게
+    - 넘치면 거절 대신 대기: 프로젝트별 queue + 프로젝트 간 round-robin (한 프로젝트가 독점 못 함)
+    - 맨 앞 차례가 자리 없으면 뒤 작은 run이 새치기하지 않음 (큰 run 굶지 않게)
+    - budget None: CPU / memory 는 안 셈 (프로젝트별 동시 실행 수 + 순서만)
+    - event loop 안에서만 사용 (lock 없음)
+    """
+    def __init__(
+        self,
+        cpu_budget: Optional[float] = HOST_CPU_BUDGET,
+        memory_budget_mb: Optional[int] = HOST_MEMORY_BUDGET_MB,
+    ):
+        self.cpu_budget = cpu_budget
+        self.memory_budget_mb = memory_budget_mb
+
+        self.used_cpus = 0.0
+        self.used_memory_mb = 0
+        self.running: Dict[str, int] = {}                   # project_id -> 실행 중 개수
+        self._queues: Dict[str, Deque[_Ticket]] = {}        # 삽입 순서 = round-robin 순서
+        self._avg_run_s = float(SCHEDULER_DEFAULT_RUN_S)    # 최근 run 시간 (EMA), ETA 계산용
+
+    # ------------------------------
+    # public
+    # ------------------------------
+    async def acquire(
+        self,
+        project_id: str,
+        cpus: float,
+        memory_mb: int,
+        limit: int = 1,
+        on_queue: Optional[QueueCallback] = None,
+    ) -> Lease:
+        # budget보다 큰 요청은 budget 전체로 (혼자서라도 돌 수 있게)
+        if self.cpu_budget is not None:
+            cpus = min(cpus, self.cpu_budget)
+        if self.memory_budget_mb is not None:
+            memory_mb = min(memory_mb, self.memory_budget_mb)
+        lease = Lease(project_id, cpus, memory_mb, max(1, limit))
+
+        if not self._queues and self._fits(lease):
+            self._grant(lease)
+            return lease
+
+        ticket = _Ticket(lease, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(project_id, deque()).append(ticket)
+        self._dispatch()
+
+        last = None
+        try:
+            while not ticket.future.done():
+                ticket.changed.clear()
+                pos = self._position(ticket)
+                report = (pos, self._eta(pos))
+                if on_queue and report != last:
+                    last = report
+                    await on_queue(*report)
+                if ticket.future.done():
+                    break
+                await ticket.changed.wait()
+        except BaseException:
+            # 대기 중 WS 끊김 등: queue에서 빼거나, 이미 배정됐으면 반납
+            if ticket.future.done():
+                self.release(lease)
+            else:
+                self._remove(ticket)
+            raise
+
+        lease.started_at = time.monotonic()
+        return lease
+
+    def release(self, lease: Lease) -> None:
+        self.used_cpus = max(0.0, self.used_cpus - lease.cpus)
+        self.used_memory_mb = max(0, self.used_memory_mb - lease.memory_mb)
+        n = self.running.get(lease.project_id, 0) - 1
+        if n > 0:
+            self.running[lease.project_id] = n
+        else:
+            self.running.pop(lease.project_id, None)
+
+        took = time.monotonic() - lease.started_at
+        self._avg_run_s = 0.8 * self._avg_run_s + 0.2 * took
+        self._dispatch()
+
+    def snapshot(self) -> Dict:
+        return {
+            "cpu": {"used": round(self.used_cpus, 3), "budget": self.cpu_budget},
+            "memory_mb": {"used": self.used_memory_mb, "budget": self.memory_budget_mb},
+            "running": sum(self.running.values()),
+            "queued": sum(len(q) for q in self._queues.values()),
+        }
+
+    # ------------------------------
+    # internal
+    # ------------------------------
+    def _fits(self, lease: Lease) -> bool:
+        if self.running.get(lease.project_id, 0) >= lease.limit:
+            return False
+        if self.cpu_budget is not None and self.used_cpus + lease.cpus > self.cpu_budget + 1e-9:
+            return False
+        if self.memory_budget_mb is not None and self.used_memory_mb + lease.memory_mb > self.memory_budget_mb:
+            return False
+        return True
+
+    def _grant(self, lease: Lease) -> None:
+        self.used_cpus += lease.cpus
+        self.used_memory_mb += lease.memory_mb
+        self.running[lease.project_id] = self.running.get(lease.project_id, 0) + 1
+
+    def _order(self) -> List[_Ticket]:
+        """
+        지금 상태 그대로면 배정될 순서 (프로젝트 간 round-robin)
+        """
+        queues = [list(q) for q in self._queues.values()]
+        out: List[_Ticket] = []
+        depth = 0
+        while True:
+            row = [q[depth] for q in queues if depth < len(q)]
+            if not row:
+                return out
+            out += row
+            depth += 1
+
+    def _dispatch(self) -> None:
+        while self._queues:
+            # 프로젝트별 한도에 걸린 프로젝트는 건너뛰고, 나머지 중 round-robin 맨 앞
+            head = next(
+                (pid for pid, q in self._queues.items() if self.running.get(pid, 0) < q[0].lease.limit),
+                None,
+            )
+            if head is None:
+                break
+            ticket = self._queues[head][0]
+            if not self._fits(ticket.lease):
+                break
+
+            self._queues[head].popleft()
+            # 받은 프로젝트는 round-robin 맨 뒤로
+            rest = self._queues.pop(head)
+            if rest:
+                self._queues[head] = rest
+
+            self._grant(ticket.lease)
+            if not ticket.future.done():
+                ticket.future.set_result(None)
+            ticket.changed.set()
+
+        for q in self._queues.values():
+            for t in q:
+                t.changed.set()
+
+    def _remove(self, ticket: _Ticket) -> None:
+        q = self._queues.get(ticket.lease.project_id)
+        if q is not None and ticket in q:
+            q.remove(ticket)
+            if not q:
+                del self._queues[ticket.lease.project_id]
+        self._dispatch()
+
+    def _position(self, ticket: _Ticket) -> int:
+        order = self._order()
+        return order.index(ticket) + 1 if ticket in order else 0
+
+    def _eta(self, position: int) -> Optional[int]:
+        # 앞 사람 수 / 동시 실행 수 만큼 평균 run 시간이 지나야 차례
+        slots = max(1, sum(self.running.values()))
+        return math.ceil(math.ceil(position / slots) * self._avg_run_s)
+
+
+# 싱글톤(프로세스 내 1개)
+# remote: run 은 worker 에서 돎 -> 이 host 의 budget 으로 막으면 cluster 전체가 API 1대 크기로 묶임
+# (worker slot 배정 / 대기는 broker 가 함, 여기서는 프로젝트별 한도 + 프로젝트 간 순서만)
+run_scheduler = RunScheduler(None, None) if EXECUTOR_BACKEND == "remote" else RunScheduler()
@@ -0,0 +1,173 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.core.run_options import RunOptions
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id            TEXT PRIMARY KEY,
+    project_id        TEXT NOT NULL,
+    container_name    TEXT,
+    pid               INTEGER,
+    owner             TEXT NOT NULL,            -- run 을 supervise 하는 API 프로세스 (host:pid)
+    supervised        INTEGER NOT NULL DEFAULT 0,
+    started_at        REAL NOT NULL,
+    stop_requested_at REAL                      -- time.time() (프로세스 간 비교 가능해야 함)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_project ON runs(project_id);
+CREATE INDEX IF NOT EXISTS idx_runs_owner_stop ON runs(owner, stop_requested_at);
+CREATE TABLE IF NOT EXISTS options (
+    project_id TEXT PRIMARY KEY,
+    data       TEXT NOT NULL
+);
+"""
+
+
+def process_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def owner_dead(owner: str) -> bool:
+    """
+    process_owner() 값의 프로세스가 이 host 에서 이미 죽었는지 (다른 host 는 알 수 없음 -> False)
+    """
+    host, _, pid = owner.rpartition(":")
+    return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+
+class SqliteRunStateStore:
+    """
+    API worker 프로세스 사이에 공유하는 run 상태 (WAL SQLite)
+    - runs: 실행 중 run (끝나면 row 삭제) + stop 요청 시각
+    - options: 프로젝트별 RunOptions (JSON)
+    - 프로젝트당 동시 실행 수는 insert 때 BEGIN IMMEDIATE 안에서 확인 (worker 끼리 race 없음)
+    - connection은 thread 별 1개
+    """
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # fork 로 넘어온 connection 은 재사용하면 안 됨
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ------------------------------
+    # runs
+    # ------------------------------
+    def insert(self, run_id: str, project_id: str, container_name: str, pid: int, owner: str, supervised: bool, limit: Optional[int] = None) -> bool:
+        """
+        return: False = 같은 run_id 가 이미 있음 / 프로젝트 동시 실행 수 limit 도달
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+                conn.execute("ROLLBACK")
+                return False
+            if limit is not None:
+                (n,) = conn.execute("SELECT COUNT(*) FROM runs WHERE project_id = ?", (project_id,)).fetchone()
+                if n >= limit:
+                    # 죽은 worker 프로세스의 row 가 자리를 잡고 있을 수 있음
+                    n -= self._reap_dead(conn, project_id)
+                if n >= limit:
+                    conn.execute("ROLLBACK")
+                    return False
+            conn.execute(
+                "INSERT INTO runs (run_id, project_id, container_name, pid, owner, supervised, started_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, project_id, container_name, pid, owner, int(supervised), time.time()),
+            )
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set_container(self, run_id: str, container_name: str) -> None:
+        self._conn().execute("UPDATE runs SET container_name = ? WHERE run_id = ?", (container_name, run_id))
+
+    def request_stop(self, run_id: str) -> None:
+        # 첫 요청 시각만 남김 (stop latency 기준)
+        self._conn().execute(
+            "UPDATE runs SET stop_requested_at = COALESCE(stop_requested_at, ?) WHERE run_id = ?",
+            (time.time(), run_id),
+        )
+
+    def delete(self, run_id: str) -> None:
+        self._conn().execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def get(self, run_id: str) -> Optional[sqlite3.Row]:
+        return self._conn().execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+
+    def of_project(self, project_id: str) -> List[sqlite3.Row]:
+        return self._conn().execute("SELECT * FROM runs WHERE project_id = ?", (project_id,)).fetchall()
+
+    def stop_requests(self, owner: str) -> List[Tuple[str, float]]:
+        """
+        owner 프로세스의 run 중 stop 요청이 들어온 것 (run_id, time.time())
+        """
+        rows = self._conn().execute(
+            "SELECT run_id, stop_requested_at FROM runs WHERE owner = ? AND stop_requested_at IS NOT NULL",
+            (owner,),
+        ).fetchall()
+        return [(r["run_id"], r["stop_requested_at"]) for r in rows]
+
+    def reap(self) -> int:
+        """
+        같은 host 에서 이미 죽은 프로세스가 남긴 row 정리 (worker crash / 재시작)
+        - 시작 시 1번 + insert 가 limit 에 걸릴 때 그 프로젝트만 (살아 있는 worker 가 바로 자리를 회수)
+        return: 삭제한 row 수
+        """
+        return self._reap_dead(self._conn())
+
+    @staticmethod
+    def _reap_dead(conn: sqlite3.Connection, project_id: Optional[str] = None) -> int:
+        if project_id is None:
+            rows = conn.execute("SELECT run_id, owner FROM runs").fetchall()
+        else:
+            rows = conn.execute("SELECT run_id, owner FROM runs WHERE project_id = ?", (project_id,)).fetchall()
+        dead = [(r["run_id"],) for r in rows if owner_dead(r["owner"])]
+        conn.executemany("DELETE FROM runs WHERE run_id = ?", dead)
+        return len(dead)
+
+    # ------------------------------
+    # options
+    # ------------------------------
+    def set_options(self, project_id: str, opts: RunOptions) -> None:
+        self._conn().execute(
+            "INSERT INTO options (project_id, data) VALUES (?, ?) ON CONFLICT(project_id) DO UPDATE SET data = excluded.data",
+            (project_id, json.dumps(asdict(opts))),
+        )
+
+    def get_options(self, project_id: str) -> Optional[RunOptions]:
+        row = self._conn().execute("SELECT data FROM options WHERE project_id = ?", (project_id,)).fetchone()
+        if row is None:
+            return None
+        return RunOptions(**json.loads(row["data"]))
@@ -0,0 +1,276 @@
+import asyncio
+import codecs
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.settings import OUTPUT_MAX_LINE_BYTES, STOP_SIGNAL, STOP_GRACE_S
+from app.services.executor import PrepareError, RunJob, get_executor
+from app.services.run_cache import OutputRecorder, replay, run_cache
+from app.services.run_detect import detect_run_spec
+from app.services.run_manager import run_manager
+from app.services.run_sampler import ResourceSampler
+from app.services.run_service import RunResult, _classify_exit
+
+
+# kill 이후 남은 출력을 읽어들이는 최대 대기
+KILL_DRAIN_S = 2.0
+
+
+class LineSplitter:
+    """
+    bytes chunk -> 줄 단위 str (UTF-8 경계는 incremental decoder로 보정)
+    개행 없이 max_line_bytes 를 넘으면 그 크기로 끊어서 내보냄
+    """
+    def __init__(self, max_line_bytes: int = OUTPUT_MAX_LINE_BYTES):
+        self.max_line_bytes = max_line_bytes
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._pending += self._decoder.decode(chunk)
+        out = []
+        while True:
+            i = self._pending.find("\n")
+            if i < 0:
+                break
+            out.append(self._pending[: i + 1])
+            self._pending = self._pending[i + 1:]
+        while len(self._pending.encode("utf-8")) > self.max_line_bytes:
+            cut = self._pending.encode("utf-8")[: self.max_line_bytes].decode("utf-8", errors="ignore")
+            out.append(cut)
+            self._pending = self._pending[len(cut):]
+        return out
+
+    def flush(self) -> List[str]:
+        self._pending += self._decoder.decode(b"", final=True)
+        out = [self._pending] if self._pending else []
+        self._pending = ""
+        return out
+
+
+async def _terminate(handle, pump_task: asyncio.Task, graceful: bool) -> None:
+    """
+    STOP_SIGNAL -> STOP_GRACE_S 안에 출력이 닫히면(=종료) 끝, 아니면 SIGKILL
+    pool 컨테이너는 exec 프로세스에 signal이 안 가므로 바로 SIGKILL
+    """
+    if graceful and STOP_GRACE_S > 0 and STOP_SIGNAL != "SIGKILL":
+        await handle.kill(STOP_SIGNAL)
+        try:
+            await asyncio.wait_for(asyncio.shield(pump_task), STOP_GRACE_S)
+            return
+        except asyncio.TimeoutError:
+            pass
+        except Exception:
+            return
+
+    await handle.kill("SIGKILL")
+
+    # kill 직전까지 나온 출력은 마저 받음
+    try:
+        await asyncio.wait_for(pump_task, KILL_DRAIN_S)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _replay_cached(key: str, entry: Dict, on_line: Callable[[str], None], on_notice: Callable[[str], None], stop_event: asyncio.Event) -> RunResult:
+    """
+    캐시 hit: 컨테이너 없이 저장된 출력 재생
+    """
+    start = time.time()
+    on_notice(f"[CACHE] hit {key[:12]} (run {entry['run_id']})\n")
+    stopped = await replay(entry, on_line, stop_event)
+    duration_ms = int((time.time() - start) * 1000)
+
+    if stopped:
+        on_notice("\n[STOP] requested\n")
+        status, reason, sig = _classify_exit(None, timed_out=False, stopped=True)
+        exit_code = None
+    else:
+        res = entry["result"]
+        status, reason, sig, exit_code = res["status"], res["reason"], res["signal"], res["exit_code"]
+
+    return RunResult(
+        status=status,
+        exit_code=exit_code,
+        signal=sig,
+        reason=reason,
+        duration_ms=duration_ms,
+        stopped=stopped,
+        cached_from=entry["run_id"],
+    )
+
+
+def _cacheable(res: RunResult) -> bool:
+    # 정상 종료 / 일반 에러 exit 만 (stop / timeout / OOM / signal 은 재현 대상 아님)
+    return res.status in ("success", "error") and res.exit_code is not None and res.signal is None
+
+
+async def supervise_run(
+    project_id: str,
+    run_id: str,
+    project_path: Path,
+    container_name: str,
+    on_line: Callable[[str], None],
+    stop_event: asyncio.Event,
+    cache: Optional[Tuple[str, Optional[Dict]]] = None,
+    on_notice: Optional[Callable[[str], None]] = None,
+) -> RunResult:
+    """
+    event loop 위에서 run 1개 감독 (thread 없음)
+    - 출력은 chunk 단위로 읽어서 on_line (줄 단위)
+    - timeout 은 출력과 무관하게 독립 타이머, stop 은 stop_event 로 즉시 깨어남
+    - cache: run_cache.probe 결과 (key, entry) - entry 있으면 재생, 없으면 실행 후 저장
+    - on_notice: supervisor / 준비 단계 메시지 ([LANG], [DEPS], [SYNC], [STOP], [TIMEOUT] ...)
+      프로그램 출력이 아니므로 output budget 밖으로 보냄 (없으면 on_line)
+    """
+    on_notice = on_notice or on_line
+    if cache is not None and cache[1] is not None:
+        return await _replay_cached(cache[0], cache[1], on_line, on_notice, stop_event)
+
+    opts = run_manager.get_options(project_id)
+    spec = detect_run_spec(project_path, lang_override=opts.lang)
+
+    # (선택) 헤더 로그
+    on_notice(f"[LANG] {spec.lang}\n")
+    on_notice(f"[ENTRY] {spec.entry}\n")
+
+    executor = get_executor()
+    job = RunJob(project_id, run_id, project_path, container_name, spec, opts)
+    # 준비 단계 (의존성 install / worker 대기 / sync) 도 stop 으로 바로 중단
+    prepare_task = asyncio.create_task(executor.prepare(job, on_notice))
+    stop_wait = asyncio.create_task(stop_event.wait())
+    try:
+        await asyncio.wait({prepare_task, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop_wait.cancel()
+        if not prepare_task.done():
+            prepare_task.cancel()
+            await asyncio.gather(prepare_task, return_exceptions=True)
+
+    if prepare_task.cancelled():
+        stop_at = run_manager.get_state(run_id).stop_requested_at or time.monotonic()
+        on_notice("\n[STOP] requested\n")
+        status, reason, sig = _classify_exit(None, timed_out=False, stopped=True)
+        return RunResult(
+            status=status,
+            exit_code=None,
+            signal=sig,
+            reason=reason,
+            duration_ms=0,
+            stopped=True,
+            stop_latency_ms=int((time.monotonic() - stop_at) * 1000),
+        )
+    try:
+        prepared = prepare_task.result()
+    except PrepareError as e:
+        return RunResult(
+            status="error",
+            exit_code=None,
+            signal=None,
+            reason=str(e),
+            duration_ms=0,
+        )
+
+    start = time.time()
+    timeout_s = opts.timeout_s
+
+    timed_out = False
+    stopped = False
+    stop_at = None
+
+    handle = await executor.start(job, prepared)
+    lines = LineSplitter()
+
+    # 캐시 저장용 기록은 프로그램 출력만, 시작 시점부터 (install / sync 시간, [DEPS] / [SYNC] 같은 notice 는 재생 안 함)
+    recorder = None
+    if cache is not None:
+        recorder = OutputRecorder()
+        on_line = recorder.wrap(on_line)
+
+    # CPU / memory / pids / I/O 주기 샘플링
+    sampler = ResourceSampler(handle.stats)
+    sampler.start()
+
+    async def pump():
+        async for chunk in handle.chunks():
+            for line in lines.feed(chunk):
+                on_line(line)
+        for line in lines.flush():
+            on_line(line)
+
+    pump_task = asyncio.create_task(pump())
+    stop_task = asyncio.create_task(stop_event.wait())
+    try:
+        done, _ = await asyncio.wait(
+            {pump_task, stop_task},
+            timeout=timeout_s or None,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+
+        if pump_task not in done:
+            if stop_task in done:
+                stopped = True
+                stop_at = run_manager.get_state(run_id).stop_requested_at or time.monotonic()
+                on_notice("\n[STOP] requested\n")
+            else:
+                timed_out = True
+                on_notice(f"\n[TIMEOUT] exceeded {timeout_s}s\n")
+            await _terminate(handle, pump_task, graceful=handle.graceful)
+        else:
+            pump_task.result()      # 읽기 중 예외가 있으면 여기서 올라감
+    except BaseException:
+        # WS 쪽 cancel / 예외: 컨테이너가 남지 않게
+        await asyncio.shield(handle.kill())
+        raise
+    finally:
+        stop_task.cancel()
+        if not pump_task.done():
+            pump_task.cancel()
+        # wait 가 컨테이너 / cgroup 을 정리하므로 마지막 샘플은 wait 전에
+        resources = await asyncio.shield(sampler.stop())
+        exit_code = await asyncio.shield(handle.wait())
+        stop_latency_ms = int((time.monotonic() - stop_at) * 1000) if stop_at is not None else None
+
+    duration_ms = int((time.time() - start) * 1000)
+
+    # OOM: 컨테이너 State.OOMKilled, 또는 cgroup memory.events oom_kill (pool exec / local)
+    oom_killed = handle.oom_killed
+    if resources and resources["oom_kills"]:
+        oom_killed = True
+    elif oom_killed is None and resources and resources["source"] == "cgroup":
+        oom_killed = False
+
+    status, reason, sig = _classify_exit(exit_code, timed_out=timed_out, stopped=stopped, oom_killed=oom_killed)
+
+    res = RunResult(
+        status=status,
+        exit_code=exit_code,
+        signal=sig,
+        reason=reason,
+        duration_ms=duration_ms,
+        stopped=stopped,
+        timed_out=timed_out,
+        stop_latency_ms=stop_latency_ms,
+        resources=resources,
+    )
+
+    if recorder is not None and not recorder.overflow and _cacheable(res):
+        entry = {
+            "run_id": run_id,
+            "created_at": int(time.time()),
+            "events": recorder.events,
+            "result": {
+                "status": status,
+                "exit_code": exit_code,
+                "signal": sig,
+                "reason": reason,
+                "duration_ms": duration_ms,
+            },
+        }
+        try:
+            await asyncio.to_thread(run_cache.put, project_path, cache[0], entry)
+        except OSError as e:
+            print("[run-cache] put failed", run_id, e)
+
+    return res
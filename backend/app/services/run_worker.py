@@ -0,0 +1,283 @@
+# run worker daemon: broker 에서 run job 을 받아 실행하고 출력 frame 을 돌려보냄
+# 실행: cd backend && python -m app.services.run_worker --broker tcp://api-host:7070 [--slots 4] [--executor docker]
+import argparse
+import asyncio
+import base64
+import os
+import shutil
+import socket
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import PROJECTS_DIR
+from app.core.run_options import RunOptions
+from app.core.settings import (
+    RUN_BROKER_LOCAL_WORKERS,
+    RUN_BROKER_TOKEN,
+    WORKER_DATA_DIR,
+    WORKER_EXECUTOR,
+    WORKER_PROJECTS_DIR,
+    WORKER_SLOTS,
+    WORKSPACE_SYNC_TIMEOUT_S,
+)
+from app.services.container_backend import cleanup_orphan_runs
+from app.services.container_pool import container_pool
+from app.services.executor import PrepareError, RunHandle, RunJob, get_executor
+from app.services.run_broker import Broker, Conn
+from app.services.run_detect import RunSpec
+from app.services.workspace_sync import BlobCache
+
+
+# N 번째 job 마다 blob cache 크기 점검
+BLOB_PRUNE_EVERY = 50
+
+
+class Worker:
+    """
+    broker 연결 1개 + slot 수 만큼 동시 실행
+    - job: executor.prepare (의존성 설치 출력은 line frame) -> start -> chunk frame -> exit
+    - kill / stats 요청은 job_id 로 해당 handle 에 전달
+    - 프로젝트 파일: job 에 manifest 가 있으면 delta sync (blob cache -> run 별 workspace),
+      없으면 projects_dir/<project_id> (공유 filesystem)
+    """
+    def __init__(self, url: str, slots: int = WORKER_SLOTS, executor: str = WORKER_EXECUTOR, projects_dir: Optional[Path] = None):
+        if executor == "remote":
+            raise ValueError("worker executor cannot be remote")
+        self.url = url
+        self.slots = max(1, slots)
+        self.executor = get_executor(executor)
+        self.projects_dir = projects_dir or Path(WORKER_PROJECTS_DIR or PROJECTS_DIR)
+        self.worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+        self.handles: Dict[str, RunHandle] = {}
+        self._killed: Dict[str, str] = {}       # start 전에 온 kill
+        self._preparing: Dict[str, asyncio.Task] = {}     # sync / prepare 중인 job (kill 오면 cancel)
+        self._tasks: List[asyncio.Task] = []
+        self._inbox: Dict[str, asyncio.Queue] = {}      # job_id -> blob frame (workspace sync 중)
+        self._jobs_done = 0
+        self.conn: Optional[Conn] = None
+
+        # workspace sync: blob cache 는 worker 끼리 공유해도 됨, workspace 는 run 별
+        data_dir = Path(WORKER_DATA_DIR)
+        self.blobs = BlobCache(data_dir / "blobs")
+        self.workspaces = data_dir / "workspaces"
+        self.workspaces.mkdir(parents=True, exist_ok=True)
+
+    async def run(self) -> None:
+        self.conn = await Conn.open(self.url)
+        await self.conn.send({"type": "hello", "role": "worker", "worker_id": self.worker_id, "slots": self.slots, "token": RUN_BROKER_TOKEN})
+        try:
+            while True:
+                m = await self.conn.recv()
+                if m is None:
+                    break
+                kind, job_id = m.get("type"), m.get("job_id")
+                if kind == "job":
+                    self._tasks = [t for t in self._tasks if not t.done()]
+                    self._tasks.append(asyncio.create_task(self._run_job(m)))
+                elif kind == "kill":
+                    h = self.handles.get(job_id)
+                    if h is not None:
+                        await h.kill(m.get("signal") or "SIGKILL")
+                    elif job_id in self._preparing:
+                        # workspace sync / 의존성 설치 중: 끝날 때까지 기다리지 않고 중단
+                        self._preparing[job_id].cancel()
+                    else:
+                        self._killed[job_id] = m.get("signal") or "SIGKILL"
+                elif kind in ("blob", "blobs_done"):
+                    inbox = self._inbox.get(job_id)
+                    if inbox is not None:
+                        inbox.put_nowait(m)
+                elif kind == "stats":
+                    # Engine API stats 는 느릴 수 있음 -> kill 등 다른 frame 을 막지 않게 task
+                    self._tasks.append(asyncio.create_task(self._stats(job_id)))
+                elif kind == "exit" and job_id is None:
+                    # broker 가 hello 를 거절 (RUN_BROKER_TOKEN 불일치)
+                    print(f"[run-worker] {m.get('error')}")
+        finally:
+            # broker 가 사라지면 실행 중인 run 정리
+            for h in list(self.handles.values()):
+                await h.kill("SIGKILL")
+            self.conn.close()
+
+    async def _stats(self, job_id: str) -> None:
+        h = self.handles.get(job_id)
+        try:
+            data = await h.stats() if h is not None else None
+        except Exception:
+            data = None
+        try:
+            await self.conn.send({"type": "stats", "job_id": job_id, "data": data})
+        except ConnectionError:
+            pass
+
+    async def _sync(self, job_id: str, manifest: Dict[str, str], on_line) -> Path:
+        """
+        manifest 중 blob cache 에 없는 것만 요청 -> run 전용 workspace (hardlink)
+        안 바뀐 rerun 은 need([]) 1번으로 끝
+        """
+        # missing 확인 ~ materialize 사이에 다른 job 의 prune 이 지우지 않게
+        self.blobs.pin(manifest.values())
+        inbox = self._inbox[job_id] = asyncio.Queue()
+        try:
+            missing = await asyncio.to_thread(self.blobs.missing, manifest.values())
+            await self.conn.send({"type": "need", "job_id": job_id, "hashes": missing})
+            received = 0
+            while missing:
+                f = await asyncio.wait_for(inbox.get(), WORKSPACE_SYNC_TIMEOUT_S)
+                if f["type"] == "blobs_done":
+                    break
+                data = base64.b64decode(f["data"])
+                received += len(data)
+                await asyncio.to_thread(self.blobs.write_part, f["hash"], f["offset"], data, f["last"], job_id)
+
+            left = await asyncio.to_thread(self.blobs.missing, manifest.values())
+            if left:
+                raise ValueError(f"{len(left)} blobs not received")
+            on_line(f"[SYNC] {len(manifest)} files, {len(missing)} transferred ({received} bytes)\n")
+
+            dest = self.workspaces / job_id
+            await asyncio.to_thread(self.blobs.materialize, manifest, dest)
+        finally:
+            self._inbox.pop(job_id, None)
+            self.blobs.unpin(manifest.values())
+            await asyncio.to_thread(self.blobs.discard_parts, job_id)
+
+        self._jobs_done += 1
+        if self._jobs_done % BLOB_PRUNE_EVERY == 0:
+            await asyncio.to_thread(self.blobs.prune)
+        return dest
+
+    async def _run_job(self, m: Dict) -> None:
+        conn = self.conn
+        job_id = m["job_id"]
+
+        def on_line(line: str) -> None:
+            conn.send_nowait({"type": "line", "job_id": job_id, "data": line})
+
+        workspace = None
+        self._preparing[job_id] = asyncio.current_task()
+        try:
+            project_path = self.projects_dir / m["project_id"]
+            if m.get("manifest") is not None:
+                try:
+                    workspace = project_path = await self._sync(job_id, m["manifest"], on_line)
+                except (ValueError, OSError, asyncio.TimeoutError) as e:
+                    await conn.send({"type": "exit", "job_id": job_id, "code": None, "prepare_error": f"workspace sync failed: {e}"})
+                    return
+
+            job = RunJob(
+                project_id=m["project_id"],
+                run_id=m["run_id"],
+                project_path=project_path,
+                container_name=m["container_name"],
+                spec=RunSpec(**m["spec"]),
+                opts=RunOptions(**m["opts"]),
+            )
+            await self._execute(job_id, job, on_line)
+        except asyncio.CancelledError:
+            # kill 로 sync / prepare 중단 -> broker 가 slot 을 회수하도록 exit
+            try:
+                await conn.send({"type": "exit", "job_id": job_id, "code": None, "error": "cancelled before start"})
+            except ConnectionError:
+                pass
+        finally:
+            self._preparing.pop(job_id, None)
+            if workspace is not None:
+                await asyncio.to_thread(shutil.rmtree, workspace, True)
+
+    async def _execute(self, job_id: str, job: RunJob, on_line) -> None:
+        conn = self.conn
+        try:
+            prepared = await self.executor.prepare(job, on_line)
+            self._preparing.pop(job_id, None)   # 이후 kill 은 handle / _killed 로
+        except PrepareError as e:
+            await conn.send({"type": "exit", "job_id": job_id, "code": None, "prepare_error": str(e)})
+            return
+        except Exception as e:
+            await conn.send({"type": "exit", "job_id": job_id, "code": None, "error": str(e)})
+            return
+
+        if job_id in self._killed:
+            await conn.send({"type": "exit", "job_id": job_id, "code": None, "error": "cancelled before start"})
+            self._killed.pop(job_id, None)
+            return
+
+        try:
+            handle = await self.executor.start(job, prepared)
+        except Exception as e:
+            await conn.send({"type": "exit", "job_id": job_id, "code": None, "error": str(e)})
+            return
+
+        self.handles[job_id] = handle
+        if job_id in self._killed:
+            # start 도중에 온 kill
+            await handle.kill(self._killed.pop(job_id))
+        await conn.send({
+            "type": "started",
+            "job_id": job_id,
+            "worker_id": self.worker_id,
+            "container": handle.container,
+            "graceful": handle.graceful,
+        })
+        try:
+            async for chunk in handle.chunks():
+                await conn.send({"type": "chunk", "job_id": job_id, "data": base64.b64encode(chunk).decode("ascii")})
+        finally:
+            self.handles.pop(job_id, None)
+            code = await asyncio.shield(handle.wait())
+            try:
+                await conn.send({"type": "exit", "job_id": job_id, "code": code, "oom_killed": handle.oom_killed})
+            except ConnectionError:
+                pass
+
+
+# ==================================================
+# built-in stand-in: 별도 broker / worker 프로세스 없이 (테스트 / 단일 호스트)
+# ==================================================
+_local_url: Optional[str] = None
+_local_lock: Optional[asyncio.Lock] = None
+_local_refs: List[object] = []      # broker / worker task (GC 방지)
+
+
+async def ensure_local_broker(workers: int = RUN_BROKER_LOCAL_WORKERS) -> str:
+    """
+    현재 event loop 안에 unix socket broker + worker N개 (1회)
+    return: broker url
+    """
+    global _local_url, _local_lock
+    if _local_lock is None:
+        _local_lock = asyncio.Lock()
+    async with _local_lock:
+        if _local_url is None:
+            path = os.path.join(tempfile.mkdtemp(prefix="freeweb_broker_"), "broker.sock")
+            url = f"unix://{path}"
+            broker = Broker()
+            await broker.start(url)
+            _local_refs.append(broker)
+            for _ in range(max(1, workers)):
+                _local_refs.append(asyncio.create_task(Worker(url).run()))
+            _local_url = url
+    return _local_url
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="freeweb run worker")
+    ap.add_argument("--broker", required=True, help="tcp://host:port | unix:///path.sock")
+    ap.add_argument("--slots", type=int, default=WORKER_SLOTS)
+    ap.add_argument("--executor", default=WORKER_EXECUTOR, help="docker | local")
+    ap.add_argument("--projects-dir", default=None)
+    args = ap.parse_args()
+
+    w = Worker(args.broker, args.slots, args.executor, Path(args.projects_dir) if args.projects_dir else None)
+    if args.executor == "docker":
+        # 이 host 에서 죽은 worker 가 남긴 컨테이너 정리
+        container_pool.cleanup_orphans()
+        cleanup_orphan_runs()
+    print(f"[run-worker] {w.worker_id} -> {args.broker} (slots={w.slots}, executor={args.executor})")
+    asyncio.run(w.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.settings import WORKER_BLOB_CACHE_MB
+from app.runtime.fs import _hash_file
+from app.services.file_service import is_hidden_path
+
+
+# blob frame 1개에 담는 원본 크기 (base64 후에도 BROKER_FRAME_LIMIT 안쪽)
+BLOB_PART_BYTES = 1024 * 1024
+
+
+# ==================================================
+# API 쪽: 프로젝트별 manifest (rel path -> "sha256:<hex>")
+# ==================================================
+class WorkspaceManifests:
+    """
+    프로젝트 파일 manifest (is_hidden_path 제외: node_modules / __pycache__ 등은 worker 가 따로 준비)
+    - 파일 hash 는 (size, mtime) 가 같으면 재사용 -> 안 바뀐 rerun 은 stat 만
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Tuple[int, int, str]]] = {}   # project path -> rel -> (size, mtime_ns, hash)
+
+    def manifest(self, project_path: Path) -> Dict[str, str]:
+        key = str(project_path)
+        with self._lock:
+            prev = dict(self._files.get(key, {}))
+
+        cur: Dict[str, Tuple[int, int, str]] = {}
+        for root, dirs, files in os.walk(project_path):
+            dirs[:] = [d for d in dirs if not is_hidden_path(Path(root) / d)]
+            for name in files:
+                p = Path(root) / name
+                if is_hidden_path(p) or not p.is_file():
+                    continue
+                rel = p.relative_to(project_path).as_posix()
+                st = p.stat()
+                old = prev.get(rel)
+                if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                    cur[rel] = old
+                else:
+                    cur[rel] = (st.st_size, st.st_mtime_ns, _hash_file(p))
+
+        with self._lock:
+            self._files[key] = cur
+        return {rel: v[2] for rel, v in cur.items()}
+
+
+# 싱글톤(프로세스 내 1개)
+workspace_manifests = WorkspaceManifests()
+
+
+# ==================================================
+# worker 쪽: hash 로 주소 지정되는 blob cache + run 별 workspace
+# ==================================================
+def _safe_rel(rel: str) -> bool:
+    p = PurePosixPath(rel)
+    return bool(rel) and not p.is_absolute() and ".." not in p.parts
+
+
+class BlobCache:
+    """
+    <root>/<hex[:2]>/<hex> = 파일 내용 (sha256 검증 후 저장)
+    - workspace 는 blob 을 hardlink (같은 filesystem) -> run 마다 복사 비용 없음
+      (docker 는 /app:ro 로, local executor 는 tmp 로 다시 복사해서 쓰므로 blob 이 안 바뀜)
+    - 전체 크기가 max_bytes 를 넘으면 오래 안 쓰인 blob 부터 삭제 (sync 중인 manifest 의 blob 은 pin 으로 제외)
+    - 받는 중인 blob 은 job 별 임시 파일 (<hex>.<tag>.part) -> 같은 blob 을 동시에 받아도 안 섞임
+    """
+    def __init__(self, root: Path, max_bytes: int = WORKER_BLOB_CACHE_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pins: Dict[str, int] = {}     # hex -> 사용 중인 sync 수
+
+    def _path(self, h: str) -> Path:
+        hexd = h.split(":", 1)[-1]
+        if len(hexd) != 64 or not all(c in "0123456789abcdef" for c in hexd):
+            raise ValueError(f"invalid blob hash: {h}")
+        return self.root / hexd[:2] / hexd
+
+    def pin(self, hashes: Iterable[str]) -> None:
+        with self._lock:
+            for h in set(hashes):
+                hexd = self._path(h).name
+                self._pins[hexd] = self._pins.get(hexd, 0) + 1
+
+    def unpin(self, hashes: Iterable[str]) -> None:
+        with self._lock:
+            for h in set(hashes):
+                hexd = self._path(h).name
+                n = self._pins.get(hexd, 0) - 1
+                if n > 0:
+                    self._pins[hexd] = n
+                else:
+                    self._pins.pop(hexd, None)
+
+    def missing(self, hashes: Iterable[str]) -> List[str]:
+        return sorted({h for h in hashes if not self._path(h).exists()})
+
+    def write_part(self, h: str, offset: int, data: bytes, last: bool, tag: str = "") -> None:
+        """
+        tag: 받는 쪽 식별자 (job_id) - 임시 파일 이름에 들어감
+        """
+        dest = self._path(h)
+        tmp = dest.with_name(f"{dest.name}.{tag}.part" if tag else f"{dest.name}.part")
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.write(data)
+        if last:
+            digest = "sha256:" + hashlib.sha256(tmp.read_bytes()).hexdigest()
+            if digest != "sha256:" + dest.name:
+                tmp.unlink(missing_ok=True)
+                raise ValueError(f"blob hash mismatch (file changed during sync?): {h}")
+            os.replace(tmp, dest)      # 다른 job 이 먼저 받았어도 내용이 같음
+
+    def discard_parts(self, tag: str) -> None:
+        # sync 실패 / 중단 시 남은 임시 파일
+        for p in self.root.glob(f"*/*.{tag}.part"):
+            p.unlink(missing_ok=True)
+
+    def materialize(self, manifest: Dict[str, str], dest: Path) -> None:
+        dest.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        for rel, h in manifest.items():
+            if not _safe_rel(rel):
+                raise ValueError(f"invalid path in manifest: {rel}")
+            src = self._path(h)
+            target = dest / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src, target)
+            except OSError:
+                shutil.copyfile(src, target)
+            os.utime(src, (now, src.stat().st_mtime))     # atime = 최근 사용 (prune 기준)
+
+    def prune(self) -> int:
+        """
+        return: 삭제한 blob 수
+        """
+        with self._lock:
+            pinned = set(self._pins)
+        blobs = []
+        total = 0
+        for p in self.root.glob("*/*"):
+            if p.name.endswith(".part"):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            total += st.st_size
+            if p.name not in pinned:
+                blobs.append((st.st_atime, st.st_size, p))
+        removed = 0
+        for _, size, p in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
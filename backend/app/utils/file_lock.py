@@ -0,0 +1,22 @@
+import contextlib
+import fcntl
+import os
+from pathlib import Path
+from typing import Iterator
+
+
+@contextlib.contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """
+    같은 host 의 다른 프로세스 (uvicorn worker) 와 파일 단위 lock (flock)
+    - shared: 읽기끼리는 동시에, 쓰기(exclusive)와는 배타
+    - 프로세스가 죽으면 kernel 이 풀어줌
+    - blocking 이라 event loop 에서는 to_thread 안에서만
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)    # lock 도 같이 풀림
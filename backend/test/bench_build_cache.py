@@ -0,0 +1,96 @@
+# backend/test/bench_build_cache.py
+# 모듈 여러 개짜리 프로젝트의 시작 시간: bytecode cache 없음 vs 있음 (PYTHONPYCACHEPREFIX)
+# 실행: cd backend && python -m test.bench_build_cache [--modules 300] [--runs 5] [--docker]
+#  - 기본: host python 으로 (/app:ro 처럼 __pycache__ 를 못 쓰는 상태를 PYTHONDONTWRITEBYTECODE 로 흉내)
+#  - --docker: 실제 run 과 같은 docker_fs_secu flag 로 python:3.11-slim 컨테이너 실행
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.services.docker_runner import docker_fs_secu
+
+
+def make_project(root: Path, modules: int, funcs: int) -> None:
+    pkg = root / "pkg"
+    pkg.mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    for i in range(modules):
+        body = [f"CONST_{i} = {i}\n"]
+        for j in range(funcs):
+            body.append(
+                f"def f{j}(x, y={j}):\n"
+                f"    total = 0\n"
+                f"    for k in range(x):\n"
+                f"        total += (k * y) % {j + 7}\n"
+                f"    return total\n\n"
+            )
+        (pkg / f"m{i}.py").write_text("".join(body))
+    imports = "".join(f"import pkg.m{i}\n" for i in range(modules))
+    (root / "main.py").write_text(imports + "print('ok')\n")
+
+
+def timed(cmd, env=None) -> float:
+    t = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - t) * 1000
+
+
+def bench_local(project: Path, runs: int):
+    base = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    cold = [timed([sys.executable, str(project / "main.py")], base) for _ in range(runs)]
+
+    with tempfile.TemporaryDirectory() as prefix:
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+        env["PYTHONPYCACHEPREFIX"] = prefix
+        timed([sys.executable, str(project / "main.py")], env)     # 1회 채우기
+        warm = [timed([sys.executable, str(project / "main.py")], env) for _ in range(runs)]
+    return cold, warm
+
+
+def bench_docker(project: Path, runs: int):
+    volume = f"freeweb_build_cache__bench_{uuid.uuid4().hex[:8]}"
+    base = ["docker", "run", "--rm", "--network=none", *docker_fs_secu("bench", project, False)]
+    image_cmd = ["python:3.11-slim", "python", "-u", "main.py"]
+    # 이미지 pull / 첫 기동 비용은 제외
+    timed(base + image_cmd)
+    try:
+        cold = [timed(base + image_cmd) for _ in range(runs)]
+        cached = ["docker", "run", "--rm", "--network=none", *docker_fs_secu("bench", project, False, cache_volume=volume)]
+        timed(cached + image_cmd)
+        warm = [timed(cached + image_cmd) for _ in range(runs)]
+    finally:
+        subprocess.run(["docker", "volume", "rm", "-f", volume], stdout=subprocess.DEVNULL)
+    return cold, warm
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", type=int, default=300)
+    ap.add_argument("--funcs", type=int, default=40)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--docker", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        project = Path(d)
+        make_project(project, args.modules, args.funcs)
+        if args.docker:
+            cold, warm = bench_docker(project, args.runs)
+        else:
+            cold, warm = bench_local(project, args.runs)
+
+    c, w = statistics.median(cold), statistics.median(warm)
+    print(f"modules={args.modules} runs={args.runs} mode={'docker' if args.docker else 'local'}")
+    print(f"no cache   : median {c:8.1f} ms  {[round(x) for x in cold]}")
+    print(f"pyc cache  : median {w:8.1f} ms  {[round(x) for x in warm]}")
+    print(f"speedup    : {c / w:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# backend/test/fake_docker_socket.py
+# Docker Engine API 흉내 내는 unix socket 서버 (docker 없이 docker_api / ApiRun 확인용)
+# 실행: cd backend && python -m test.fake_docker_socket
+import asyncio
+import json
+import os
+import re
+import socketserver
+import struct
+import tempfile
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler
+
+from app.services.docker_api import DockerAPI, DockerAPIError, config_from_cli
+from app.services.container_backend import ApiRun
+
+
+class FakeEngine:
+    """
+    컨테이너 1개 = 미리 정해둔 출력 frame 목록 + exit code
+    start 되면 attach 스트림으로 frame을 흘리고 종료
+    """
+    def __init__(self, frames=None, exit_code=0):
+        self.frames = frames or [(1, b"hello\n"), (2, "에러 한글\n".encode("utf-8"))]
+        self.exit_code = exit_code
+        self.containers = {}
+        self.execs = {}
+        self.calls = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def new_container(self, name, config):
+        cid = uuid.uuid4().hex
+        self.containers[cid] = {
+            "name": name,
+            "config": config,
+            "started": threading.Event(),
+            "done": threading.Event(),
+            "killed": False,
+        }
+        return cid
+
+    def find(self, ref):
+        for cid, c in self.containers.items():
+            if ref in (cid, c["name"]):
+                return cid, c
+        return None, None
+
+
+def make_handler(engine: FakeEngine):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with engine.lock:
+                engine.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def address_string(self):
+            return "unix"
+
+        def _json(self, status, body=None):
+            data = b"" if body is None else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, frames, done):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.raw-stream")
+            self.end_headers()
+            for stream, payload in frames:
+                if done.is_set():
+                    break
+                self.wfile.write(struct.pack(">BxxxL", stream, len(payload)) + payload)
+                self.wfile.flush()
+            self.close_connection = True
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n)) if n else None
+
+        def _route(self, method):
+            path, _, query = self.path.partition("?")
+            engine.calls.append((method, path))
+            body = self._body()
+
+            if path == "/_ping":
+                data = b"OK"
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            if method == "POST" and path == "/containers/create":
+                name = dict(p.split("=", 1) for p in query.split("&") if "=" in p).get("name")
+                if body["Image"] == "missing:latest":
+                    return self._json(404, {"message": "No such image: missing:latest"})
+                return self._json(201, {"Id": engine.new_container(name, body)})
+
+            m = re.fullmatch(r"/containers/([^/]+)(/\w+)?", path)
+            if m:
+                cid, c = engine.find(m.group(1))
+                if c is None:
+                    return self._json(404, {"message": "No such container"})
+                action = m.group(2) or ""
+                if action == "/attach":
+                    c["started"].wait(5)
+                    self._stream(engine.frames, c["done"])
+                    c["done"].set()
+                    return
+                if action == "/start":
+                    c["started"].set()
+                    return self._json(204)
+                if action == "/wait":
+                    c["done"].wait(5)
+                    return self._json(200, {"StatusCode": 137 if c["killed"] else engine.exit_code})
+                if action in ("/kill", "/stop"):
+                    c["killed"] = True
+                    c["done"].set()
+                    return self._json(204)
+                if action == "/json":
+                    return self._json(200, {"Id": cid, "State": {"OOMKilled": False, "Running": not c["done"].is_set()}})
+                if action == "/exec":
+                    exec_id = uuid.uuid4().hex
+                    engine.execs[exec_id] = {"container": cid, "cmd": body["Cmd"]}
+                    return self._json(201, {"Id": exec_id})
+                if method == "DELETE" and not action:
+                    del engine.containers[cid]
+                    return self._json(204)
+
+            m = re.fullmatch(r"/exec/([^/]+)/(start|json)", path)
+            if m and m.group(1) in engine.execs:
+                if m.group(2) == "start":
+                    self._stream(engine.frames, threading.Event())
+                    return
+                return self._json(200, {"ExitCode": engine.exit_code, "Running": False})
+
+            self._json(404, {"message": f"page not found: {path}"})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+    return Handler
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(engine: FakeEngine):
+    path = os.path.join(tempfile.mkdtemp(), "docker.sock")
+    server = FakeDockerServer(path, make_handler(engine))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, path
+
+
+async def _collect(run):
+    return [chunk async for chunk in run.chunks()]
+
+
+def main():
+    engine = FakeEngine(exit_code=3)
+    server, sock = serve(engine)
+    api = DockerAPI(sock)
+
+    assert api.ping()
+    assert api.ping()
+    assert engine.connections == 1, "keep-alive connection 재사용 안 됨"
+
+    flags = [
+        "--cpus=0.5", "--memory=256m", "--pids-limit=64", "--network=none",
+        "--security-opt", "no-new-privileges", "--read-only",
+        "-v", "/tmp/p:/app:ro", "--tmpfs", "/tmp:rw,noexec,nosuid,size=64m", "-w", "/app",
+    ]
+    cfg = config_from_cli("python:3.11-slim", ["python", "main.py"], flags)
+    assert cfg["HostConfig"]["Memory"] == 256 * 1024 * 1024
+    assert cfg["HostConfig"]["NanoCpus"] == 500_000_000
+    assert cfg["HostConfig"]["Binds"] == ["/tmp/p:/app:ro"]
+
+    async def scenario():
+        # cold run: create -> attach -> start -> frames -> wait -> remove
+        run = await ApiRun.cold(api, "freeweb_test", "python:3.11-slim", ["python", "main.py"], flags)
+        chunks = await _collect(run)
+        assert b"".join(chunks).decode() == "hello\n에러 한글\n", chunks
+        assert await run.wait() == 3
+        assert not engine.containers, "컨테이너가 제거되지 않음"
+
+        # pooled: exec
+        engine.new_container("freeweb_pool_x", {})
+        run = await ApiRun.pooled(api, "freeweb_pool_x", ["python", "main.py"])
+        assert b"".join(await _collect(run)).decode() == "hello\n에러 한글\n"
+        assert await run.wait() == 3
+
+        # image 없음 -> DockerAPIError (호출 쪽에서 CLI fallback)
+        try:
+            await ApiRun.cold(api, "x", "missing:latest", [], [])
+            raise AssertionError("expected DockerAPIError")
+        except DockerAPIError as e:
+            assert e.status == 404
+
+    asyncio.run(scenario())
+    print("ok", len(engine.calls), "calls")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
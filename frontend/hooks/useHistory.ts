@@ -14,6 +14,8 @@ export type RunHistoryItem = {
 
     output: string;
     preview: string;
+    output_bytes?: number;
+    output_lines?: number;
 };
 
 export function useHistory(API_BASE: string, projectId: string) {
@@ -39,6 +41,32 @@ export function useHistory(API_BASE: string, projectId: string) {
         return data.output || "";
     }, [API_BASE, projectId]);
 
+    // 큰 output은 통째로 받지 않고 줄 범위만 (virtual scroll 용)
+    const loadHistoryLines = useCallback(async (runId: string, fromLine: number, toLine: number): Promise<string> => {
+        const res = await fetch(`${API_BASE}/history/${runId}?project_id=${encodeURIComponent(projectId)}&from_line=${fromLine}&to_line=${toLine}`);
+
+        if (!res.ok)
+            throw new Error("History load failed");
+
+        const data = await res.json();
+        return data.output || "";
+    }, [API_BASE, projectId]);
+
+    // byte cursor 기반 이어 읽기 (cursor_next / is_eof)
+    const loadHistoryRange = useCallback(async (runId: string, cursor: number, limit = 64 * 1024) => {
+        const res = await fetch(`${API_BASE}/history/${runId}?project_id=${encodeURIComponent(projectId)}&cursor=${cursor}&limit=${limit}`);
+
+        if (!res.ok)
+            throw new Error("History load failed");
+
+        const data = await res.json();
+        return {
+            output: (data.output || "") as string,
+            cursorNext: data.cursor_next as number,
+            isEof: Boolean(data.is_eof),
+        };
+    }, [API_BASE, projectId]);
+
     useEffect(() => {
         setHistory([]);
         setSelectedRunId(null);
@@ -48,5 +76,5 @@ export function useHistory(API_BASE: string, projectId: string) {
         refreshHistory();
     }, [projectId, refreshHistory]);
 
-    return { history, selectedRunId, refreshHistory, loadHistoryOutput };
+    return { history, selectedRunId, refreshHistory, loadHistoryOutput, loadHistoryLines, loadHistoryRange };
 }
\ No newline at end of file
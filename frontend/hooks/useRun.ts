@@ -43,8 +43,10 @@ export function useRun(API_BASE: string, projectId: string) {
         };
     }, [API_BASE, projectId]);
 
-    const stop = useCallback(async () => {
-        await fetch(`${API_BASE}/stop?project_id=${encodeURIComponent(projectId)}`, {
+    const stop = useCallback(async (runId?: string | null) => {
+        // run_id 가 있으면 그 run만, 없으면 프로젝트의 run 전체
+        const runParam = runId ? `&run_id=${encodeURIComponent(runId)}` : "";
+        await fetch(`${API_BASE}/stop?project_id=${encodeURIComponent(projectId)}${runParam}`, {
             method: "POST" 
         });
 
@@ -279,7 +279,7 @@ export default function Home() {
   };
 
   const onStop = async () => {
-    await run.stop();
+    await run.stop(currentRunId);
   };
 
   const onSave = async () => {